@@ -0,0 +1,62 @@
+"""Static background start-up cost: pens vs cold and warm picture cache.
+
+    python benchmarks/bench_background.py
+
+"pens" is draw_background() + draw_bridge() against the recording turtle
+stand-in (the Python side of drawing them on a Tk canvas, items not
+counted); "cold" rasterizes them into the PNG; "warm" is what a start with
+the PNG already cached does before handing it to bgpic. The cache goes to
+a temporary directory, not the user's.
+"""
+
+import os
+import shutil
+import statistics
+import tempfile
+import time
+
+import recording_turtle
+
+recording_turtle.install()
+CACHE = tempfile.mkdtemp(prefix="village-bench-")
+os.environ["VILLAGE_CACHE_DIR"] = CACHE
+
+import firstfile  # noqa: E402
+import scene  # noqa: E402
+
+firstfile.init_backend()
+
+
+def measure(fn, repeats=5):
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        times.append(1000 * (time.perf_counter() - start))
+    return statistics.median(times)
+
+
+def pens():
+    scene.draw_background(firstfile.background_turtle)
+    scene.draw_bridge(firstfile.bridge_turtle)
+
+
+def cold():
+    firstfile.render_background(firstfile.background_path())
+
+
+def warm():
+    os.path.exists(firstfile.background_path())
+
+
+if __name__ == "__main__":
+    try:
+        recording_turtle.reset()
+        pens()
+        items = recording_turtle.counts["fill"]
+        print(f"pens  {measure(pens):8.2f} ms  ({items} filled items on a canvas)")
+        print(f"cold  {measure(cold):8.2f} ms  "
+              f"({os.path.getsize(firstfile.background_path()) // 1024} KB PNG)")
+        print(f"warm  {measure(warm):8.2f} ms  (0 canvas items)")
+    finally:
+        shutil.rmtree(CACHE)
@@ -0,0 +1,86 @@
+"""Viewport culling: frame cost with and without it, and grid query cost.
+
+    python benchmarks/bench_culling.py [--frames N]
+
+The first table runs draw_frame() over the stretch of the loop where the
+boat and the right-hand clouds are past the window edge, against the
+recording turtle stand-in, with culling on and off and with instancing on
+and off. The second files N boxes spread over a world 20 windows wide and
+times a query of the visible rectangle against a linear scan of every box.
+"""
+
+import argparse
+import random
+import statistics
+import time
+
+import recording_turtle
+
+recording_turtle.install()
+
+import firstfile  # noqa: E402
+import spatial  # noqa: E402
+import state  # noqa: E402
+
+firstfile.init_backend()
+
+FIRST_FRAME = 400  # the boat has just left the window
+
+
+def frame_ms(frames, culling, instancing):
+    firstfile.CULLING = culling
+    firstfile.INSTANCING = instancing
+    times = []
+    for i in range(FIRST_FRAME, FIRST_FRAME + frames):
+        state.apply_state(state.state_at(i))
+        start = time.perf_counter()
+        firstfile.draw_frame()
+        times.append(1000 * (time.perf_counter() - start))
+    return statistics.median(times)
+
+
+def query_us(count, repeats=200):
+    rng = random.Random(count)
+    grid = spatial.SpatialGrid(firstfile.GRID_CELL)
+    boxes = {}
+    for key in range(count):
+        x = rng.uniform(-9000, 9000)
+        y = rng.uniform(-250, 250)
+        boxes[key] = (x, y, x + rng.uniform(10, 80), y + rng.uniform(10, 80))
+        grid.insert(key, boxes[key])
+    view = firstfile.view_box()
+
+    start = time.perf_counter()
+    for _ in range(repeats):
+        found = grid.query(view)
+    grid_us = 1e6 * (time.perf_counter() - start) / repeats
+
+    start = time.perf_counter()
+    for _ in range(repeats):
+        scanned = {k for k, b in boxes.items() if spatial.overlaps(b, view)}
+    scan_us = 1e6 * (time.perf_counter() - start) / repeats
+    assert found == scanned
+    return grid_us, scan_us, len(found)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="viewport culling benchmark")
+    parser.add_argument("--frames", type=int, default=100)
+    args = parser.parse_args(argv)
+
+    print(f"{'instancing':<11} {'all ms':>8} {'culled ms':>10}")
+    for instancing in (False, True):
+        everything = frame_ms(args.frames, False, instancing)
+        culled = frame_ms(args.frames, True, instancing)
+        print(f"{str(instancing):<11} {everything:>8.3f} {culled:>10.3f}")
+    print(firstfile.culling_summary())
+
+    print()
+    print(f"{'boxes':>6} {'grid us':>9} {'scan us':>9} {'visible':>8}")
+    for count in (100, 1000, 10000):
+        grid_us, scan_us, found = query_us(count)
+        print(f"{count:>6} {grid_us:>9.1f} {scan_us:>9.1f} {found:>8}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""Re-running draw_* code vs replaying its display list, no window.
+
+    python benchmarks/bench_displaylist.py
+
+For every shape this prints the display list's size (ops, vertices, bytes)
+and the time per call of the original drawing function and of the replay,
+both against the recording turtle stand-in so only Python cost is measured.
+The windmill replays from the keyframe cache; its hit/miss statistics over
+one full revolution are printed last.
+"""
+
+import argparse
+import statistics
+import time
+
+import recording_turtle
+
+recording_turtle.install()
+
+import scene  # noqa: E402
+import state  # noqa: E402
+
+
+def cases():
+    """name -> (re-run the drawing code, replay the display list)."""
+    f = scene
+    pen = recording_turtle.RecordingTurtle()
+    return {
+        "car": (lambda: f.draw_car(pen, -123.4),
+                lambda: f.replay_car(pen, -123.4)),
+        "boat": (lambda: f.draw_boat_with_turtle(pen, 77.7),
+                 lambda: f.replay_boat(pen, 77.7)),
+        "windmill": (lambda: f.draw_windmill(pen, 37.0, 1.3),
+                     lambda: f.replay_windmill(pen, 37.0, 1.3)),
+        "birds": (lambda: f.draw_birds_flying(pen, state.bird_positions, 7),
+                  lambda: f.replay_birds(pen, state.bird_positions, 7)),
+        "cow": (lambda: f.draw_3d_cow_batched(pen),
+                lambda: f.draw_3d_cow(pen)),
+    }
+
+
+def measure(fn, calls, repeats):
+    fn()
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        for _ in range(calls):
+            fn()
+        times.append(1000 * (time.perf_counter() - start) / calls)
+    return statistics.median(times)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="display list benchmark")
+    parser.add_argument("--calls", type=int, default=20)
+    parser.add_argument("--repeats", type=int, default=5)
+    args = parser.parse_args(argv)
+
+    print(f"{'shape':<10} {'draw ms':>9} {'replay ms':>10} {'speedup':>8}")
+    for name, (draw, replay) in cases().items():
+        draw_ms = measure(draw, args.calls, args.repeats)
+        replay_ms = measure(replay, args.calls, args.repeats)
+        print(f"{name:<10} {draw_ms:>9.3f} {replay_ms:>10.3f} "
+              f"{draw_ms / replay_ms:>7.1f}x")
+
+    print()
+    print(f"{'display list':<32} {'ops':>5} {'vertices':>9} {'bytes':>7}")
+    for label, ops, vertices, nbytes in scene.display_list_report():
+        print(f"{label:<32} {ops:>5} {vertices:>9} {nbytes:>7}")
+
+    pen = recording_turtle.RecordingTurtle()
+    scene.keyframes.clear()
+    for i in range(360 // scene.WINDMILL_STEP):
+        scene.replay_windmill(pen, i * scene.WINDMILL_STEP, 0)
+    print()
+    print(scene.keyframe_summary())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,137 @@
+"""Cost of each draw_* function and of a full animate() frame, no window.
+
+    python benchmarks/bench_draw.py                      # table
+    python benchmarks/bench_draw.py --json out.json      # machine-readable
+    python benchmarks/bench_draw.py --baseline out.json --frame-budget-ms 20
+
+For every case this reports wall time per call plus the goto, fill,
+color() and emitted-vertex counts from the recording turtle stand-in. With
+--baseline the run exits non-zero when a case got slower than the baseline
+by more than --tolerance or emits more vertices than it did, and with
+--frame-budget-ms when a full frame exceeds the budget.
+"""
+
+import argparse
+import json
+import platform
+import statistics
+import sys
+import time
+
+import recording_turtle
+from bench_pipeline import StepClock
+
+recording_turtle.install()
+
+import firstfile  # noqa: E402
+import geometry  # noqa: E402
+import scene  # noqa: E402
+import state  # noqa: E402
+
+firstfile.init_backend()
+# animate_frame times a full frame: a simulation step on per call and every
+# layer redrawn, not just the ones whose deadline came round
+firstfile.layer_scheduler = None
+state.game_loop = state.GameLoop(clock=StepClock(1 / state.SIM_HZ))
+
+
+def _pen():
+    return recording_turtle.RecordingTurtle()
+
+
+def cases():
+    pen = _pen()
+    return {
+        "draw_background": lambda: scene.draw_background(pen),
+        "draw_bridge": lambda: scene.draw_bridge(pen),
+        "draw_foreground": lambda: firstfile.draw_foreground(1.5),
+        "draw_3d_cow": lambda: scene.draw_3d_cow(pen),
+        "draw_clouds_with_turtle": lambda: scene.draw_clouds_with_turtle(pen, 50),
+        "draw_windmill": lambda: scene.draw_windmill(pen, 42, 1.0),
+        "draw_birds_flying": lambda: scene.draw_birds_flying(
+            pen, state.bird_positions, 3),
+        "animate_frame": firstfile.animate,
+    }
+
+
+def measure(fn, calls, repeats):
+    """Median ms per call over `repeats` runs, and the counts for one call."""
+    fn()  # warm caches the way a running scene would have them
+    recording_turtle.reset()
+    fn()
+    counted = dict(recording_turtle.counts)
+
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        for _ in range(calls):
+            fn()
+        times.append(1000 * (time.perf_counter() - start) / calls)
+    return dict(ms=statistics.median(times), **counted)
+
+
+def regressions(results, baseline, tolerance):
+    failed = []
+    for name, now in results.items():
+        before = baseline.get(name)
+        if before is None:
+            continue
+        if now["ms"] > before["ms"] * (1 + tolerance):
+            failed.append("%s: %.3f ms, baseline %.3f ms"
+                          % (name, now["ms"], before["ms"]))
+        if now["vertices"] > before["vertices"]:
+            failed.append("%s: %d vertices, baseline %d"
+                          % (name, now["vertices"], before["vertices"]))
+    return failed
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="draw_* cost benchmark")
+    parser.add_argument("--calls", type=int, default=20)
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--only", nargs="*", help="case names to run")
+    parser.add_argument("--json", help="write results to this file")
+    parser.add_argument("--baseline", help="results file to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.25,
+                        help="allowed relative slowdown vs the baseline")
+    parser.add_argument("--frame-budget-ms", type=float,
+                        help="fail when animate_frame takes longer")
+    args = parser.parse_args(argv)
+
+    results = {}
+    for name, fn in cases().items():
+        if args.only and name not in args.only:
+            continue
+        results[name] = measure(fn, args.calls, args.repeats)
+
+    print(f"{'case':<25} {'ms':>8} {'goto':>7} {'fill':>6} {'color':>6} {'vertices':>9}")
+    for name, r in results.items():
+        print(f"{name:<25} {r['ms']:>8.3f} {r['goto']:>7} {r['fill']:>6} "
+              f"{r['color']:>6} {r['vertices']:>9}")
+
+    if args.json:
+        report = {
+            "python": platform.python_version(),
+            "scale": geometry.SCALE,
+            "results": results,
+        }
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2, sort_keys=True)
+
+    failed = []
+    if args.baseline:
+        with open(args.baseline) as f:
+            failed += regressions(results, json.load(f)["results"],
+                                  args.tolerance)
+    frame = results.get("animate_frame")
+    if args.frame_budget_ms is not None and frame is not None:
+        if frame["ms"] > args.frame_budget_ms:
+            failed.append("animate_frame: %.3f ms over the %.1f ms budget"
+                          % (frame["ms"], args.frame_budget_ms))
+    for line in failed:
+        print("REGRESSION " + line, file=sys.stderr)
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
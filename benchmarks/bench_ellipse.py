@@ -0,0 +1,132 @@
+"""Ellipse vertex counts of the whole scene, fixed 361-step loop vs cached
+geometry.
+
+Draws the static layers once and then --frames animated frames against a
+counting stand-in for the turtle module, so no window is opened, first
+with the original fixed 361-step ellipse and then with the cached one:
+
+    python benchmarks/bench_ellipse.py [--frames N]
+
+Every layer is drawn with its draw_* code on every frame, as the scene was
+before instancing, scene files and update rates, so the counts show what
+the ellipse change alone does to the scene.
+"""
+
+import argparse
+import math
+import os
+import sys
+import time
+import types
+
+
+class CountingTurtle:
+    """Just enough of turtle.Turtle to count the gotos the scene emits."""
+
+    gotos = 0
+
+    def __init__(self):
+        self.items = []
+
+    def goto(self, *args):
+        CountingTurtle.gotos += 1
+
+    def __getattr__(self, name):
+        return lambda *args, **kwargs: None
+
+
+class CountingScreen:
+    def getcanvas(self):
+        return self
+
+    def __getattr__(self, name):
+        return lambda *args, **kwargs: None
+
+
+def install_stand_in():
+    fake = types.ModuleType("turtle")
+    fake.Turtle = CountingTurtle
+    fake.Screen = CountingScreen
+    sys.modules["turtle"] = fake
+    os.environ["VILLAGE_BACKEND"] = "turtle"
+    # draw the static layers with their draw_* code, not a picture or a
+    # compiled scene file
+    os.environ["VILLAGE_BACKGROUND_CACHE"] = "0"
+    os.environ["VILLAGE_SCENE"] = ""
+    os.environ["VILLAGE_RATES"] = "0"
+    os.environ["VILLAGE_CULLING"] = "0"
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def fixed_361_circle(t, rx, ry, cx, cy):
+    """The original draw_circle_with_turtle, kept for comparison."""
+    rx_s = rx * geometry.SCALE
+    ry_s = ry * geometry.SCALE
+    cx_s = geometry.sx(cx)
+    cy_s = geometry.sy(cy)
+
+    t.penup()
+    t.goto(cx_s, cy_s - ry_s)
+    t.pendown()
+    t.begin_fill()
+    for i in range(361):
+        angle = math.radians(i)
+        t.goto(rx_s * math.cos(angle) + cx_s, ry_s * math.sin(angle) + cy_s)
+    t.end_fill()
+
+
+def measure(circle, frames):
+    """Return (ellipse gotos, all gotos) of the static layers, the same per
+    animated frame, and ms per animated frame."""
+    counted_gotos = 0
+
+    def counted(t, rx, ry, cx, cy):
+        nonlocal counted_gotos
+        before = CountingTurtle.gotos
+        circle(t, rx, ry, cx, cy)
+        counted_gotos += CountingTurtle.gotos - before
+
+    scene.draw_circle_with_turtle = counted
+    # nothing recorded with the other ellipse may be replayed
+    scene._display_lists.clear()
+    scene.keyframes.clear()
+    state.apply_state(state.state_at(0))
+
+    CountingTurtle.gotos = 0
+    firstfile.draw_static()
+    firstfile.draw_foreground(state.wind_offset)
+    static = (counted_gotos, CountingTurtle.gotos)
+
+    counted_gotos = CountingTurtle.gotos = 0
+    start = time.perf_counter()
+    for _ in range(frames):
+        firstfile.draw_frame()
+        state.step()
+    elapsed = time.perf_counter() - start
+    return (static, (counted_gotos // frames, CountingTurtle.gotos // frames),
+            1000 * elapsed / frames)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="ellipse vertex benchmark")
+    parser.add_argument("--frames", type=int, default=50)
+    args = parser.parse_args()
+
+    install_stand_in()
+    import firstfile
+    import geometry
+    import scene
+    import state
+
+    firstfile.INSTANCING = False
+    firstfile.init_backend()
+    cached = scene.draw_circle_with_turtle
+    rows = [("fixed 361", measure(fixed_361_circle, args.frames)),
+            ("cached", measure(cached, args.frames))]
+
+    print(f"{'':<10} {'static layers':>23}   {'per animated frame':>23}")
+    print(f"{'ellipse':<10} {'ellipse verts':>14} {'gotos':>8}   "
+          f"{'ellipse verts':>14} {'gotos':>8} {'ms':>7}")
+    for name, ((s_verts, s_gotos), (f_verts, f_gotos), ms) in rows:
+        print(f"{name:<10} {s_verts:>14} {s_gotos:>8}   "
+              f"{f_verts:>14} {f_gotos:>8} {ms:>7.2f}")
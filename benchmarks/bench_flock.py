@@ -0,0 +1,72 @@
+"""Bird flock: per-frame cost of the NumPy boids at different sizes.
+
+    python benchmarks/bench_flock.py [--birds N ...] [--frames N]
+
+For each flock size this prints the time of one simulation step (spatial
+hash neighbour search plus steering), the neighbour pairs it looked at
+against the n*(n-1) an all-pairs search would, and the time to draw the
+flock into a raster framebuffer, each wing pose rasterized once and
+stamped at every bird, and for comparison bird by bird through penup/goto.
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import flock  # noqa: E402
+import geometry  # noqa: E402
+import raster  # noqa: E402
+
+
+def measure(fn, frames):
+    times = []
+    for frame in range(frames):
+        start = time.perf_counter()
+        fn(frame)
+        times.append(1000 * (time.perf_counter() - start))
+    return statistics.median(times)
+
+
+class Unbatched:
+    """Hides the batched pen methods, so every wing is drawn with goto."""
+
+    def __init__(self, pen):
+        self._pen = pen
+
+    def __getattr__(self, name):
+        if name in ("polylines", "stamp_polyline"):
+            raise AttributeError(name)
+        return getattr(self._pen, name)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="bird flock benchmark")
+    parser.add_argument("--birds", type=int, nargs="*",
+                        default=[100, 1000, 10000])
+    parser.add_argument("--frames", type=int, default=50)
+    parser.add_argument("--warmup", type=int, default=100,
+                        help="steps before timing, so the flock has formed")
+    args = parser.parse_args(argv)
+
+    fb = raster.Framebuffer(geometry.TARGET_W, geometry.TARGET_H)
+    batched = raster.RasterPen(fb, fb.width, fb.height)
+    unbatched = Unbatched(raster.RasterPen(fb, fb.width, fb.height))
+    print(f"{'birds':>6} {'step ms':>8} {'pairs':>9} {'all pairs':>11} "
+          f"{'draw ms':>8} {'goto ms':>8}")
+    for count in args.birds:
+        birds = flock.Flock(count)
+        birds.advance_to(args.warmup)
+        step_ms = measure(lambda frame: birds.step(), args.frames)
+        draw_ms = measure(lambda frame: birds.draw(batched, frame), args.frames)
+        goto_ms = measure(lambda frame: birds.draw(unbatched, frame),
+                          max(1, args.frames // 10))
+        print(f"{count:>6} {step_ms:>8.2f} {birds.pairs:>9} "
+              f"{count * (count - 1):>11} {draw_ms:>8.2f} {goto_ms:>8.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""Day/night cycle: re-tinting palette entries vs redrawing in new colours.
+
+    python benchmarks/bench_palette.py [--day SECONDS]
+
+Runs animate() on the canvas backend against the recording stand-in for
+one whole day of VILLAGE_DAY=--day seconds, one simulation step per frame,
+and prints what keeping the palette up to date cost: per frame, per step
+of the lookup table and in itemconfig calls. For comparison it times
+redrawing the static layers and the foreground, which is what every step
+would cost if the colours were changed by drawing again.
+"""
+
+import argparse
+import os
+import statistics
+import time
+
+import recording_turtle
+from bench_pipeline import StepClock
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="day/night palette benchmark")
+    parser.add_argument("--day", type=float, default=60.0)
+    args = parser.parse_args(argv)
+
+    os.environ["VILLAGE_DAY"] = str(args.day)
+    # the cached background picture could not be re-tinted
+    os.environ["VILLAGE_BACKGROUND_CACHE"] = "0"
+    recording_turtle.install("canvas")
+
+    import firstfile
+    import state
+
+    firstfile.init_backend()
+    firstfile.draw_static()
+    firstfile.draw_foreground(state.wind_offset)
+    canvas = firstfile.screen.getcanvas()
+    calls = {"itemconfig": 0}
+
+    def itemconfig(*args, **kwargs):
+        calls["itemconfig"] += 1
+
+    timings = []
+    update_palette = firstfile.update_palette
+
+    def timed_update():
+        calls["itemconfig"] = 0
+        start = time.perf_counter()
+        update_palette()
+        timings.append((1000 * (time.perf_counter() - start),
+                        calls["itemconfig"]))
+
+    canvas.itemconfig = itemconfig
+    firstfile.update_palette = timed_update
+    state.game_loop = state.GameLoop(clock=StepClock(1 / state.SIM_HZ))
+    frames = int(args.day * state.SIM_HZ)
+    for _ in range(frames):
+        firstfile.animate()
+
+    day = firstfile.day
+    changes = [(ms, n) for ms, n in timings if n]
+    items = sum(len(pen.items) for pen in firstfile._canvas_pens)
+    print(f"day {args.day:g} s: {frames} frames, {day.steps} steps, "
+          f"{len(day.entries)} palette entries, {items} canvas items")
+    print(f"re-tint  {statistics.mean(ms for ms, n in timings):8.4f} ms/frame  "
+          f"{statistics.mean(ms for ms, n in changes):7.3f} ms/step  "
+          f"{statistics.mean(n for ms, n in changes):5.1f} itemconfig/step  "
+          f"({len(changes)} steps changed a colour)")
+
+    def redraw():
+        firstfile.draw_static()
+        firstfile.draw_foreground(state.wind_offset)
+
+    times = []
+    for _ in range(5):
+        start = time.perf_counter()
+        redraw()
+        times.append(1000 * (time.perf_counter() - start))
+    print(f"redraw   {'':>16}  {statistics.median(times):7.3f} ms/step  "
+          f"{items:5d} items/step (static layers and foreground)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""Particles: step and draw cost with tens of thousands live, over a long run.
+
+    python benchmarks/bench_particles.py [--live N] [--steps N] [--effect NAME]
+
+Emits rain (or --effect) at the rate that keeps about --live particles
+alive, and prints the live count, the mean step and draw times and the
+memory all the steps so far have kept, at regular points of the run. The
+live count should level off and stay there, and the steps should keep no
+memory: the arrays were all allocated up front.
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import geometry  # noqa: E402
+import particles  # noqa: E402
+import raster  # noqa: E402
+import scene  # noqa: E402
+import state  # noqa: E402
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="particle benchmark")
+    parser.add_argument("--live", type=int, default=50000)
+    parser.add_argument("--steps", type=int, default=3000)
+    parser.add_argument("--effect", default="rain",
+                        choices=sorted(particles.EFFECTS))
+    args = parser.parse_args(argv)
+
+    effect = particles.EFFECTS[args.effect]
+    mean_life = sum(effect.life) / 2
+    sources = list(scene.CHIMNEYS.values())
+    per_step = args.live / mean_life
+    if effect.origin == "sources":
+        per_step /= len(sources)
+    pool = particles.Particles(effect._replace(rate=per_step),
+                               capacity=int(args.live * 1.1))
+    fb = raster.Framebuffer(geometry.TARGET_W, geometry.TARGET_H)
+    pen = raster.RasterPen(fb, fb.width, fb.height)
+
+    report_every = max(1, args.steps // 10)
+    print(f"{args.effect}: {per_step:.0f} per step, life {effect.life}, "
+          f"capacity {pool.capacity}")
+    print(f"{'step':>6} {'live':>7} {'step ms':>8} {'draw ms':>8} "
+          f"{'dropped':>8} {'KB kept':>8}")
+    tracemalloc.start()
+    kept = 0
+    step_ms, draw_ms = [], []
+    for n in range(1, args.steps + 1):
+        wind = state.wind_at(n)
+        before = tracemalloc.get_traced_memory()[0]
+        start = time.perf_counter()
+        pool.step(wind, sources)
+        elapsed = time.perf_counter() - start
+        kept += tracemalloc.get_traced_memory()[0] - before
+        step_ms.append(1000 * elapsed)
+        if n % 10 == 0:
+            start = time.perf_counter()
+            pool.draw(pen)
+            draw_ms.append(1000 * (time.perf_counter() - start))
+        if n % report_every == 0:
+            print(f"{n:>6} {pool.live:>7} {statistics.mean(step_ms):>8.2f} "
+                  f"{statistics.mean(draw_ms):>8.2f} {pool.dropped:>8} "
+                  f"{kept / 1024:>8.1f}")
+            step_ms, draw_ms = [], []
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+"""Pipelined geometry: frame throughput of animate() with and without it.
+
+    python benchmarks/bench_pipeline.py [--frames N] [--redraw-ms MS]
+        [--birds N] [--cars N] [--particles LIST] [--tk]
+
+Runs animate() on the canvas backend for --frames frames, one simulation
+step each, first serially and then with the geometry worker thread, and
+prints frames per second and the time the main thread spent waiting for
+the worker. Without --tk the canvas is the recording stand-in and a
+screen update sleeps --redraw-ms, standing in for Tk redrawing the
+window; with --tk it is a real window (needs a display). --birds, --cars
+and --particles set VILLAGE_BIRDS, VILLAGE_CARS and VILLAGE_PARTICLES to
+give the worker more to do.
+
+The worker's geometry only overlaps Tk's redraw, so a frame gains at most
+the shorter of the two. The plain scene has well under a millisecond of
+computed geometry, and pipelining it gains nothing. The default run has
+a flock of 1000 birds, which is about as much geometry as a 4 ms redraw
+and shows the gain (about x1.3 here). Particles lose: their geometry is
+cheap NumPy, but every particle is a canvas item the main thread has to
+submit from the buffer anyway, so the pipeline only adds the copy.
+VILLAGE_PIPELINE is turned down with VILLAGE_PARTICLES for that reason.
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import recording_turtle
+
+
+class StepClock:
+    """A clock that moves on one simulation step every two readings, which
+    is one step per animate()."""
+
+    def __init__(self, dt):
+        self.now = 0.0
+        self.dt = dt
+
+    def __call__(self):
+        self.now += self.dt / 2
+        return self.now
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="pipelined geometry benchmark")
+    parser.add_argument("--frames", type=int, default=300)
+    parser.add_argument("--redraw-ms", type=float, default=4.0)
+    parser.add_argument("--birds", type=int, default=1000)
+    parser.add_argument("--cars", type=int, default=0)
+    parser.add_argument("--particles", default="")
+    parser.add_argument("--tk", action="store_true",
+                        help="draw into a real Tk window")
+    args = parser.parse_args(argv)
+
+    os.environ["VILLAGE_BIRDS"] = str(args.birds)
+    os.environ["VILLAGE_CARS"] = str(args.cars)
+    os.environ["VILLAGE_PARTICLES"] = args.particles
+    if args.tk:
+        os.environ["VILLAGE_BACKEND"] = "canvas"
+        sys.path.insert(0, os.path.dirname(os.path.dirname(
+            os.path.abspath(__file__))))
+    else:
+        recording_turtle.install("canvas")
+        recording_turtle.redraw_ms = args.redraw_ms
+
+    import firstfile
+    import state
+
+    firstfile.init_backend()
+    firstfile.draw_static()
+    firstfile.draw_foreground(state.wind_offset)
+    # the loop below drives animate(); a real window must not call it too
+    firstfile.screen.ontimer = lambda *args: None
+
+    print(f"{args.frames} frames, birds {args.birds}, cars {args.cars}, "
+          f"particles {args.particles or '-'}, "
+          + ("Tk window" if args.tk else f"redraw {args.redraw_ms} ms"))
+    print(f"{'mode':>10} {'fps':>8} {'ms/frame':>9} {'wait ms':>8}")
+    serial_fps = None
+    for pipelined in (False, True):
+        state.game_loop = state.GameLoop(clock=StepClock(1 / state.SIM_HZ))
+        if pipelined:
+            firstfile.start_pipeline()
+        firstfile.animate()  # warm up: create the items, fill the caches
+        start = time.perf_counter()
+        for _ in range(args.frames):
+            firstfile.animate()
+        elapsed = time.perf_counter() - start
+        wait = 0.0
+        if pipelined:
+            wait = firstfile.pipeline.stats()["wait"]
+            firstfile.stop_pipeline()
+        fps = args.frames / elapsed
+        serial_fps = serial_fps or fps
+        print(f"{'pipelined' if pipelined else 'serial':>10} {fps:>8.1f} "
+              f"{1000 / fps:>9.2f} {1000 * wait / args.frames:>8.2f}"
+              + (f"   x{fps / serial_fps:.2f}" if pipelined else ""))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+"""Frame rate of the headless NumPy raster backend at 1920x1066.
+
+    python benchmarks/bench_raster.py [frames]
+
+"restore" only copies the cached background + bridge snapshot into the
+frame; "static" renders a frame of everything that does not move: the
+snapshot plus the retained houses, tree and cow layers; "full" also draws
+the animated layers.
+"""
+
+import os
+import sys
+import time
+
+os.environ["VILLAGE_BACKEND"] = "raster"
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import firstfile  # noqa: E402
+import state  # noqa: E402
+from geometry import TARGET_H, TARGET_W  # noqa: E402
+
+
+def fps(fn, frames):
+    start = time.perf_counter()
+    for _ in range(frames):
+        fn()
+    return frames / (time.perf_counter() - start)
+
+
+def static_frame():
+    firstfile.begin_frame()
+    firstfile.cull()
+    firstfile.update_foreground(state.wind_offset)
+
+
+def full_frame():
+    firstfile.draw_frame()
+    state.step()
+
+
+if __name__ == "__main__":
+    frames = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+
+    start = time.perf_counter()
+    firstfile.init_backend()
+    firstfile.draw_static()
+    firstfile.draw_foreground(state.wind_offset)
+    setup_ms = 1000 * (time.perf_counter() - start)
+
+    print(f"{TARGET_W}x{TARGET_H}, "
+          f"static layers rasterized once in {setup_ms:.1f} ms")
+    print(f"restore {fps(firstfile.begin_frame, frames):8.1f} fps")
+    print(f"static  {fps(static_frame, frames):8.1f} fps")
+    print(f"full    {fps(full_frame, frames):8.1f} fps")
@@ -0,0 +1,65 @@
+"""Per-layer update rates: frame cost and redraws per layer per second.
+
+    python benchmarks/bench_rates.py [--frames N] [--rates SPEC]
+        [--birds N] [--cars N] [--particles LIST]
+
+Runs animate() on the canvas backend against the recording stand-in, one
+simulation step per frame, with every layer redrawn on every frame and
+then with the layer scheduler (--rates as for VILLAGE_RATES), and prints
+the time per frame and how often each layer was redrawn per second.
+"""
+
+import argparse
+import os
+import time
+
+import recording_turtle
+from bench_pipeline import StepClock
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="layer update rate benchmark")
+    parser.add_argument("--frames", type=int, default=500)
+    parser.add_argument("--rates", default="")
+    parser.add_argument("--birds", type=int, default=0)
+    parser.add_argument("--cars", type=int, default=0)
+    parser.add_argument("--particles", default="")
+    args = parser.parse_args(argv)
+
+    os.environ["VILLAGE_BIRDS"] = str(args.birds)
+    os.environ["VILLAGE_CARS"] = str(args.cars)
+    os.environ["VILLAGE_PARTICLES"] = args.particles
+    recording_turtle.install("canvas")
+
+    import firstfile
+    import scheduler
+    import state
+
+    firstfile.init_backend()
+    firstfile.draw_static()
+    firstfile.draw_foreground(state.wind_offset)
+
+    rates = firstfile.layer_rates(args.rates)
+    names = sorted(rates)
+    print(f"{args.frames} frames, birds {args.birds}, cars {args.cars}, "
+          f"particles {args.particles or '-'}")
+    print(f"{'mode':>10} {'ms/frame':>9} " + " ".join(f"{n:>9}" for n in names))
+    for mode in ("every", "scheduled"):
+        layers = scheduler.RateScheduler(
+            rates if mode == "scheduled" else dict.fromkeys(rates, state.SIM_HZ),
+            state.SIM_HZ)
+        firstfile.layer_scheduler = layers
+        state.game_loop = state.GameLoop(clock=StepClock(1 / state.SIM_HZ))
+        firstfile.animate()  # warm up: create the items, fill the caches
+        layers.reset(state.render_time)
+        start = time.perf_counter()
+        for _ in range(args.frames):
+            firstfile.animate()
+        elapsed = time.perf_counter() - start
+        per_second = layers.stats()
+        print(f"{mode:>10} {1000 * elapsed / args.frames:>9.3f} "
+              + " ".join(f"{per_second[n]:>9.1f}" for n in names))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""Scene file loading: JSON + tessellation vs the memory-mapped compiled form.
+
+    python benchmarks/bench_scenefile.py [--primitives N ...]
+
+For the shipped village and for synthetic scenes of N random polygons and
+ellipses this prints the time to read and tessellate the JSON, to compile
+and write the binary form, and to map the binary again, which is what a
+start with a warm cache does. Files go to a temporary directory.
+"""
+
+import argparse
+import os
+import random
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import scenefile  # noqa: E402
+
+
+def synthetic(count, seed=0):
+    rng = random.Random(seed)
+    items = []
+    for _ in range(count):
+        color = [rng.random(), rng.random(), rng.random()]
+        x, y = rng.uniform(-450, 450), rng.uniform(-250, 250)
+        if rng.random() < 0.5:
+            items.append({"color": color, "polygon": [
+                [x, y], [x + rng.uniform(2, 20), y],
+                [x + rng.uniform(2, 20), y + rng.uniform(2, 20)]]})
+        else:
+            items.append({"color": color, "ellipse": [
+                x, y, rng.uniform(1, 10), rng.uniform(1, 10)]})
+    return {"format": scenefile.FORMAT, "version": scenefile.VERSION,
+            "layers": [{"name": "synthetic", "items": items}]}
+
+
+def measure(fn, repeats):
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        result = fn()
+        times.append(1000 * (time.perf_counter() - start))
+    return statistics.median(times), result
+
+
+def run(label, path, tmp, repeats):
+    binary = os.path.join(tmp, "scene.bin")
+    json_ms, layers = measure(
+        lambda: scenefile.compile_scene(scenefile.load(path)), 1)
+    write_ms, _ = measure(
+        lambda: scenefile.write_compiled(binary, layers), 1)
+    map_ms, (_, mapped) = measure(
+        lambda: scenefile.load_compiled(binary), repeats)
+    vertices = sum(dl.vertices for dl in mapped.values())
+    print(f"{label:<10} {json_ms:>10.1f} {write_ms:>9.2f} {map_ms:>8.3f} "
+          f"{vertices:>9} {os.path.getsize(binary) // 1024:>8}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="scene file benchmark")
+    parser.add_argument("--primitives", type=int, nargs="*",
+                        default=[1000, 10000, 50000])
+    parser.add_argument("--repeats", type=int, default=20)
+    args = parser.parse_args(argv)
+
+    tmp = tempfile.mkdtemp(prefix="village-scene-")
+    try:
+        print(f"{'scene':<10} {'json ms':>10} {'write ms':>9} {'map ms':>8} "
+              f"{'vertices':>9} {'KB':>8}")
+        run("village", scenefile.DEFAULT_SCENE, tmp, args.repeats)
+        for count in args.primitives:
+            path = os.path.join(tmp, "synthetic.json")
+            scenefile.dump(synthetic(count), path)
+            run(str(count), path, tmp, args.repeats)
+    finally:
+        shutil.rmtree(tmp)
+
+
+if __name__ == "__main__":
+    main()
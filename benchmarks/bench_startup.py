@@ -0,0 +1,52 @@
+"""Import cost of each module, and proof that none of them loads tkinter.
+
+    python benchmarks/bench_startup.py [runs]
+
+Every import is timed in a fresh interpreter, so nothing is cached between
+runs. The run exits non-zero if importing any of the modules pulls in
+tkinter (or turtle, which imports it); creating the window is left to
+firstfile.main()/init_backend().
+"""
+
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MODULES = ("geometry", "state", "displaylist", "scene", "firstfile")
+
+PROBE = """
+import json, sys, time
+start = time.perf_counter()
+import %s
+ms = 1000 * (time.perf_counter() - start)
+print(json.dumps({"ms": ms, "loaded": [m for m in ("tkinter", "turtle", "numpy")
+                                       if m in sys.modules]}))
+"""
+
+
+def probe(module):
+    out = subprocess.run([sys.executable, "-c", PROBE % module], cwd=ROOT,
+                         capture_output=True, text=True, check=True).stdout
+    return json.loads(out)
+
+
+def main(runs):
+    failed = []
+    print(f"{'module':<12} {'import ms':>10}  loaded")
+    for module in MODULES:
+        results = [probe(module) for _ in range(runs)]
+        loaded = results[0]["loaded"]
+        ms = statistics.median(r["ms"] for r in results)
+        print(f"{module:<12} {ms:>10.2f}  {', '.join(loaded) or '-'}")
+        if "tkinter" in loaded or "turtle" in loaded:
+            failed.append(module)
+    for module in failed:
+        print("FAIL importing %s loads tkinter" % module, file=sys.stderr)
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(int(sys.argv[1]) if len(sys.argv) > 1 else 5))
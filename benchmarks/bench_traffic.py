@@ -0,0 +1,60 @@
+"""Road traffic: per-step cost of the array-backed vehicle store.
+
+    python benchmarks/bench_traffic.py [--cars N ...] [--boats N] [--frames N]
+
+For each number of cars asked for this prints how many the lanes took
+(each holds as many as fit along the window), the median time of one
+step of every vehicle, how many are in view and the time to draw those
+into a raster framebuffer (one sprite blit each), the closest any
+vehicle got to the one ahead over the run (never below traffic.MIN_GAP)
+and how many were held up behind a slower one on the last step.
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import geometry  # noqa: E402
+import raster  # noqa: E402
+import traffic  # noqa: E402
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="traffic benchmark")
+    parser.add_argument("--cars", type=int, nargs="*",
+                        default=[10, 50, 500])
+    parser.add_argument("--boats", type=int, default=6)
+    parser.add_argument("--frames", type=int, default=500)
+    args = parser.parse_args(argv)
+
+    fb = raster.Framebuffer(geometry.TARGET_W, geometry.TARGET_H)
+    pen = raster.RasterPen(fb, fb.width, fb.height)
+    print(f"{'cars':>6} {'placed':>7} {'step ms':>8} {'in view':>8} "
+          f"{'draw ms':>8} {'min gap':>8} {'held up':>8}")
+    for count in args.cars:
+        store = traffic.Traffic({"car": count, "boat": args.boats})
+        step_ms, draw_ms = [], []
+        min_gap = float("inf")
+        for frame in range(args.frames):
+            start = time.perf_counter()
+            store.step()
+            step_ms.append(1000 * (time.perf_counter() - start))
+            gap = (store.s[store.lead] + store.lead_loop - store.s
+                   - store.length)
+            min_gap = min(min_gap, float(gap.min()))
+            if frame % 10 == 0:
+                start = time.perf_counter()
+                drawn = store.draw(pen, "car") + store.draw(pen, "boat")
+                draw_ms.append(1000 * (time.perf_counter() - start))
+        held = int((store.v < store.top).sum())
+        print(f"{count:>6} {store.counts['car']:>7} "
+              f"{statistics.median(step_ms):>8.3f} {drawn:>8} "
+              f"{statistics.median(draw_ms):>8.2f} {min_gap:>8.1f} {held:>8}")
+
+
+if __name__ == "__main__":
+    main()
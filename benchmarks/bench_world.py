@@ -0,0 +1,68 @@
+"""Procedural world: per-frame cost and memory as the camera travels.
+
+    python benchmarks/bench_world.py [--distance BASE_UNITS] [--step N]
+    python benchmarks/bench_world.py --memory
+
+Pans the camera across the world in steps of --step base units, streaming
+chunks in and drawing the visible props onto the recording turtle stand-in,
+and prints the mean frame cost and the cached chunks, props and grid cells
+at intervals. All of them should stay flat however far it goes. --memory
+adds the memory traced by tracemalloc, which makes every frame much slower.
+"""
+
+import argparse
+import statistics
+import time
+import tracemalloc
+
+import recording_turtle
+
+recording_turtle.install()
+
+import firstfile  # noqa: E402
+import scene  # noqa: E402
+import world  # noqa: E402
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="procedural world benchmark")
+    parser.add_argument("--distance", type=float, default=100000)
+    parser.add_argument("--step", type=float, default=10)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--memory", action="store_true")
+    args = parser.parse_args(argv)
+
+    village = world.World(args.seed)
+    camera = world.Camera()
+    pen = recording_turtle.RecordingTurtle()
+    window = firstfile.view_box()
+    frames = int(args.distance / args.step)
+    report_every = max(1, frames // 10)
+
+    if args.memory:
+        tracemalloc.start()
+    print(f"{'camera x':>9} {'frame ms':>9} {'chunks':>7} {'props':>6} "
+          f"{'cells':>6} {'made':>6} {'evicted':>8} {'KB':>8}")
+    times = []
+    for frame in range(frames + 1):
+        start = time.perf_counter()
+        camera.pan(args.step)
+        view = camera.view(window)
+        village.update(view)
+        for prop in village.visible(view):
+            scene.replay_prop(pen, prop.kind, prop.x - camera.x, prop.y,
+                              3 * frame + prop.phase, 0)
+        times.append(1000 * (time.perf_counter() - start))
+        if frame % report_every == 0:
+            s = village.stats()
+            kb = ("%.0f" % (tracemalloc.get_traced_memory()[0] / 1024)
+                  if args.memory else "-")
+            print(f"{camera.x:>9.0f} {statistics.mean(times):>9.3f} "
+                  f"{s['chunks']:>7} {s['props']:>6} "
+                  f"{len(village.grid.cells):>6} {s['generated']:>6} "
+                  f"{s['evictions']:>8} {kb:>8}")
+            times = []
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""A counting stand-in for the turtle module.
+
+install() must run before firstfile is imported. After that every Screen
+and Turtle the scene creates is a recording object: nothing is drawn and
+no window opens, but each goto, fill and color() call is tallied in
+`counts`.
+
+install("canvas") runs the scene on the canvas backend instead, with the
+recording screen standing in for the Tk canvas. Its update() then sleeps
+for `redraw_ms`, as a stand-in for Tk redrawing the window (which it
+does without holding the GIL).
+"""
+
+import os
+import sys
+import time
+import types
+
+counts = {}
+redraw_ms = 0.0
+
+
+def reset():
+    counts.update(goto=0, fill=0, color=0, vertices=0)
+
+
+reset()
+
+
+class RecordingTurtle:
+    """Enough of turtle.Turtle for the draw_* functions, counting as it goes."""
+
+    def __init__(self):
+        self.items = []
+        self._down = True
+        self._filling = False
+
+    def goto(self, x, y=None):
+        counts["goto"] += 1
+        if self._down or self._filling:
+            counts["vertices"] += 1
+
+    def color(self, *args):
+        counts["color"] += 1
+
+    def begin_fill(self):
+        counts["fill"] += 1
+        self._filling = True
+
+    def end_fill(self):
+        self._filling = False
+
+    def penup(self):
+        self._down = False
+
+    def pendown(self):
+        self._down = True
+
+    def __getattr__(self, name):
+        # pensize, clear, hideturtle, speed, write, ...
+        return _ignore
+
+
+class RecordingScreen:
+    def getcanvas(self):
+        return self
+
+    def update(self):
+        if redraw_ms:
+            time.sleep(redraw_ms / 1000)
+
+    def __getattr__(self, name):
+        # setup, bgcolor, tracer, update, ontimer, tag_raise, ...
+        return _ignore
+
+
+def _ignore(*args, **kwargs):
+    return None
+
+
+def install(backend="turtle"):
+    """Swap the recording classes in for turtle.Screen/turtle.Turtle."""
+    fake = types.ModuleType("turtle")
+    fake.Turtle = RecordingTurtle
+    fake.Screen = RecordingScreen
+    sys.modules["turtle"] = fake
+    os.environ["VILLAGE_BACKEND"] = backend
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    if root not in sys.path:
+        sys.path.insert(0, root)
@@ -0,0 +1,249 @@
+"""Compact, array-backed display lists for the turtle-style drawing code.
+
+A draw_* function is run once against a Recorder, which stores what it did
+as an op stream: one opcode byte and one integer argument per op, plus a
+flat float array of vertex coordinates. Replaying the list drives any pen
+with the turtle API (turtle.Turtle, CanvasPen, RasterPen, ...) under a
+translate/rotate/scale transform, without redoing the trig and scaling the
+drawing code did to produce those vertices.
+"""
+
+import math
+from array import array
+from collections import OrderedDict
+
+COLOR, PENSIZE, PENUP, PENDOWN, GOTO, BEGIN_FILL, END_FILL, FILL = range(8)
+
+
+class DisplayList:
+    """ops[i] is the opcode, args[i] its argument.
+
+    COLOR    index into `colors` (the original color() arguments)
+    PENSIZE  pen width
+    GOTO     end offset into `coords`; the run starts where the previous
+             GOTO or FILL ended
+    FILL     like GOTO, for the usual filled shape: move to the first
+             vertex with the pen up, then pen down and fill the rest
+    others   unused (0)
+    """
+
+    __slots__ = ("ops", "args", "coords", "colors")
+
+    def __init__(self):
+        self.ops = array("B")
+        self.args = array("I")
+        self.coords = array("d")
+        self.colors = []
+
+    def __len__(self):
+        return len(self.ops)
+
+    @property
+    def vertices(self):
+        return len(self.coords) // 2
+
+    def nbytes(self):
+        """Bytes held by the op stream, vertex array and color table."""
+        return (self.ops.itemsize * len(self.ops)
+                + self.args.itemsize * len(self.args)
+                + self.coords.itemsize * len(self.coords)
+                + 8 * sum(len(c) for c in self.colors))
+
+    def bounds(self):
+        """(x0, y0, x1, y1) around every recorded vertex, or None if empty."""
+        if not self.coords:
+            return None
+        xs = self.coords[0::2]
+        ys = self.coords[1::2]
+        return (min(xs), min(ys), max(xs), max(ys))
+
+    def mirrored(self):
+        """A copy flipped left to right within its own bounds, so it covers
+        the same box."""
+        flipped = DisplayList()
+        flipped.ops = array("B", self.ops)
+        flipped.args = array("I", self.args)
+        flipped.colors = list(self.colors)
+        flipped.coords = array("d", self.coords)
+        if self.coords:
+            x0, _, x1, _ = self.bounds()
+            flipped.coords[0::2] = array("d", [x0 + x1 - x
+                                               for x in self.coords[0::2]])
+        return flipped
+
+    def replay(self, t, dx=0.0, dy=0.0, angle=0.0, scale=1.0):
+        """Draw onto pen t, rotated by `angle` degrees about the recording
+        origin, scaled, then moved by (dx, dy) pixels."""
+        coords = self.coords
+        colors = self.colors
+        goto = t.goto
+        penup = t.penup
+        pendown = t.pendown
+        if angle or scale != 1:
+            rad = math.radians(angle)
+            c = math.cos(rad) * scale
+            s = math.sin(rad) * scale
+            run = iter(coords)
+            coords = [v for x, y in zip(run, run)
+                      for v in (c * x - s * y, s * x + c * y)]
+        start = 0
+        for op, arg in zip(self.ops, self.args):
+            if op == FILL:
+                penup()
+                goto(coords[start] + dx, coords[start + 1] + dy)
+                pendown()
+                t.begin_fill()
+                run = iter(coords[start + 2:arg])
+                for x, y in zip(run, run):
+                    goto(x + dx, y + dy)
+                t.end_fill()
+                start = arg
+            elif op == GOTO:
+                if arg - start == 2:
+                    goto(coords[start] + dx, coords[start + 1] + dy)
+                else:
+                    run = iter(coords[start:arg])
+                    for x, y in zip(run, run):
+                        goto(x + dx, y + dy)
+                start = arg
+            elif op == COLOR:
+                t.color(*colors[arg])
+            elif op == PENUP:
+                penup()
+            elif op == PENDOWN:
+                pendown()
+            elif op == PENSIZE:
+                t.pensize(arg)
+            elif op == BEGIN_FILL:
+                t.begin_fill()
+            elif op == END_FILL:
+                t.end_fill()
+
+
+class Recorder:
+    """Turtle stand-in that writes what it is asked to draw into a DisplayList.
+
+    Consecutive gotos become one GOTO op, a filled shape started from a
+    single pen-up move becomes one FILL op, and pen state changes that
+    would not change anything are dropped.
+    """
+
+    def __init__(self):
+        self.display_list = DisplayList()
+        self._color_index = {}
+        self._down = True
+        # coords offsets where the last two GOTO runs began
+        self._run_starts = (0, 0)
+
+    def _op(self, op, arg=0):
+        dl = self.display_list
+        dl.ops.append(op)
+        dl.args.append(arg)
+
+    def color(self, *args):
+        index = self._color_index.get(args)
+        if index is None:
+            index = self._color_index[args] = len(self.display_list.colors)
+            self.display_list.colors.append(args)
+        self._op(COLOR, index)
+
+    def pensize(self, width):
+        self._op(PENSIZE, int(width))
+
+    def penup(self):
+        if self._down:
+            self._down = False
+            self._op(PENUP)
+
+    def pendown(self):
+        if not self._down:
+            self._down = True
+            self._op(PENDOWN)
+
+    def goto(self, x, y=None):
+        if y is None:
+            x, y = x
+        dl = self.display_list
+        if dl.ops and dl.ops[-1] == GOTO:
+            dl.coords.append(x)
+            dl.coords.append(y)
+            dl.args[-1] = len(dl.coords)
+        else:
+            self._run_starts = (self._run_starts[1], len(dl.coords))
+            dl.coords.append(x)
+            dl.coords.append(y)
+            self._op(GOTO, len(dl.coords))
+
+    def begin_fill(self):
+        self._op(BEGIN_FILL)
+
+    def end_fill(self):
+        dl = self.display_list
+        ops = dl.ops
+        if (ops[-4:] == _FILL_PATTERN
+                and dl.args[-4] - self._run_starts[0] == 2):
+            end = dl.args[-1]
+            del ops[-4:], dl.args[-4:]
+            if ops and ops[-1] == PENUP:
+                del ops[-1], dl.args[-1]
+            self._op(FILL, end)
+        else:
+            self._op(END_FILL)
+
+
+_FILL_PATTERN = array("B", (GOTO, PENDOWN, BEGIN_FILL, GOTO))
+
+
+def record(draw_fn, *args):
+    """Run draw_fn(recorder, *args) once and return the DisplayList."""
+    recorder = Recorder()
+    draw_fn(recorder, *args)
+    return recorder.display_list
+
+
+class KeyframeCache:
+    """Least-recently-used display lists, capped at max_bytes in total.
+
+    get() returns the list stored under `key`, recording draw_fn(*args) on
+    a miss. The most recent entry is always kept, even if it alone is over
+    the cap.
+    """
+
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict()
+        self.nbytes = 0
+        self.hits = self.misses = self.evictions = 0
+
+    def get(self, key, draw_fn, *args):
+        dl = self.entries.get(key)
+        if dl is not None:
+            self.hits += 1
+            self.entries.move_to_end(key)
+            return dl
+        self.misses += 1
+        dl = self.entries[key] = record(draw_fn, *args)
+        self.nbytes += dl.nbytes()
+        while self.nbytes > self.max_bytes and len(self.entries) > 1:
+            _, old = self.entries.popitem(last=False)
+            self.nbytes -= old.nbytes()
+            self.evictions += 1
+        return dl
+
+    def clear(self):
+        """Drop every entry and reset the statistics."""
+        self.entries.clear()
+        self.nbytes = 0
+        self.hits = self.misses = self.evictions = 0
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "entries": len(self.entries),
+            "bytes": self.nbytes,
+            "max_bytes": self.max_bytes,
+        }
@@ -0,0 +1,99 @@
+"""Render a range of frames offline across a process pool.
+
+    python export.py --start 0 --end 250 --out frames/
+    python export.py --end 120 --gif village.gif --workers 4
+
+Every worker rasterizes the static layers once and then renders whichever
+frame indices it is handed straight from state_at(), so frames need no
+shared state and the work splits evenly over the pool. GIF output needs
+Pillow; the PNG sequence does not.
+
+The simulated layers are the exception. The flock (VILLAGE_BIRDS), the
+particles (VILLAGE_PARTICLES) and the traffic (VILLAGE_CARS, VILLAGE_BOATS)
+can only be stepped, so each worker steps its own copy from frame 0 up to
+the last frame it renders. Their cost does not split over the pool: with
+any of them on, every worker pays about the simulation a single process
+would, and only the drawing scales with the number of workers.
+"""
+
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+
+os.environ["VILLAGE_BACKEND"] = "raster"
+
+import firstfile  # noqa: E402
+import state  # noqa: E402
+
+
+def _init_worker(seed):
+    state.SEED = seed
+    firstfile.init_backend()
+    firstfile.draw_static()
+    firstfile.draw_foreground(state.wind_offset)
+
+
+def _render(job):
+    index, path = job
+    state.apply_state(state.state_at(index))
+    firstfile.draw_frame()
+    firstfile.frame.save_png(path, level=1)
+    return path
+
+
+def export_frames(start, end, out_dir, seed=0, workers=None):
+    """Write frames [start, end) as out_dir/frame_NNNNN.png; return the paths."""
+    os.makedirs(out_dir, exist_ok=True)
+    jobs = [(i, os.path.join(out_dir, "frame_%05d.png" % i))
+            for i in range(start, end)]
+    workers = workers or os.cpu_count() or 1
+    chunk = max(1, len(jobs) // (workers * 4))
+    with ProcessPoolExecutor(workers, initializer=_init_worker,
+                             initargs=(seed,)) as pool:
+        return list(pool.map(_render, jobs, chunksize=chunk))
+
+
+def write_gif(paths, gif_path, frame_ms=20):
+    try:
+        from PIL import Image
+    except ImportError:
+        sys.exit("GIF export needs Pillow (pip install pillow); "
+                 "leave out --gif to get a PNG sequence instead")
+    frames = [Image.open(p).convert("P", palette=Image.ADAPTIVE) for p in paths]
+    frames[0].save(gif_path, save_all=True, append_images=frames[1:],
+                   duration=frame_ms, loop=0)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--start", type=int, default=0)
+    parser.add_argument("--end", type=int, default=250,
+                        help="first frame index not rendered")
+    parser.add_argument("--seed", type=int, default=state.SEED)
+    parser.add_argument("--workers", type=int, default=None,
+                        help="processes to use (default: all cores)")
+    parser.add_argument("--out", default="frames",
+                        help="directory for the PNG sequence")
+    parser.add_argument("--gif", help="write an animated GIF instead")
+    args = parser.parse_args(argv)
+
+    if args.gif:
+        tmp = tempfile.mkdtemp(prefix="village-frames-")
+        try:
+            paths = export_frames(args.start, args.end, tmp, args.seed,
+                                  args.workers)
+            write_gif(paths, args.gif)
+        finally:
+            shutil.rmtree(tmp)
+        print("wrote %s (%d frames)" % (args.gif, len(paths)))
+    else:
+        paths = export_frames(args.start, args.end, args.out, args.seed,
+                              args.workers)
+        print("wrote %d frames to %s" % (len(paths), args.out))
+
+
+if __name__ == "__main__":
+    main()
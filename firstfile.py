@@ -1,780 +1,1354 @@
-
-import turtle
-import math
-import random
-
-
-# WINDOW & SCALING
-
-BASE_W, BASE_H = 900, 500
-TARGET_W = 1920
-TARGET_H = int(TARGET_W * BASE_H / BASE_W)  
-
-SCALE = TARGET_W / BASE_W
-SPEED_FACTOR = 1.0 / SCALE  # reduce base-step  pixel-speed stays similar
-
-screen = turtle.Screen()
-screen.setup(TARGET_W, TARGET_H)
-screen.bgcolor(0, 0.9, 0.9)
-screen.title("2D Village Scenery")
-screen.tracer(0)
-
-
-# SCALE HELPER
-
-def sx(x):
-    return x * SCALE
-
-
-def sy(y):
-    return y * SCALE
-
-
-def spt(p):
-    return (sx(p[0]), sy(p[1]))
-
-
-def set_pensize_scaled(t, size):
-    # keep a minimum of 1 so lines remain visible
-    t.pensize(max(1, int(round(size * SCALE))))
-
-
-
-# animation variables 
-
-bx = 50          # boat/cloud offset
-car_x = -450     # car position
-windmill_angle = 0
-bird_positions = [[-400, 180], [-350, 200], [-300, 190]]
-wind_offset = 0
-frame_count = 0
-
-
-
-# Helper func
-
-def draw_polygon(t, points):
-    """Draw a filled polygon from list of BASE points; render scaled."""
-    pts = [spt(p) for p in points]
-    t.penup()
-    t.goto(pts[0])
-    t.pendown()
-    t.begin_fill()
-    for p in pts[1:]:
-        t.goto(p)
-    t.goto(pts[0])
-    t.end_fill()
-
-
-def draw_circle_with_turtle(t, rx, ry, cx, cy):
-    """Draw an ellipse/circle (BASE units); render scaled."""
-    rx_s = rx * SCALE
-    ry_s = ry * SCALE
-    cx_s = sx(cx)
-    cy_s = sy(cy)
-
-    t.penup()
-    t.goto(cx_s, cy_s - ry_s)
-    t.pendown()
-    t.begin_fill()
-    for i in range(361):
-        angle = math.radians(i)
-        x = rx_s * math.cos(angle) + cx_s
-        y = ry_s * math.sin(angle) + cy_s
-        t.goto(x, y)
-    t.end_fill()
-
-
-def midpoint_circle_algorithm(t, radius, cx, cy):
-    """Draw a filled circle using Midpoint Circle Algorithm (scaled)."""
-    # Scale radius to pixel-ish units
-    r = max(1, int(round(radius * SCALE)))
-    cx_s = sx(cx)
-    cy_s = sy(cy)
-
-    x = 0
-    y = r
-    d = 1 - r
-
-    octant_points = []
-    while x <= y:
-        octant_points.append((x, y))
-        if d < 0:
-            d = d + 2 * x + 3
-        else:
-            d = d + 2 * (x - y) + 5
-            y -= 1
-        x += 1
-
-    circle_points = set()
-    for px, py in octant_points:
-        circle_points.add((cx_s + px, cy_s + py))
-        circle_points.add((cx_s - px, cy_s + py))
-        circle_points.add((cx_s + px, cy_s - py))
-        circle_points.add((cx_s - px, cy_s - py))
-        circle_points.add((cx_s + py, cy_s + px))
-        circle_points.add((cx_s - py, cy_s + px))
-        circle_points.add((cx_s + py, cy_s - px))
-        circle_points.add((cx_s - py, cy_s - px))
-
-    sorted_points = sorted(
-        circle_points,
-        key=lambda p: math.atan2(p[1] - cy_s, p[0] - cx_s)
-    )
-
-    if sorted_points:
-        t.penup()
-        t.goto(sorted_points[0])
-        t.pendown()
-        t.begin_fill()
-        for p in sorted_points:
-            t.goto(p)
-        t.goto(sorted_points[0])
-        t.end_fill()
-
-
-def dda_line(t, x1, y1, x2, y2):
-    """Draw a line using DDA algorithm (BASE units); render scaled."""
-    # scale endpoints
-    x1, y1 = sx(x1), sy(y1)
-    x2, y2 = sx(x2), sy(y2)
-
-    dx = x2 - x1
-    dy = y2 - y1
-    steps = int(max(abs(dx), abs(dy)))
-    if steps == 0:
-        return
-
-    x_inc = dx / steps
-    y_inc = dy / steps
-
-    x = x1
-    y = y1
-    t.penup()
-    t.goto(x, y)
-    t.pendown()
-
-    for _ in range(steps + 1):
-        t.goto(x, y)
-        x += x_inc
-        y += y_inc
-
-
-def draw_sun_rays(t, cx, cy, inner_radius, outer_radius, num_rays):
-    """Draw sun rays using DDA line drawing algorithm."""
-    t.color(255/255, 215/255, 0)
-    set_pensize_scaled(t, 2)
-
-    for i in range(num_rays):
-        angle = (360 / num_rays) * i
-        rad = math.radians(angle)
-
-        x1 = cx + inner_radius * math.cos(rad)
-        y1 = cy + inner_radius * math.sin(rad)
-        x2 = cx + outer_radius * math.cos(rad)
-        y2 = cy + outer_radius * math.sin(rad)
-
-        dda_line(t, x1, y1, x2, y2)
-
-    set_pensize_scaled(t, 1)
-
-
-
-# turtle layers
-
-background_turtle = turtle.Turtle(); background_turtle.hideturtle(); background_turtle.speed(0)
-bridge_turtle = turtle.Turtle(); bridge_turtle.hideturtle(); bridge_turtle.speed(0)
-boat_turtle = turtle.Turtle(); boat_turtle.hideturtle(); boat_turtle.speed(0)
-cloud_turtle = turtle.Turtle(); cloud_turtle.hideturtle(); cloud_turtle.speed(0)
-car_turtle = turtle.Turtle(); car_turtle.hideturtle(); car_turtle.speed(0)
-windmill_turtle = turtle.Turtle(); windmill_turtle.hideturtle(); windmill_turtle.speed(0)
-bird_turtle = turtle.Turtle(); bird_turtle.hideturtle(); bird_turtle.speed(0)
-foreground_turtle = turtle.Turtle(); foreground_turtle.hideturtle(); foreground_turtle.speed(0)
-
-
-
-# objects
-
-def draw_boat_with_turtle(t, offset):
-    t.color(0, 0, 0)
-    t.penup()
-    t.goto(sx(75 + offset), sy(-30))
-    t.pendown()
-    t.begin_fill()
-    for point in [(150 + offset, -30), (175 + offset, 0), (50 + offset, 0), (75 + offset, -30)]:
-        t.goto(sx(point[0]), sy(point[1]))
-    t.end_fill()
-
-    t.color(205/255, 133/255, 63/255)
-    t.penup()
-    t.goto(sx(75 + offset), sy(0))
-    t.pendown()
-    t.begin_fill()
-    for point in [(150 + offset, 0), (140 + offset, 30), (85 + offset, 30), (75 + offset, 0)]:
-        t.goto(sx(point[0]), sy(point[1]))
-    t.end_fill()
-
-    # Mast
-    t.color(160/255, 82/255, 45/255)
-    t.penup()
-    t.goto(sx(110 + offset), sy(30))
-    t.pendown()
-    t.begin_fill()
-    for point in [(120 + offset, 30), (120 + offset, 60), (110 + offset, 60), (110 + offset, 30)]:
-        t.goto(sx(point[0]), sy(point[1]))
-    t.end_fill()
-
-    # Curved Sail
-    t.color(128/255, 0, 128/255)
-    t.penup()
-    t.goto(sx(120 + offset), sy(125))
-    t.pendown()
-    t.begin_fill()
-
-    for i in range(11):
-        t_param = i / 10
-        # FIXED TYPO HERE: t_paramuhin -> t_param
-        curve_x = 120 + offset + 25 * (1 - (1 - t_param) ** 2)
-        curve_y = 125 - 85 * t_param
-        t.goto(sx(curve_x), sy(curve_y))
-
-    t.goto(sx(120 + offset), sy(40))
-    t.goto(sx(120 + offset), sy(125))
-    t.end_fill()
-
-
-def draw_clouds_with_turtle(t, offset):
-    t.color(1, 1, 1)
-
-    def draw_c(rx, ry, cx, cy):
-        draw_circle_with_turtle(t, rx, ry, cx, cy)
-
-    draw_c(20, 30, 280 + offset, 220)
-    draw_c(15, 20, 265 + offset, 220)
-    draw_c(15, 20, 295 + offset, 220)
-
-    draw_c(20, 30, 200 + offset, 180)
-    draw_c(15, 20, 215 + offset, 180)
-    draw_c(15, 20, 185 + offset, 180)
-
-    draw_c(18, 25, -100 + offset, 210)
-    draw_c(14, 18, -113 + offset, 210)
-    draw_c(14, 18, -87 + offset, 210)
-
-    draw_c(18, 25, -30 + offset, 190)
-    draw_c(14, 18, -43 + offset, 190)
-    draw_c(14, 18, -17 + offset, 190)
-
-
-def draw_flowers():
-    t = background_turtle
-    flower_positions = [(-400, -200), (-350, -180), (-300, -210),
-                        (-420, -160), (350, -190), (380, -170), (320, -200)]
-
-    for fx, fy in flower_positions:
-        t.color(1, 0.2, 0.2)
-        for i in range(5):
-            angle = i * 72
-            petal_x = fx + 8 * math.cos(math.radians(angle))
-            petal_y = fy + 8 * math.sin(math.radians(angle))
-            draw_circle_with_turtle(t, 4, 5, petal_x, petal_y)
-
-        t.color(1, 1, 0)
-        draw_circle_with_turtle(t, 3, 3, fx, fy)
-
-
-def draw_car(t, offset):
-    t.color(1, 0, 0)
-    draw_polygon(t, [(offset, 100), (offset + 60, 100),
-                     (offset + 60, 120), (offset, 120)])
-
-    t.color(0.8, 0, 0)
-    draw_polygon(t, [(offset + 10, 120), (offset + 50, 120),
-                     (offset + 45, 135), (offset + 15, 135)])
-
-    t.color(0.6, 0.8, 1)
-    draw_polygon(t, [(offset + 15, 122), (offset + 28, 122),
-                     (offset + 26, 132), (offset + 17, 132)])
-    draw_polygon(t, [(offset + 32, 122), (offset + 45, 122),
-                     (offset + 43, 132), (offset + 34, 132)])
-
-    t.color(0.1, 0.1, 0.1)
-    draw_circle_with_turtle(t, 6, 6, offset + 15, 100)
-    draw_circle_with_turtle(t, 6, 6, offset + 45, 100)
-
-
-def draw_windmill(t, angle, wind_sway):
-    base_x = 250
-    base_y = -50 + wind_sway
-
-    t.color(0.5, 0.3, 0.1)
-    draw_polygon(t, [(base_x - 10, -100), (base_x + 10, -100),
-                     (base_x + 8, base_y + 50), (base_x - 8, base_y + 50)])
-
-    t.color(0.8, 0.8, 0.8)
-    draw_circle_with_turtle(t, 15, 15, base_x, base_y + 50)
-
-    t.color(1, 1, 1)
-    for i in range(4):
-        blade_angle = angle + i * 90
-        rad = math.radians(blade_angle)
-
-        x1 = base_x + 5 * math.cos(rad)
-        y1 = base_y + 50 + 5 * math.sin(rad)
-        x2 = base_x + 35 * math.cos(rad)
-        y2 = base_y + 50 + 35 * math.sin(rad)
-
-        t.penup(); t.goto(sx(x1), sy(y1)); t.pendown();
-        t.begin_fill()
-
-        perpendicular = blade_angle + 90
-        perp_rad = math.radians(perpendicular)
-
-        pts = [
-            (x1 + 3 * math.cos(perp_rad), y1 + 3 * math.sin(perp_rad)),
-            (x2 + 1 * math.cos(perp_rad), y2 + 1 * math.sin(perp_rad)),
-            (x2 - 1 * math.cos(perp_rad), y2 - 1 * math.sin(perp_rad)),
-            (x1 - 3 * math.cos(perp_rad), y1 - 3 * math.sin(perp_rad))
-        ]
-
-        t.goto(sx(pts[0][0]), sy(pts[0][1]))
-        for px, py in pts[1:]:
-            t.goto(sx(px), sy(py))
-        t.goto(sx(pts[0][0]), sy(pts[0][1]))
-        t.end_fill()
-
-
-def draw_bird(t, x, y, wing_up):
-    t.color(0.2, 0.2, 0.2)
-    set_pensize_scaled(t, 2)
-
-    draw_circle_with_turtle(t, 3, 3, x, y)
-
-    t.penup()
-    if wing_up:
-        t.goto(sx(x - 8), sy(y - 3))
-        t.pendown()
-        t.goto(sx(x), sy(y))
-        t.goto(sx(x + 8), sy(y - 3))
-    else:
-        t.goto(sx(x - 8), sy(y + 3))
-        t.pendown()
-        t.goto(sx(x), sy(y))
-        t.goto(sx(x + 8), sy(y + 3))
-
-    set_pensize_scaled(t, 1)
-
-
-def draw_birds_flying(t, positions, frame):
-    wing_up = (frame // 5) % 2 == 0
-    for pos in positions:
-        draw_bird(t, pos[0], pos[1], wing_up)
-
-
-
-# 3d animal
-
-def draw_3d_cow(t):
-    base_x = 350
-    base_y = -150
-
-    white_top = (1, 1, 1)
-    white_front = (0.9, 0.9, 0.9)
-    white_side = (0.75, 0.75, 0.75)
-
-    black_top = (0.2, 0.2, 0.2)
-    black_front = (0.1, 0.1, 0.1)
-    black_side = (0.05, 0.05, 0.05)
-
-    pink_top = (1, 0.8, 0.8)
-    pink_front = (0.95, 0.7, 0.7)
-    pink_side = (0.85, 0.6, 0.6)
-
-    brown_top = (0.6, 0.4, 0.2)
-    brown_front = (0.5, 0.3, 0.15)
-    brown_side = (0.4, 0.25, 0.1)
-
-    # Back-left leg
-    t.color(white_side)
-    draw_polygon(t, [(base_x - 22, base_y), (base_x - 22, base_y + 30),
-                     (base_x - 18, base_y + 32), (base_x - 18, base_y + 2)])
-    t.color(white_front)
-    draw_polygon(t, [(base_x - 18, base_y + 2), (base_x - 18, base_y + 32),
-                     (base_x - 10, base_y + 32), (base_x - 10, base_y + 2)])
-    t.color(white_top)
-    draw_polygon(t, [(base_x - 22, base_y + 30), (base_x - 18, base_y + 32),
-                     (base_x - 10, base_y + 32), (base_x - 14, base_y + 30)])
-
-    # Back-right leg
-    t.color(white_side)
-    draw_polygon(t, [(base_x + 10, base_y), (base_x + 10, base_y + 30),
-                     (base_x + 14, base_y + 32), (base_x + 14, base_y + 2)])
-    t.color(white_front)
-    draw_polygon(t, [(base_x + 14, base_y + 2), (base_x + 14, base_y + 32),
-                     (base_x + 22, base_y + 32), (base_x + 22, base_y + 2)])
-    t.color(white_top)
-    draw_polygon(t, [(base_x + 10, base_y + 30), (base_x + 14, base_y + 32),
-                     (base_x + 22, base_y + 32), (base_x + 18, base_y + 30)])
-
-    # Main body
-    t.color(white_side)
-    draw_polygon(t, [(base_x - 30, base_y + 30), (base_x - 30, base_y + 55),
-                     (base_x - 20, base_y + 60), (base_x - 20, base_y + 35)])
-    t.color(white_front)
-    draw_polygon(t, [(base_x - 20, base_y + 35), (base_x - 20, base_y + 60),
-                     (base_x + 30, base_y + 60), (base_x + 30, base_y + 35)])
-    t.color(white_top)
-    draw_polygon(t, [(base_x - 30, base_y + 55), (base_x - 20, base_y + 60),
-                     (base_x + 30, base_y + 60), (base_x + 20, base_y + 55)])
-
-    # Spots
-    t.color(black_front)
-    draw_polygon(t, [(base_x - 10, base_y + 45), (base_x - 10, base_y + 55),
-                     (base_x + 2, base_y + 55), (base_x + 2, base_y + 45)])
-    t.color(black_front)
-    draw_polygon(t, [(base_x + 10, base_y + 38), (base_x + 10, base_y + 50),
-                     (base_x + 22, base_y + 50), (base_x + 22, base_y + 38)])
-    t.color(black_top)
-    draw_polygon(t, [(base_x - 15, base_y + 56), (base_x - 8, base_y + 58),
-                     (base_x + 0, base_y + 58), (base_x - 7, base_y + 56)])
-    t.color(black_side)
-    draw_polygon(t, [(base_x - 28, base_y + 40), (base_x - 28, base_y + 48),
-                     (base_x - 22, base_y + 50), (base_x - 22, base_y + 42)])
-
-    # Neck
-    t.color(white_side)
-    draw_polygon(t, [(base_x - 30, base_y + 55), (base_x - 30, base_y + 65),
-                     (base_x - 26, base_y + 67), (base_x - 26, base_y + 57)])
-    t.color(white_front)
-    draw_polygon(t, [(base_x - 26, base_y + 57), (base_x - 26, base_y + 67),
-                     (base_x - 18, base_y + 67), (base_x - 18, base_y + 57)])
-    t.color(white_top)
-    draw_polygon(t, [(base_x - 30, base_y + 65), (base_x - 26, base_y + 67),
-                     (base_x - 18, base_y + 67), (base_x - 22, base_y + 65)])
-
-    # Head
-    t.color(white_side)
-    draw_polygon(t, [(base_x - 45, base_y + 65), (base_x - 45, base_y + 80),
-                     (base_x - 38, base_y + 83), (base_x - 38, base_y + 68)])
-    t.color(white_front)
-    draw_polygon(t, [(base_x - 38, base_y + 68), (base_x - 38, base_y + 83),
-                     (base_x - 18, base_y + 83), (base_x - 18, base_y + 68)])
-    t.color(white_top)
-    draw_polygon(t, [(base_x - 45, base_y + 80), (base_x - 38, base_y + 83),
-                     (base_x - 18, base_y + 83), (base_x - 25, base_y + 80)])
-
-    t.color(black_front)
-    draw_polygon(t, [(base_x - 35, base_y + 72), (base_x - 35, base_y + 80),
-                     (base_x - 25, base_y + 80), (base_x - 25, base_y + 72)])
-
-    # Snout
-    t.color(pink_side)
-    draw_polygon(t, [(base_x - 50, base_y + 68), (base_x - 50, base_y + 75),
-                     (base_x - 46, base_y + 76), (base_x - 46, base_y + 69)])
-    t.color(pink_front)
-    draw_polygon(t, [(base_x - 46, base_y + 69), (base_x - 46, base_y + 76),
-                     (base_x - 38, base_y + 76), (base_x - 38, base_y + 69)])
-    t.color(pink_top)
-    draw_polygon(t, [(base_x - 50, base_y + 75), (base_x - 46, base_y + 76),
-                     (base_x - 38, base_y + 76), (base_x - 42, base_y + 75)])
-
-    # Nostrils
-    t.color(0.1, 0.05, 0.05)
-    draw_polygon(t, [(base_x - 44, base_y + 72), (base_x - 44, base_y + 74),
-                     (base_x - 42, base_y + 74), (base_x - 42, base_y + 72)])
-    draw_polygon(t, [(base_x - 44, base_y + 70), (base_x - 44, base_y + 71.5),
-                     (base_x - 42, base_y + 71.5), (base_x - 42, base_y + 70)])
-
-    # Eyes
-    t.color(0.05, 0.05, 0.05)
-    draw_polygon(t, [(base_x - 36, base_y + 78), (base_x - 36, base_y + 81),
-                     (base_x - 33, base_y + 81), (base_x - 33, base_y + 78)])
-    draw_polygon(t, [(base_x - 24, base_y + 78), (base_x - 24, base_y + 81),
-                     (base_x - 21, base_y + 81), (base_x - 21, base_y + 78)])
-
-    # Ears
-    t.color(pink_side)
-    draw_polygon(t, [(base_x - 42, base_y + 83), (base_x - 44, base_y + 90),
-                     (base_x - 40, base_y + 91)])
-    t.color(pink_front)
-    draw_polygon(t, [(base_x - 40, base_y + 83), (base_x - 40, base_y + 91),
-                     (base_x - 36, base_y + 91), (base_x - 36, base_y + 83)])
-
-    t.color(pink_front)
-    draw_polygon(t, [(base_x - 22, base_y + 83), (base_x - 22, base_y + 91),
-                     (base_x - 18, base_y + 91), (base_x - 18, base_y + 83)])
-    t.color(pink_top)
-    draw_polygon(t, [(base_x - 22, base_y + 91), (base_x - 20, base_y + 92),
-                     (base_x - 18, base_y + 91)])
-
-    # Horns
-    t.color(brown_side)
-    draw_polygon(t, [(base_x - 40, base_y + 85), (base_x - 39, base_y + 93),
-                     (base_x - 37, base_y + 92)])
-    t.color(brown_front)
-    draw_polygon(t, [(base_x - 37, base_y + 85), (base_x - 37, base_y + 92),
-                     (base_x - 35, base_y + 85)])
-
-    t.color(brown_side)
-    draw_polygon(t, [(base_x - 24, base_y + 85), (base_x - 23, base_y + 93),
-                     (base_x - 21, base_y + 92)])
-    t.color(brown_front)
-    draw_polygon(t, [(base_x - 21, base_y + 85), (base_x - 21, base_y + 92),
-                     (base_x - 19, base_y + 85)])
-
-    # Front legs
-    t.color(white_side)
-    draw_polygon(t, [(base_x - 18, base_y), (base_x - 18, base_y + 35),
-                     (base_x - 14, base_y + 37), (base_x - 14, base_y + 2)])
-    t.color(white_front)
-    draw_polygon(t, [(base_x - 14, base_y + 2), (base_x - 14, base_y + 37),
-                     (base_x - 6, base_y + 37), (base_x - 6, base_y + 2)])
-    t.color(white_top)
-    draw_polygon(t, [(base_x - 18, base_y + 35), (base_x - 14, base_y + 37),
-                     (base_x - 6, base_y + 37), (base_x - 10, base_y + 35)])
-
-    t.color(white_side)
-    draw_polygon(t, [(base_x + 14, base_y), (base_x + 14, base_y + 35),
-                     (base_x + 18, base_y + 37), (base_x + 18, base_y + 2)])
-    t.color(white_front)
-    draw_polygon(t, [(base_x + 18, base_y + 2), (base_x + 18, base_y + 37),
-                     (base_x + 26, base_y + 37), (base_x + 26, base_y + 2)])
-    t.color(white_top)
-    draw_polygon(t, [(base_x + 14, base_y + 35), (base_x + 18, base_y + 37),
-                     (base_x + 26, base_y + 37), (base_x + 22, base_y + 35)])
-
-    # Hooves
-    t.color(0.05, 0.05, 0.05)
-    draw_polygon(t, [(base_x - 22, base_y), (base_x - 22, base_y + 4),
-                     (base_x - 18, base_y + 5), (base_x - 18, base_y + 1)])
-    draw_polygon(t, [(base_x - 18, base_y + 1), (base_x - 18, base_y + 5),
-                     (base_x - 10, base_y + 5), (base_x - 10, base_y + 1)])
-
-    draw_polygon(t, [(base_x + 10, base_y), (base_x + 10, base_y + 4),
-                     (base_x + 14, base_y + 5), (base_x + 14, base_y + 1)])
-    draw_polygon(t, [(base_x + 14, base_y + 1), (base_x + 14, base_y + 5),
-                     (base_x + 22, base_y + 5), (base_x + 22, base_y + 1)])
-
-    draw_polygon(t, [(base_x - 18, base_y), (base_x - 18, base_y + 4),
-                     (base_x - 14, base_y + 5), (base_x - 14, base_y + 1)])
-    draw_polygon(t, [(base_x - 14, base_y + 1), (base_x - 14, base_y + 5),
-                     (base_x - 6, base_y + 5), (base_x - 6, base_y + 1)])
-
-    draw_polygon(t, [(base_x + 14, base_y), (base_x + 14, base_y + 4),
-                     (base_x + 18, base_y + 5), (base_x + 18, base_y + 1)])
-    draw_polygon(t, [(base_x + 18, base_y + 1), (base_x + 18, base_y + 5),
-                     (base_x + 26, base_y + 5), (base_x + 26, base_y + 1)])
-
-    # Tail
-    t.color(white_side)
-    draw_polygon(t, [(base_x + 28, base_y + 50), (base_x + 28, base_y + 58),
-                     (base_x + 30, base_y + 58), (base_x + 30, base_y + 50)])
-    t.color(white_front)
-    draw_polygon(t, [(base_x + 30, base_y + 50), (base_x + 30, base_y + 58),
-                     (base_x + 34, base_y + 58), (base_x + 34, base_y + 50)])
-
-    t.color(white_side)
-    draw_polygon(t, [(base_x + 32, base_y + 48), (base_x + 32, base_y + 50),
-                     (base_x + 36, base_y + 48), (base_x + 36, base_y + 46)])
-    t.color(white_front)
-    draw_polygon(t, [(base_x + 36, base_y + 46), (base_x + 36, base_y + 48),
-                     (base_x + 40, base_y + 46), (base_x + 40, base_y + 44)])
-
-    t.color(black_side)
-    draw_polygon(t, [(base_x + 38, base_y + 40), (base_x + 38, base_y + 46),
-                     (base_x + 40, base_y + 46), (base_x + 40, base_y + 40)])
-    t.color(black_front)
-    draw_polygon(t, [(base_x + 40, base_y + 40), (base_x + 40, base_y + 46),
-                     (base_x + 45, base_y + 46), (base_x + 45, base_y + 40)])
-    t.color(black_top)
-    draw_polygon(t, [(base_x + 38, base_y + 46), (base_x + 40, base_y + 46),
-                     (base_x + 45, base_y + 46), (base_x + 43, base_y + 46)])
-
-    # Udder
-    t.color(pink_side)
-    draw_polygon(t, [(base_x + 0, base_y + 30), (base_x + 0, base_y + 38),
-                     (base_x + 4, base_y + 39), (base_x + 4, base_y + 31)])
-    t.color(pink_front)
-    draw_polygon(t, [(base_x + 4, base_y + 31), (base_x + 4, base_y + 39),
-                     (base_x + 14, base_y + 39), (base_x + 14, base_y + 31)])
-    t.color(pink_top)
-    draw_polygon(t, [(base_x + 0, base_y + 38), (base_x + 4, base_y + 39),
-                     (base_x + 14, base_y + 39), (base_x + 10, base_y + 38)])
-
-    t.color(pink_front)
-    for teat_x in [5, 9, 13]:
-        draw_polygon(t, [(base_x + teat_x, base_y + 29), (base_x + teat_x, base_y + 31),
-                         (base_x + teat_x + 2, base_y + 31), (base_x + teat_x + 2, base_y + 29)])
-
-
-
-# background -> bridge -> foreground
-
-def draw_background():
-    t = background_turtle
-    t.clear()
-
-    # Ground
-    t.color(0, 1, 0)
-    draw_polygon(t, [(-450, -250), (450, -250), (450, 50), (-450, 50)])
-
-    # River
-    t.color(100/255, 149/255, 237/255)
-    draw_polygon(t, [(50, 50), (0, -100), (150, -100), (200, 50)])
-    draw_polygon(t, [(50, -100), (0, -250), (150, -250), (200, -100)])
-    draw_polygon(t, [(-490, -50), (-450, 50), (450, 50), (450, -50)])
-
-    # Hills
-    t.color(184/255, 134/255, 11/255)
-    draw_polygon(t, [(-490, 50), (-50, 50), (-150, 200)])
-    t.color(218/255, 165/255, 32/255)
-    draw_polygon(t, [(-100, 50), (100, 50), (0, 200)])
-    t.color(184/255, 134/255, 11/255)
-    draw_polygon(t, [(50, 50), (470, 50), (150, 200)])
-
-    # Sun
-    t.color(255/255, 215/255, 0)
-    midpoint_circle_algorithm(t, 27, -75, 200)
-    draw_sun_rays(t, -75, 200, 32, 50, 12)
-
-    # Flowers
-    draw_flowers()
-
-    # Road
-    t.color(0.3, 0.3, 0.3)
-    draw_polygon(t, [(-450, 80), (450, 80), (450, 110), (-450, 110)])
-
-    # Road markings
-    t.color(1, 1, 1)
-    for i in range(-450, 450, 40):
-        draw_polygon(t, [(i, 93), (i + 20, 93), (i + 20, 97), (i, 97)])
-
-
-def draw_bridge():
-    t = bridge_turtle
-    t.clear()
-
-    t.color(0.6, 0.4, 0.2)
-    draw_polygon(t, [(30, 80), (180, 80), (180, 110), (30, 110)])
-
-    t.color(0.4, 0.2, 0.1)
-    draw_polygon(t, [(30, 110), (180, 110), (180, 115), (30, 115)])
-    draw_polygon(t, [(30, 80), (180, 80), (180, 75), (30, 75)])
-
-    for x in [50, 90, 130, 170]:
-        draw_polygon(t, [(x - 3, 75), (x + 3, 75), (x + 3, 50), (x - 3, 50)])
-
-
-def draw_foreground(wind_sway):
-    t = foreground_turtle
-
-    # 2nd House (right)
-    t.color(210/255, 105/255, 30/255)
-    draw_polygon(t, [(-150, -30), (-50, -30), (-75, 20), (-120, 20)])
-    t.color(244/255, 164/255, 96/255)
-    draw_polygon(t, [(-150, -80), (-65, -80), (-65, -30), (-150, -30)])
-    t.color(160/255, 82/255, 45/255)
-    draw_polygon(t, [(-150, -80), (-60, -80), (-60, -90), (-150, -90)])
-    t.color(160/255, 82/255, 45/255)
-    draw_polygon(t, [(-110, -80), (-85, -80), (-85, -50), (-110, -50)])
-
-    # 1st House (left)
-    t.color(160/255, 82/255, 45/255)
-    draw_polygon(t, [(-250, -30), (-115, -30), (-140, 20), (-225, 20)])
-    t.color(255/255, 222/255, 173/255)
-    draw_polygon(t, [(-240, -30), (-200, -30), (-225, 5)])
-    t.color(255/255, 222/255, 173/255)
-    draw_polygon(t, [(-240, -100), (-200, -100), (-200, -30), (-240, -30)])
-    t.color(222/255, 184/255, 135/255)
-    draw_polygon(t, [(-200, -100), (-125, -100), (-125, -30), (-200, -30)])
-    t.color(160/255, 82/255, 45/255)
-    draw_polygon(t, [(-240, -100), (-125, -100), (-125, -110), (-240, -110)])
-    t.color(160/255, 82/255, 45/255)
-    draw_polygon(t, [(-175, -100), (-155, -100), (-155, -55), (-175, -55)])
-    t.color(160/255, 82/255, 45/255)
-    draw_polygon(t, [(-230, -50), (-215, -50), (-215, -75), (-230, -75)])
-
-    # Tree trunk
-    t.color(139/255, 69/255, 19/255)
-    draw_polygon(t, [(-200, -100), (-180, -100), (-180, 50), (-200, 50)])
-
-    # Tree leaves
-    t.color(0, 128/255, 0)
-    draw_circle_with_turtle(t, 30, 40, -215 + wind_sway, 70)
-    draw_circle_with_turtle(t, 30, 40, -165 + wind_sway, 70)
-    draw_circle_with_turtle(t, 25, 30, -205 + wind_sway, 120)
-    draw_circle_with_turtle(t, 30, 30, -180 + wind_sway, 120)
-    draw_circle_with_turtle(t, 25, 30, -195 + wind_sway, 150)
-
-    # 3D Cow
-    draw_3d_cow(t)
-
-
-
-# animation part
-
-def animate():
-    global bx, car_x, windmill_angle, bird_positions, wind_offset, frame_count
-
-    boat_turtle.clear()
-    cloud_turtle.clear()
-    car_turtle.clear()
-    windmill_turtle.clear()
-    bird_turtle.clear()
-    foreground_turtle.clear()
-
-    wind_offset = 3 * math.sin(frame_count * 0.05)
-
-    # Car
-    draw_car(car_turtle, car_x)
-
-    # Boat
-    draw_boat_with_turtle(boat_turtle, bx)
-
-    # Clouds
-    draw_clouds_with_turtle(cloud_turtle, bx)
-
-    # Windmill
-    draw_windmill(windmill_turtle, windmill_angle, wind_offset * 0.5)
-
-    # Birds
-    draw_birds_flying(bird_turtle, bird_positions, frame_count)
-
-    # Foreground
-    draw_foreground(wind_offset)
-
-    # Update positions (scaled step)
-    bx += 1.9 * SPEED_FACTOR
-    if bx > 500:
-        bx = -550
-
-    car_x += 2 * SPEED_FACTOR
-    if car_x > 500:
-        car_x = -450
-
-    windmill_angle += 3
-    if windmill_angle >= 360:
-        windmill_angle = 0
-
-    # Move birds
-    for bird in bird_positions:
-        bird[0] += 0.5 * SPEED_FACTOR
-        bird[1] += (0.2 * SPEED_FACTOR) * math.sin(frame_count * 0.1 + bird[0] * 0.01)
-        if bird[0] > 500:
-            bird[0] = -450
-            bird[1] = random.randint(160, 220)
-
-    frame_count += 1
-
-    screen.update()
-    screen.ontimer(animate, 20)
-
-
-
-# mainloop and run
-
-draw_background()
-draw_bridge()
-animate()
-screen.mainloop()
-
+"""The animated village: backends, layers and the frame loop.
+
+Importing this module only defines things; main() (or init_backend())
+opens the window. The scene itself lives in geometry.py (scaling and
+primitives), scene.py (the draw_* functions) and state.py (where things
+are on a given frame), none of which need Tk.
+"""
+
+import hashlib
+import math
+import os
+import sys
+import time
+from collections import namedtuple
+
+import geometry
+import palette
+import profiler
+import quality
+import scenefile
+import scheduler
+import spatial
+import state
+import world
+from geometry import sx, sy, tk_color
+from pipeline import Pipeline
+from scene import (CHIMNEYS, CLOUD_GROUPS, PROP_ANCHORS, SKY_COLOR,
+                   display_list, draw_3d_cow, draw_birds_flying,
+                   draw_boat_with_turtle, draw_bridge, draw_car,
+                   draw_cloud_group, draw_flowers, draw_ground, draw_houses,
+                   draw_road, draw_tree_leaves, drawable_bounds,
+                   keyframe_summary, replay_prop, replay_windmill,
+                   shape_bounds)
+
+
+# "turtle" draws through turtle.Turtle; "canvas" drives the Tk canvas directly
+# (try VILLAGE_BACKEND=canvas python firstfile.py to compare frame times);
+# "raster" renders headless into a NumPy framebuffer and never touches Tk
+BACKEND = os.environ.get("VILLAGE_BACKEND", "turtle")
+
+# set up by init_backend()
+turtle = None
+raster = None
+screen = None
+frame = None
+
+
+
+# canvas backend
+
+_canvas_pens = []
+
+
+class CanvasPen:
+    """Turtle look-alike that drives the Tk canvas directly.
+
+    Polygon and line items are created the first time they are needed and
+    then kept. clear() only rewinds the pen, so the next frame updates the
+    same items in place with coords/itemconfig, and finish() hides any item
+    the frame did not reuse.
+    """
+
+    def __init__(self, tag):
+        self.canvas = screen.getcanvas()
+        self.tag = tag
+        self.items = []
+        # [[item, options, palette tags]]
+        self._pools = {"polygon": [], "line": [], "text": []}
+        self._used = {"polygon": 0, "line": 0, "text": 0}
+        self._init_pen()
+        _canvas_pens.append(self)
+
+    def _init_pen(self):
+        self._pencolor = self._fillcolor = "black"
+        self._width = 1
+        self._down = True
+        self._pos = (0, 0)
+        self._line = []     # flat canvas coords of the open pen trace
+        self._fill = None   # flat canvas coords of the open fill
+        self._traced = False  # pen stayed down for the whole open fill
+
+    def color(self, *args):
+        color = tk_color(args)
+        if color != self._pencolor:
+            self._flush_line()
+        self._pencolor = self._fillcolor = color
+
+    def pensize(self, width):
+        if width != self._width:
+            self._flush_line()
+            self._width = width
+
+    def penup(self):
+        self._flush_line()
+        self._down = False
+        self._traced = False
+
+    def pendown(self):
+        self._down = True
+
+    def goto(self, x, y=None):
+        if y is None:
+            x, y = x
+        if self._fill is not None:
+            self._fill += (x, -y)
+        if self._down:
+            if not self._line:
+                self._line += (self._pos[0], -self._pos[1])
+            self._line += (x, -y)
+        self._pos = (x, y)
+
+    def begin_fill(self):
+        self._flush_line()
+        self._fill = [self._pos[0], -self._pos[1]]
+        self._traced = self._down
+
+    def end_fill(self):
+        if self._fill is not None and len(self._fill) >= 6:
+            # a trace that went all the way round becomes the outline;
+            # one broken by penup() stays a separate line, as in turtle
+            outline = ""
+            if self._traced and self._line:
+                outline = self._pencolor
+                self._line = []
+            self._emit("polygon", self._fill, fill=self._fillcolor,
+                       outline=outline, width=self._width)
+        self._fill = None
+        self._flush_line()
+
+    def write(self, text, move=False, align="left", font=("Arial", 8, "normal")):
+        self._flush_line()
+        anchor = {"left": "sw", "center": "s", "right": "se"}[align]
+        self._emit("text", (self._pos[0], -self._pos[1]), text=str(text),
+                   fill=self._pencolor, font=font, anchor=anchor)
+
+    def polylines(self, xs, ys):
+        """One line item per row of xs/ys; the pen is left up at the end."""
+        self._flush_line()
+        for row_x, row_y in zip(xs.tolist(), (-ys).tolist()):
+            coords = [v for point in zip(row_x, row_y) for v in point]
+            self._emit("line", coords, fill=self._pencolor, width=self._width)
+        if len(xs):
+            self._pos = (xs[-1, -1], ys[-1, -1])
+        self._down = False
+
+    def clear(self):
+        self._line = []
+        self._fill = None
+        for kind in self._used:
+            self._used[kind] = 0
+
+    def shown(self):
+        """How many of the pen's items are on screen."""
+        return sum(slot[1] is not None
+                   for pool in self._pools.values() for slot in pool)
+
+    def finish(self):
+        """Flush the open line and hide items this frame left unused."""
+        self._flush_line()
+        for kind, pool in self._pools.items():
+            for slot in pool[self._used[kind]:]:
+                if slot[1] is not None:
+                    self.canvas.itemconfig(slot[0], state="hidden")
+                    slot[1] = None
+
+    def _flush_line(self):
+        if len(self._line) >= 4:
+            self._emit("line", self._line, fill=self._pencolor,
+                       width=self._width)
+        self._line = []
+
+    def _emit(self, kind, coords, **options):
+        pool = self._pools[kind]
+        i = self._used[kind]
+        self._used[kind] = i + 1
+        if i < len(pool):
+            slot = pool[i]
+            self.canvas.coords(slot[0], coords)
+            if slot[1] != options:
+                if day is not None:
+                    self._retag(slot, day.tags(options))
+                    self.canvas.itemconfig(slot[0], state="normal",
+                                           **day.tinted(options))
+                else:
+                    self.canvas.itemconfig(slot[0], state="normal", **options)
+                slot[1] = options
+        else:
+            # with the day cycle on, items are drawn in the colours of the
+            # hour and filed under their palette entries
+            palette_tags = ()
+            shown = options
+            if day is not None:
+                palette_tags = day.tags(options)
+                shown = day.tinted(options)
+            tags = (self.tag,) + palette_tags
+            if kind == "polygon":
+                item = self.canvas.create_polygon(coords, tags=tags, **shown)
+            elif kind == "text":
+                item = self.canvas.create_text(coords, tags=tags, **shown)
+            else:
+                item = self.canvas.create_line(coords, tags=tags,
+                                               capstyle="round", **shown)
+            pool.append([item, options, palette_tags])
+            self.items.append(item)
+
+    def _retag(self, slot, palette_tags):
+        """File a reused item under the palette entries it is now drawn in."""
+        if palette_tags != slot[2]:
+            for tag in slot[2]:
+                self.canvas.dtag(slot[0], tag)
+            for tag in palette_tags:
+                self.canvas.addtag_withtag(tag, slot[0])
+            slot[2] = palette_tags
+
+
+class VertexBuffer(CanvasPen):
+    """A CanvasPen that keeps the items it draws as a list.
+
+    Each item is its kind, flat canvas coords and options, exactly what
+    CanvasPen would create or update. Nothing here touches Tk, so a worker
+    thread can draw into one buffer while the main thread submits another.
+    """
+
+    def __init__(self):
+        self._init_pen()
+        self.emitted = []
+
+    def clear(self):
+        self._line = []
+        self._fill = None
+        self.emitted = []
+
+    def submit(self, pen):
+        """Create or update every item of the buffer on CanvasPen `pen`."""
+        for kind, coords, options in self.emitted:
+            pen._emit(kind, coords, **options)
+
+    def _emit(self, kind, coords, **options):
+        self.emitted.append((kind, coords, options))
+
+
+def make_pen(name):
+    """A pen for one layer on the configured BACKEND."""
+    if BACKEND == "canvas":
+        return CanvasPen("pen_" + name)
+    if BACKEND == "raster":
+        return raster.RasterPen(frame, geometry.TARGET_W, geometry.TARGET_H)
+    t = turtle.Turtle()
+    t.hideturtle()
+    t.speed(0)
+    return t
+
+
+def present():
+    """Finish the frame on every canvas pen and hand it to Tk."""
+    for pen in _canvas_pens:
+        pen.finish()
+    if screen is not None:
+        screen.update()
+
+
+# Raster frames are rebuilt from scratch, so the finished background and
+# bridge are kept as a pixel snapshot that every frame starts from.
+static_frame = None
+
+
+def retain_background():
+    global static_frame
+    if BACKEND == "raster":
+        static_frame = frame.snapshot()
+
+
+def begin_frame():
+    if BACKEND == "raster" and static_frame is not None:
+        frame.restore(static_frame)
+
+
+
+# retained layers
+
+class Layer:
+    """A pen whose canvas items are filed under one canvas tag.
+
+    Static layers are drawn once and kept. Every frame re-creates the
+    animated items on top of the canvas, so a retained layer is raised back
+    above them instead of being cleared and redrawn. On the raster backend
+    the layer is kept as a sprite and raising it blits it onto the frame.
+    A layer can also be moved as a whole; `origin` is the pixel position
+    its items were drawn at and (x, y) where they are now.
+    """
+
+    def __init__(self, name):
+        self.tag = "layer_" + name
+        self.origin = (0, 0)
+        self.x = self.y = 0
+        if BACKEND == "raster":
+            self.turtle = raster.RasterPen(raster.SpriteBuilder(),
+                                           geometry.TARGET_W, geometry.TARGET_H)
+            self.sprite = None
+        else:
+            self.turtle = make_pen(name)
+
+    def draw(self, draw_fn, *args):
+        t = self.turtle
+        t.clear()
+        draw_fn(t, *args)
+        # lifting the pen closes the open line item; otherwise every
+        # screen.update() would reset its coords and undo any canvas move
+        t.penup()
+        self.x, self.y = self.origin
+        if BACKEND == "raster":
+            self.sprite = t.target.build()
+            self.raise_to_top()
+            return
+        canvas = screen.getcanvas()
+        for item in t.items:
+            canvas.addtag_withtag(self.tag, item)
+
+    def moveto(self, x, y):
+        if BACKEND != "raster" and (x != self.x or y != self.y):
+            # canvas y grows downwards
+            screen.getcanvas().move(self.tag, x - self.x, self.y - y)
+        self.x = x
+        self.y = y
+
+    def raise_to_top(self):
+        if BACKEND == "raster":
+            if self.sprite is not None:
+                self.sprite.blit(frame, self.x - self.origin[0],
+                                 self.origin[1] - self.y)
+            return
+        screen.getcanvas().tag_raise(self.tag)
+
+
+# pens for the animated layers, then the retained foreground layers in
+# z-order: houses (static) -> tree leaves (wind) -> cow (static)
+background_turtle = bridge_turtle = None
+boat_turtle = cloud_turtle = car_turtle = windmill_turtle = bird_turtle = None
+world_turtle = None
+houses_layer = leaves_layer = cow_layer = None
+
+
+def init_backend():
+    """Open the window (or framebuffer) and create every pen and layer.
+
+    Nothing imports turtle/tkinter (or NumPy) before this runs. Calling it
+    again does nothing.
+    """
+    global turtle, raster, screen, frame
+    global background_turtle, bridge_turtle, boat_turtle, cloud_turtle
+    global car_turtle, windmill_turtle, bird_turtle, world_turtle
+    global houses_layer, leaves_layer, cow_layer
+    if background_turtle is not None:
+        return
+    if BACKEND == "raster":
+        import raster
+        frame = raster.Framebuffer(geometry.TARGET_W, geometry.TARGET_H,
+                                   SKY_COLOR)
+    else:
+        import turtle
+        try:
+            import raster  # only to pre-render the static background (NumPy)
+        except ImportError:
+            raster = None
+        screen = turtle.Screen()
+        screen.setup(geometry.TARGET_W, geometry.TARGET_H)
+        screen.bgcolor(*SKY_COLOR)
+        screen.title("2D Village Scenery")
+        screen.tracer(0)
+        screen.getcanvas().bind("<Configure>", on_configure)
+        if village is not None:
+            screen.onkeypress(lambda: camera.pan(-PAN_STEP), "Left")
+            screen.onkeypress(lambda: camera.pan(PAN_STEP), "Right")
+            screen.listen()
+
+    background_turtle = make_pen("background")
+    bridge_turtle = make_pen("bridge")
+    boat_turtle = make_pen("boat")
+    cloud_turtle = make_pen("cloud")
+    car_turtle = make_pen("car")
+    windmill_turtle = make_pen("windmill")
+    bird_turtle = make_pen("bird")
+    world_turtle = make_pen("world")
+
+    houses_layer = Layer("houses")
+    leaves_layer = Layer("leaves")
+    cow_layer = Layer("cow")
+
+
+
+# On the Tk backends the background and bridge are rasterized once into a
+# PNG that becomes the screen's bgpic, so the canvas holds no items for
+# them and Tk has nothing static to re-composite. The picture is cached on
+# disk, keyed on the output size, SCALE and a hash of the scene code; a warm
+# start loads it without drawing anything. Without NumPy (or with
+# VILLAGE_BACKGROUND_CACHE=0) they are drawn with the pens as before.
+BACKGROUND_CACHE = os.environ.get(
+    "VILLAGE_CACHE_DIR",
+    os.path.join(os.environ.get("XDG_CACHE_HOME")
+                 or os.path.join(os.path.expanduser("~"), ".cache"), "village"))
+SCENE_SOURCES = ("geometry.py", "scene.py", "raster.py")
+
+
+def scene_hash():
+    """Hash of the code (and scene file) deciding what the background
+    looks like."""
+    digest = hashlib.sha1()
+    here = os.path.dirname(os.path.abspath(__file__))
+    for name in SCENE_SOURCES + ((SCENE_FILE,) if SCENE_FILE else ()):
+        with open(os.path.join(here, name), "rb") as f:
+            digest.update(f.read())
+    return digest.hexdigest()[:16]
+
+
+# The static layers come from a scene file (scenefile.py), compiled once
+# per SCALE into the cache directory and memory-mapped from there on later
+# starts. VILLAGE_SCENE picks another file; VILLAGE_SCENE= (empty) draws
+# them with the draw_* code in scene.py instead.
+SCENE_FILE = os.environ.get("VILLAGE_SCENE", scenefile.DEFAULT_SCENE)
+BUILTIN_LAYERS = {
+    "ground": draw_ground,
+    "flowers": draw_flowers,
+    "road": draw_road,
+    "bridge": draw_bridge,
+    "houses": draw_houses,
+    "leaves": lambda t: draw_tree_leaves(t, 0),
+    "cow": draw_3d_cow,
+}
+_scene_layers = {}  # SCALE -> {layer name: DisplayList}
+
+
+def draw_layer(t, name):
+    """Draw static layer `name` (unswayed, for the leaves) with pen t."""
+    if not SCENE_FILE:
+        BUILTIN_LAYERS[name](t)
+        return
+    layers = _scene_layers.get(geometry.SCALE)
+    if layers is None:
+        layers = _scene_layers[geometry.SCALE] = scenefile.open_scene(
+            SCENE_FILE, BACKGROUND_CACHE)
+    layers[name].replay(t)
+
+
+def draw_backdrop(t):
+    """Everything behind the bridge; the procedural world brings its own
+    flowers."""
+    draw_layer(t, "ground")
+    if village is None:
+        draw_layer(t, "flowers")
+    draw_layer(t, "road")
+
+
+def background_path():
+    return os.path.join(BACKGROUND_CACHE, "background-%dx%d-%g-%s%s.png"
+                        % (geometry.TARGET_W, geometry.TARGET_H, geometry.SCALE,
+                           scene_hash(), "-world" if village else ""))
+
+
+def render_background(path):
+    """Rasterize the background and bridge into a PNG at `path`."""
+    width, height = geometry.TARGET_W, geometry.TARGET_H
+    fb = raster.Framebuffer(width, height, SKY_COLOR)
+    pen = raster.RasterPen(fb, width, height)
+    draw_backdrop(pen)
+    draw_layer(pen, "bridge")
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    # write-then-rename, so a half-written file is never picked up
+    tmp = "%s.%d.tmp" % (path, os.getpid())
+    fb.save_png(tmp, level=1)
+    os.replace(tmp, path)
+
+
+def draw_static():
+    """Background and bridge, from the picture cache where it applies."""
+    global sun_drop
+    with quality.full_detail():
+        draw_static_layers()
+    retain_background()
+    if day is not None:
+        # the sun has just been drawn where it is at noon
+        sun_drop = 0
+        place_sun()
+
+
+def draw_static_layers():
+    if (BACKEND != "raster" and raster is not None and day is None
+            and os.environ.get("VILLAGE_BACKGROUND_CACHE", "1") != "0"):
+        path = background_path()
+        if not os.path.exists(path):
+            render_background(path)
+        screen.bgpic(path)
+    else:
+        background_turtle.clear()
+        bridge_turtle.clear()
+        draw_backdrop(background_turtle)
+        draw_layer(bridge_turtle, "bridge")
+
+
+def draw_foreground(wind_sway):
+    """Draw every foreground layer; only the leaves move after this.
+
+    The procedural world replaces them and is drawn every frame instead.
+    """
+    if village is not None:
+        return
+    with quality.full_detail():
+        houses_layer.draw(draw_layer, "houses")
+        # the wind only slides the crown sideways, so it is drawn once
+        # unswayed; a raster sprite moves by whole pixels, so there the
+        # crown can be up to half a pixel off where drawing it would put it
+        leaves_layer.draw(draw_layer, "leaves")
+        cow_layer.draw(draw_layer, "cow")
+    leaves_layer.moveto(sx(wind_sway), 0)
+
+
+def update_foreground(wind_sway):
+    """Per-frame foreground: re-stack the retained layers, slide the leaves."""
+    if "houses" in visible:
+        houses_layer.raise_to_top()
+    if "leaves" in visible:
+        if is_due("leaves"):
+            leaves_layer.moveto(sx(wind_sway), 0)
+        leaves_layer.raise_to_top()
+    if "cow" in visible:
+        cow_layer.raise_to_top()
+
+
+
+# shape instancing
+
+# Car, boat and clouds only ever translate, so with INSTANCING they are
+# drawn once and then moved as a whole instead of cleared and redrawn.
+INSTANCING = True
+
+
+class Instance(Layer):
+    """One placed copy of a display list, moved as a single canvas tag."""
+
+    def __init__(self, name, shape, x=0, y=0):
+        super().__init__(name)
+        self.origin = (x, y)
+        self.draw(shape.replay, x, y)
+
+    def moveto(self, x, y):
+        super().moveto(x, y)
+        if BACKEND == "raster":
+            # raster frames start empty, so the sprite is blitted every time
+            self.raise_to_top()
+
+    def park(self, x, y):
+        """Move to (x, y), which is out of view, without drawing there."""
+        Layer.moveto(self, x, y)
+
+
+instances = {}
+
+
+def create_instances():
+    """Place car, boat and cloud shapes; cloud groups share display lists.
+
+    Instances that already exist are redrawn in place at the current SCALE.
+    """
+    shapes = {}
+    if not TRAFFIC["car"]:
+        shapes["car"] = display_list(draw_car, 0)
+    if not TRAFFIC["boat"]:
+        shapes["boat"] = display_list(draw_boat_with_turtle, 0)
+    for i, (kind, gx, gy) in enumerate(CLOUD_GROUPS):
+        shapes["cloud%d" % i] = display_list(draw_cloud_group, kind, 0, 0)
+    parked.clear()
+    for name, shape in shapes.items():
+        if name in instances:
+            instances[name].draw(shape.replay, *instances[name].origin)
+        else:
+            instances[name] = Instance(name, shape)
+
+
+# viewport culling
+
+# Every drawable is filed in a uniform grid under its bounding box in base
+# units. Each frame the moving ones are re-filed and only the names the
+# visible rectangle turns up are drawn: car, boat, clouds and birds all run
+# well past the window edge before they wrap, and a scene with many more
+# objects still only pays for the cells on screen. VILLAGE_CULLING=0 draws
+# everything.
+CULLING = os.environ.get("VILLAGE_CULLING", "1") != "0"
+GRID_CELL = 100  # base units per grid cell
+
+grid = spatial.SpatialGrid(GRID_CELL)
+shape_boxes = {}      # shape -> box at offset 0, from drawable_bounds()
+visible = frozenset()  # drawables on screen this frame
+parked = set()         # culled instances already moved out of view
+cull_stats = {"drawn": 0, "culled": 0, "frames": 0,
+              "total_drawn": 0, "total_culled": 0}
+
+
+def place(name, shape, x=0, y=0):
+    grid.insert(name, spatial.translate(shape_boxes[shape], x, y))
+
+
+def view_box():
+    """The window in base units."""
+    half_w = geometry.TARGET_W / 2 / geometry.SCALE
+    half_h = geometry.TARGET_H / 2 / geometry.SCALE
+    return (-half_w, -half_h, half_w, half_h)
+
+
+def cull():
+    """File every drawable at its place in the current state and pick the
+    ones to draw this frame."""
+    global visible
+    if not shape_boxes:
+        shape_boxes.update(drawable_bounds())
+        for name in ("houses", "leaves", "cow"):
+            # as the scene file has them
+            shape_boxes[name] = shape_bounds(draw_layer, name)
+        if village is None:
+            # the windmill head sways by less than the bounds margin
+            place("windmill", "windmill")
+            place("houses", "houses")
+            place("cow", "cow")
+    if not TRAFFIC["car"]:
+        place("car", "car", state.car_x)
+    if not TRAFFIC["boat"]:
+        place("boat", "boat", state.bx)
+    for i, (kind, gx, gy) in enumerate(CLOUD_GROUPS):
+        place("cloud%d" % i, "cloud_" + kind, gx + state.bx, gy)
+    if not FLOCK_SIZE:
+        for i, (x, y) in enumerate(state.bird_positions):
+            place("bird%d" % i, "bird", x, y)
+    if village is None:
+        place("leaves", "leaves", state.wind_offset)
+
+    if CULLING:
+        visible = grid.query(view_box())
+    else:
+        visible = frozenset(grid.boxes)
+    s = cull_stats
+    s["drawn"] = len(visible)
+    s["culled"] = len(grid) - len(visible)
+    s["frames"] += 1
+    s["total_drawn"] += s["drawn"]
+    s["total_culled"] += s["culled"]
+
+
+def move_instance(name, x, y):
+    """Move an instance into place, or out of the way once it is culled."""
+    if name in visible:
+        instances[name].moveto(x, y)
+        parked.discard(name)
+    elif name not in parked:
+        instances[name].park(x, y)
+        parked.add(name)
+
+
+def culling_summary():
+    s = cull_stats
+    frames = s["frames"] or 1
+    return ("culling %d drawn %d culled  avg %.1f/%.1f"
+            % (s["drawn"], s["culled"], s["total_drawn"] / frames,
+               s["total_culled"] / frames))
+
+
+# subsystems
+
+# Each subsystem below that can be switched on registers itself once:
+# enabled() says whether it is on, summary() gives its line of the profiler
+# overlay and, for one that draws layers from scratch, draw(st, visible)
+# gives its entries of computed_layers(). The frame code goes through
+# running() rather than asking after each subsystem by name.
+Subsystem = namedtuple("Subsystem", "name enabled draw summary")
+subsystems = []
+
+
+def register(name, enabled, summary, draw=None):
+    subsystems.append(Subsystem(name, enabled, draw, summary))
+
+
+def running():
+    """The registered subsystems that are on, in registration order."""
+    return [sub for sub in subsystems if sub.enabled()]
+
+
+# procedural world
+
+# VILLAGE_WORLD=<seed> swaps the hand-placed houses, tree, windmill and cow
+# for a procedurally generated village (world.py) that scrolls past the
+# camera at VILLAGE_SCROLL base units per step; the arrow keys pan.
+WORLD_SEED = os.environ.get("VILLAGE_WORLD")
+PAN_STEP = 50  # base units per arrow key press
+
+village = world.World(int(WORLD_SEED)) if WORLD_SEED else None
+camera = world.Camera()
+world_props_drawn = 0
+
+
+def draw_world(t, st):
+    """Stream in the chunks around the camera and draw the props in view."""
+    global world_props_drawn
+    camera.scroll = st.camera_x
+    view = camera.view(view_box())
+    village.update(view)
+    props = village.visible(view)
+    for prop in props:
+        replay_prop(t, prop.kind, prop.x - camera.x, prop.y,
+                    st.windmill_angle + prop.phase, st.wind_offset)
+    world_props_drawn = len(props)
+
+
+def world_summary():
+    s = village.stats()
+    return ("world x %.0f  %d/%d props  %d chunks  %d made  %d evicted"
+            % (camera.x, world_props_drawn, s["props"], s["chunks"],
+               s["generated"], s["evictions"]))
+
+
+register("world", lambda: village is not None, world_summary,
+         lambda st, visible: {"world": (draw_world, (st,))})
+
+
+# bird flock
+
+# VILLAGE_BIRDS=<n> replaces the three scripted birds with a flock of n
+# boids (flock.py, which needs NumPy). The flock is stepped once per
+# simulation step, so a frame rendered out of order replays it from its
+# last checkpoint before that frame (replay.py); it is drawn whole,
+# without culling, in two batches of strokes.
+FLOCK_SIZE = int(os.environ.get("VILLAGE_BIRDS", "0"))
+
+bird_flock = None
+
+
+def draw_flock(t, frame_index):
+    global bird_flock
+    if bird_flock is None:
+        import flock
+        bird_flock = flock.Flock(FLOCK_SIZE, state.SEED)
+    bird_flock.advance_to(frame_index)
+    bird_flock.draw(t, frame_index,
+                    quality.stride(quality.current().bird_share))
+
+
+def flock_summary():
+    return ("flock %d birds  %d neighbour pairs"
+            % (bird_flock.count, bird_flock.pairs))
+
+
+register("flock", lambda: FLOCK_SIZE > 0, flock_summary,
+         lambda st, visible: {"birds": (draw_flock, (st.frame,))})
+
+
+# weather and smoke
+
+# VILLAGE_PARTICLES=rain,smoke (any of rain, snow and smoke; particles.py,
+# which needs NumPy) draws particle effects over the foreground. Smoke
+# rises from the houses' chimneys, wherever the procedural world has put
+# them. Like the flock, the particles are stepped once per simulation
+# step and replayed from a checkpoint for a frame rendered out of order.
+PARTICLE_EFFECTS = [name for name in
+                    os.environ.get("VILLAGE_PARTICLES", "").split(",") if name]
+
+particle_pools = []
+particle_turtle = None
+
+
+def chimney_sources(frame_index):
+    """Where smoke leaves the houses on frame `frame_index` (world x)."""
+    if village is None:
+        return list(CHIMNEYS.values())
+    view = spatial.translate(view_box(), state.SCROLL_STEP * frame_index
+                             + camera.offset, 0)
+    village.update(view)
+    return [(p.x + cx - PROP_ANCHORS[p.kind][0], p.y + cy)
+            for p in village.visible(view) if p.kind in CHIMNEYS
+            for cx, cy in [CHIMNEYS[p.kind]]]
+
+
+def draw_particles(t, frame_index):
+    if not particle_pools:
+        import particles
+        particle_pools.extend(particles.Particles(name, seed=[state.SEED, i])
+                              for i, name in enumerate(PARTICLE_EFFECTS))
+    for pool in particle_pools:
+        pool.advance_to(frame_index, state.wind_at, chimney_sources)
+        # rain and snow fall past the window; smoke stays with its house
+        world_space = village is not None and pool.effect.origin == "sources"
+        pool.draw(t, -camera.x if world_space else 0.0,
+                  quality.stride(quality.current().particle_share))
+
+
+def particles_summary():
+    return "particles " + "  ".join(
+        "%s %d/%d" % (name, pool.live, pool.capacity)
+        for name, pool in zip(PARTICLE_EFFECTS, particle_pools))
+
+
+register("particles", lambda: bool(PARTICLE_EFFECTS), particles_summary,
+         lambda st, visible: {"particles": (draw_particles, (st.frame,))})
+
+
+# road traffic
+
+# VILLAGE_CARS=<n> and VILLAGE_BOATS=<n> replace the one car and the one
+# boat with up to n of each (traffic.py, which needs NumPy; a lane only
+# takes as many as fit along the window): cars both ways on the road and
+# boats on the river, queueing behind slower ones instead of driving
+# through them. The store is stepped and replayed like the flock; it is
+# culled with one array test of its own rather than through the grid.
+TRAFFIC = {"car": int(os.environ.get("VILLAGE_CARS", "0")),
+           "boat": int(os.environ.get("VILLAGE_BOATS", "0"))}
+
+traffic_store = None
+traffic_drawn = {}
+
+
+def draw_traffic(t, name, frame_index):
+    global traffic_store
+    if traffic_store is None:
+        import traffic
+        traffic_store = traffic.Traffic(TRAFFIC, state.SEED)
+    traffic_store.advance_to(frame_index)
+    x0, _, x1, _ = view_box() if CULLING else (-math.inf, 0, math.inf, 0)
+    traffic_drawn[name] = traffic_store.draw(t, name, x0, x1)
+
+
+def traffic_summary():
+    s = traffic_store.stats()
+    return ("traffic %s  %d drawn  %d stopped  speed %.2f"
+            % ("  ".join("%d/%d %ss" % (count, traffic_store.requested[name],
+                                         name)
+                         for name, count in traffic_store.counts.items()),
+               sum(traffic_drawn.values()), s["stopped"], s["mean_speed"]))
+
+
+register("traffic", lambda: any(TRAFFIC.values()), traffic_summary,
+         lambda st, visible: {name: (draw_traffic, (name, st.frame))
+                              for name, count in TRAFFIC.items() if count})
+
+
+# update rates (temporal level of detail)
+
+# On the Tk backends canvas items stay where they are until changed, so a
+# layer is only redrawn (or moved) when its own deadline comes round: the
+# slow boat and clouds at 25 Hz and the swaying leaves at 10 Hz. Deadlines
+# are kept on the render clock, the simulation time of the interpolated
+# state being drawn, and the layers at the simulation rate are redrawn on
+# every frame, since they move between steps too. Only the layers the
+# scene draws are scheduled: no world without VILLAGE_WORLD, no windmill
+# or leaves with it and no particles without VILLAGE_PARTICLES.
+# VILLAGE_RATES=clouds=10,birds=25 changes the rates (redraws per second)
+# and VILLAGE_RATES=0 redraws every layer on every frame. Raster frames are
+# rebuilt from the background, so there every layer is always drawn.
+LAYER_RATES = {"car": 50, "boat": 25, "clouds": 25, "windmill": 50,
+               "birds": 50, "leaves": 10, "world": 50, "particles": 50}
+RATES = os.environ.get("VILLAGE_RATES", "")
+
+
+def live_layers():
+    """The layers of LAYER_RATES this scene draws."""
+    names = ["car", "boat", "clouds", "birds"]
+    names += ["world"] if village is not None else ["windmill", "leaves"]
+    if PARTICLE_EFFECTS:
+        names.append("particles")
+    return names
+
+
+def layer_rates(spec):
+    """Redraws per second of each live layer, with the name=rate items of
+    `spec` (as VILLAGE_RATES) applied; raises ValueError naming a bad item."""
+    rates = {name: LAYER_RATES[name] for name in live_layers()}
+    for item in spec.split(","):
+        if not item:
+            continue
+        name, _, rate = item.partition("=")
+        try:
+            rate = float(rate)
+        except ValueError:
+            rate = 0
+        if name not in LAYER_RATES or not rate > 0:
+            raise ValueError("VILLAGE_RATES: bad item %r, want layer=rate with "
+                             "a rate above 0 and a layer among %s"
+                             % (item, ", ".join(LAYER_RATES)))
+        if name in rates:
+            rates[name] = rate
+    return rates
+
+
+layer_scheduler = (scheduler.RateScheduler(layer_rates(RATES), state.SIM_HZ)
+                   if BACKEND != "raster" and RATES != "0" else None)
+due_layers = None  # layers to redraw this frame; None is all of them
+
+
+def schedule():
+    """Pick the layers due for a redraw on this frame."""
+    global due_layers
+    if layer_scheduler is not None:
+        due_layers = layer_scheduler.due(state.render_time)
+
+
+def is_due(name):
+    return due_layers is None or name in due_layers
+
+
+def rates_summary():
+    return "redraws/s " + " ".join(
+        "%s %.0f" % (name, rate)
+        for name, rate in layer_scheduler.stats().items())
+
+
+register("rates", lambda: layer_scheduler is not None, rates_summary)
+
+
+# window resizing
+
+# Tk reports every size change while the window is dragged; only the last
+# one is kept, and the scene is rebuilt for it at the start of the next
+# frame.
+pending_size = None
+
+
+def on_configure(event):
+    global pending_size
+    pending_size = (event.width, event.height)
+
+
+def apply_resize(wind_sway):
+    """Rebuild the static picture and the retained layers for the new size."""
+    global pending_size
+    size, pending_size = pending_size, None
+    if size == (geometry.TARGET_W, geometry.TARGET_H):
+        return
+    geometry.resize(*size)
+    screen.screensize(*size)
+    draw_static()
+    draw_foreground(wind_sway)
+    if instances:
+        create_instances()
+
+
+# frame profiler (opt-in)
+
+# VILLAGE_PROFILE=1 times every layer and shows an on-screen overlay;
+# VILLAGE_PROFILE_LOG=frames.csv (or .jsonl) also streams each frame to disk.
+# While disabled each hook is a single falsy global check.
+PROFILE_SECTIONS = ("clear", "cull", "car", "boat", "clouds", "windmill", "birds",
+                    "foreground", "particles", "state", "update", "overlay")
+OVERLAY_EVERY = 10  # frames between overlay text refreshes
+
+frame_profiler = None
+overlay_layer = None
+
+
+def enable_profiler(log_path=None):
+    global frame_profiler, overlay_layer
+    frame_profiler = profiler.FrameProfiler(PROFILE_SECTIONS, log_path=log_path)
+    overlay_layer = Layer("profiler")
+
+
+def canvas_items():
+    """Canvas items on screen, or None when the backend draws none (the
+    turtle backend's are its own, and a raster frame is one image)."""
+    if BACKEND != "canvas":
+        return None
+    return sum(pen.shown() for pen in _canvas_pens)
+
+
+def draw_profiler_overlay(t, lines):
+    t.penup()
+    t.color(0, 0, 0)
+    t.goto(-geometry.TARGET_W / 2 + 10,
+           geometry.TARGET_H / 2 - 10 - 18 * len(lines))
+    t.write("\n".join(lines), font=("Courier", 12, "normal"))
+
+
+# layers drawn from scratch
+
+# The windmill, the birds and the layers of the subsystems that draw (the
+# procedural world, the flock, the particles and the traffic) are drawn
+# anew every frame from the state alone; everything else is moved or
+# re-stacked. computed_layers() is the one list of them, so the same code
+# draws them here or on the pipeline worker.
+
+def computed_layers(st, visible):
+    """name -> (draw function, args) for the layers drawn from scratch on
+    the frame with state `st`; each function takes the pen first."""
+    layers = {}
+    for sub in running():
+        if sub.draw is not None:
+            layers.update(sub.draw(st, visible))
+    if "windmill" in visible:
+        layers["windmill"] = (replay_windmill,
+                              (st.windmill_angle, st.wind_offset * 0.5))
+    if "birds" not in layers:
+        # the three scripted birds, unless a flock took their place
+        layers["birds"] = (draw_birds_flying,
+                           ([pos for i, pos in enumerate(st.bird_positions)
+                             if "bird%d" % i in visible], st.frame))
+    return layers
+
+
+def draw_computed(layers, name, pen):
+    """Draw layer `name` onto pen, from computed_layers() or from the
+    VertexBuffer the pipeline worker filled for it."""
+    pen.clear()
+    layer = layers.get(name)
+    if isinstance(layer, VertexBuffer):
+        layer.submit(pen)
+    elif layer is not None:
+        draw_fn, args = layer
+        draw_fn(pen, *args)
+
+
+# pipelined geometry (opt-in)
+
+# VILLAGE_PIPELINE=1 (canvas backend only) draws the layers above on a
+# worker thread, into VertexBuffers holding the flat coords of each canvas
+# item, one frame ahead: while the main thread submits frame N's buffers
+# to the canvas and Tk redraws the window, which it does without holding
+# the GIL, the worker is already working out frame N+1. Two sets of
+# buffers take turns, so the window shows the state one frame late. It
+# pays off when there is geometry worth overlapping, such as a big flock,
+# but not with particles: each is an item the main thread submits from the
+# buffer anyway, so there it is turned down (benchmarks/bench_pipeline.py).
+PIPELINE = os.environ.get("VILLAGE_PIPELINE", "0") != "0"
+
+pipeline = None
+vertex_buffers = ({}, {})  # name -> VertexBuffer, filled in turn
+prepared_frames = 0
+prepared_summaries = []  # layer_summaries() as the worker last took them
+
+
+def layer_summaries():
+    """Overlay lines about what the layers drawn from scratch keep. With
+    the pipeline on, those belong to the worker: it takes these lines
+    itself and hands them back with its buffers."""
+    return [keyframe_summary()] + [sub.summary() for sub in running()
+                                   if sub.draw is not None]
+
+
+def overlay_summaries():
+    """Overlay lines below the profiler's own: culling, the layers drawn
+    from scratch and then every other subsystem that is on."""
+    return ([culling_summary()]
+            + (prepared_summaries if pipeline else layer_summaries())
+            + [sub.summary() for sub in running() if sub.draw is None])
+
+
+def prepare_frame(job):
+    """Worker side: draw the computed layers of a state that are due into
+    buffers, and take the overlay lines about them if asked to."""
+    global prepared_frames
+    st, shown, due, summarize = job
+    buffers = vertex_buffers[prepared_frames % 2]
+    prepared_frames += 1
+    out = {}
+    for name, (draw_fn, args) in computed_layers(st, shown).items():
+        if due is not None and name not in due:
+            continue
+        buf = out[name] = buffers.setdefault(name, VertexBuffer())
+        buf.clear()
+        draw_fn(buf, *args)
+        buf.penup()
+    return st, shown, due, out, layer_summaries() if summarize else None
+
+
+def exchange_frame():
+    """Hand the current state to the worker and switch to the frame it
+    finished before; returns that frame's buffers."""
+    global visible, due_layers, prepared_summaries
+    cull()
+    schedule()
+    # the overlay is refreshed on the frame after next, which is when
+    # this job's result comes back
+    prof = frame_profiler
+    summarize = prof is not None and (prof.frame + 1) % OVERLAY_EVERY == 0
+    st, visible, due_layers, buffers, summaries = pipeline.exchange(
+        (state.current_state(), visible, due_layers, summarize))
+    if summaries is not None:
+        prepared_summaries = summaries
+    state.apply_state(st)
+    return buffers
+
+
+def start_pipeline():
+    global pipeline
+    if pipeline is None:
+        pipeline = Pipeline(prepare_frame, name="geometry")
+
+
+def stop_pipeline():
+    global pipeline
+    if pipeline is not None:
+        pipeline.close()
+        pipeline = None
+
+
+def pipeline_summary():
+    s = pipeline.stats()
+    return ("pipeline %d frames  waited %.1f ms/frame"
+            % (s["jobs"], 1000 * s["wait"] / max(1, s["jobs"])))
+
+
+register("pipeline", lambda: pipeline is not None, pipeline_summary)
+
+
+# quality governor (opt-in)
+
+# VILLAGE_QUALITY=auto lets a governor (quality.py) trade detail for speed
+# to keep frames within the VILLAGE_FPS budget: the segments of ellipses,
+# the sail curve, the leaves of procedural world trees (the scene's own
+# tree is static and always full) and the share of the flock and the
+# particles that is drawn. Every change is logged to stderr.
+# VILLAGE_QUALITY=<level> pins a level instead: 0 is the coarsest, 3 the
+# default and 4 finer still.
+QUALITY = os.environ.get("VILLAGE_QUALITY", "")
+if QUALITY not in ("", "auto"):
+    quality.apply(int(QUALITY))
+
+governor = None
+
+
+def start_governor():
+    global governor
+    governor = quality.Governor(1000 / state.TARGET_FPS, geometry.QUALITY)
+
+
+def set_quality(level):
+    """Switch the detail level; the instances are redrawn at it."""
+    if pipeline is not None:
+        # the worker must not be drawing while the level changes
+        pipeline.drain()
+    quality.apply(level)
+    if instances:
+        create_instances()
+
+
+def quality_summary():
+    return ("quality %d  %d changes  budget %.1f ms"
+            % (geometry.QUALITY, len(governor.changes), governor.budget_ms))
+
+
+register("quality", lambda: governor is not None, quality_summary)
+
+
+# day and night (opt-in)
+
+# VILLAGE_DAY=<seconds> (canvas backend only) runs a day that long, from
+# noon: the sky goes through dusk to night and dawn, the village darkens
+# and the sun sets behind the hills. Nothing is redrawn for it. Each canvas
+# item is tagged with the palette entries (palette.py) its colours come
+# from, and when the time of day reaches the next step of the palette's
+# lookup table, every entry whose colour changed is re-tinted with one
+# itemconfig on its tag. So a frame costs at most a call per entry, not
+# per item or vertex. The background is drawn as canvas items, since the
+# cached picture of it could not be re-tinted.
+DAY_LENGTH = float(os.environ.get("VILLAGE_DAY", "0"))
+
+day = palette.DayCycle() if DAY_LENGTH and BACKEND == "canvas" else None
+sun_drop = 0  # pixels the sun's items have been moved down by
+
+
+def update_palette():
+    """Re-tint the canvas for the time of day of the current state."""
+    changes = day.set_time(state.frame_count / state.SIM_HZ / DAY_LENGTH)
+    if changes is None:
+        return
+    canvas = screen.getcanvas()
+    for tag, option, color in changes:
+        canvas.itemconfig(tag, **{option: color})
+    screen.bgcolor(day.sky())
+    place_sun()
+
+
+def place_sun():
+    """Move the sun down to where it is at this time of day."""
+    global sun_drop
+    drop = sy(day.sun_drop())
+    if drop != sun_drop:
+        canvas = screen.getcanvas()
+        canvas.move(day.sun_tag, 0, drop - sun_drop)
+        # behind every other item, so the hills hide it as it goes down
+        canvas.tag_lower(day.sun_tag)
+        sun_drop = drop
+
+
+def palette_summary():
+    return ("day %.2f  step %d/%d  %d entries  %d re-tinted"
+            % (state.frame_count / state.SIM_HZ / DAY_LENGTH % 1, day.step,
+               day.steps, len(day.entries), day.retinted))
+
+
+register("day", lambda: day is not None, palette_summary)
+
+
+# animation part
+
+def draw_frame(prepared=None):
+    """Draw the animated layers and the foreground for the current state.
+
+    `prepared` is what the pipeline worker drew for this state; otherwise
+    the layers from computed_layers() are drawn here.
+    """
+    global particle_turtle
+    prof = frame_profiler
+    if INSTANCING and not instances:
+        # drawing a raster layer blits it where it was drawn, so this goes
+        # before the frame is reset to the background
+        create_instances()
+    begin_frame()
+    if prof: prof.mark("clear")
+    if prepared is None:
+        # a pipelined frame was culled and scheduled when it was handed to
+        # the worker
+        cull()
+        schedule()
+        layers = computed_layers(state.current_state(), visible)
+    else:
+        layers = prepared
+    if prof: prof.mark("cull")
+
+    # Car
+    if not is_due("car"):
+        pass
+    elif TRAFFIC["car"]:
+        draw_computed(layers, "car", car_turtle)
+    elif INSTANCING:
+        move_instance("car", sx(state.car_x), 0)
+    else:
+        car_turtle.clear()
+        if "car" in visible:
+            draw_car(car_turtle, state.car_x)
+    if prof: prof.mark("car")
+
+    # Boat
+    if not is_due("boat"):
+        pass
+    elif TRAFFIC["boat"]:
+        draw_computed(layers, "boat", boat_turtle)
+    elif INSTANCING:
+        move_instance("boat", sx(state.bx), 0)
+    else:
+        boat_turtle.clear()
+        if "boat" in visible:
+            draw_boat_with_turtle(boat_turtle, state.bx)
+    if prof: prof.mark("boat")
+
+    # Clouds
+    if is_due("clouds"):
+        if not INSTANCING:
+            cloud_turtle.clear()
+        for i, (kind, gx, gy) in enumerate(CLOUD_GROUPS):
+            name = "cloud%d" % i
+            if INSTANCING:
+                move_instance(name, sx(gx + state.bx), sy(gy))
+            elif name in visible:
+                draw_cloud_group(cloud_turtle, kind, gx + state.bx, gy)
+    if prof: prof.mark("clouds")
+
+    # Windmill
+    if is_due("windmill"):
+        draw_computed(layers, "windmill", windmill_turtle)
+    if prof: prof.mark("windmill")
+
+    # Birds
+    if is_due("birds"):
+        draw_computed(layers, "birds", bird_turtle)
+    if prof: prof.mark("birds")
+
+    # Foreground
+    if village is not None:
+        if is_due("world"):
+            draw_computed(layers, "world", world_turtle)
+        if BACKEND == "canvas":
+            screen.getcanvas().tag_raise(world_turtle.tag)
+    else:
+        update_foreground(state.wind_offset)
+    if prof: prof.mark("foreground")
+
+    # Weather and smoke
+    if PARTICLE_EFFECTS:
+        if particle_turtle is None:
+            particle_turtle = make_pen("particles")
+        if is_due("particles"):
+            draw_computed(layers, "particles", particle_turtle)
+        if BACKEND == "canvas":
+            screen.getcanvas().tag_raise(particle_turtle.tag)
+    if prof: prof.mark("particles")
+
+
+def animate():
+    frame_start = time.perf_counter()
+    prof = frame_profiler
+    if prof: prof.begin()
+    state.apply_state(state.game_loop.advance(), state.game_loop.time)
+    if pending_size is not None:
+        if pipeline is not None:
+            # the worker must not be drawing while SCALE changes
+            pipeline.drain()
+        apply_resize(state.wind_offset)
+    prepared = exchange_frame() if pipeline is not None else None
+    if day is not None:
+        update_palette()
+    if prof: prof.mark("state")
+    draw_frame(prepared)
+    present()
+    if governor is not None:
+        level = governor.record(1000 * (time.perf_counter() - frame_start))
+        if level is not None:
+            set_quality(level)
+    if prof:
+        prof.mark("update")
+        if prof.frame % OVERLAY_EVERY == 0:
+            overlay_layer.draw(draw_profiler_overlay,
+                               prof.summary_lines() + overlay_summaries())
+        else:
+            overlay_layer.raise_to_top()
+        prof.mark("overlay")
+        prof.end(canvas_items())
+    screen.ontimer(animate, state.game_loop.next_delay_ms())
+
+
+
+# mainloop and run
+
+def main():
+    init_backend()
+    draw_static()
+    draw_foreground(state.wind_offset)
+    if BACKEND == "raster":
+        # headless: render VILLAGE_FRAMES frames and keep the last one
+        for _ in range(int(os.environ.get("VILLAGE_FRAMES", "1"))):
+            draw_frame()
+            state.step()
+        frame.save_png(os.environ.get("VILLAGE_OUTPUT", "village.png"))
+    else:
+        if os.environ.get("VILLAGE_PROFILE") or os.environ.get("VILLAGE_PROFILE_LOG"):
+            enable_profiler(os.environ.get("VILLAGE_PROFILE_LOG"))
+        if PIPELINE and BACKEND == "canvas":
+            if PARTICLE_EFFECTS:
+                print("VILLAGE_PIPELINE ignored: particles are slower with it",
+                      file=sys.stderr)
+            else:
+                start_pipeline()
+        if QUALITY == "auto":
+            start_governor()
+        animate()
+        screen.mainloop()
+        stop_pipeline()
+        if frame_profiler:
+            frame_profiler.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,169 @@
+"""A flock of boids for the village sky, stored and updated as NumPy arrays.
+
+Every step each bird steers by separation, alignment and cohesion with the
+birds around it. Neighbours come from a uniform spatial hash: birds are
+sorted by grid cell and each bird looks only at the cells around its own,
+at most MAX_PER_CELL birds from each, so a step costs O(n) instead of
+comparing every pair. Like starlings, a bird follows a handful of
+neighbours, not all of them.
+
+Positions and velocities are in base units; x wraps around a sky wider
+than the window, y is kept in the band the scripted birds fly in. A flock
+is deterministic for its seed, so any frame can be reproduced by stepping
+up to it, from the start or from a checkpoint (replay.py).
+"""
+
+import numpy as np
+
+import geometry
+from geometry import set_pensize_scaled, stamp_polyline
+from replay import Replay
+
+SKY_X = (-500.0, 500.0)        # x wraps at the ends
+SKY_Y = (130.0, 240.0)         # soft bounds, birds turn back inside
+NEIGHBOR_RADIUS = 20.0         # base units; also the grid cell size
+SEPARATION_RADIUS = 14.0
+MAX_PER_CELL = 6               # neighbours considered per surrounding cell
+MIN_SPEED, MAX_SPEED = 0.4, 1.2  # base units per step
+
+COHESION = 0.002
+ALIGNMENT = 0.05
+SEPARATION = 0.5
+TURN = 0.05                    # steering back into the sky band
+
+WING_SPAN = 8   # base units from body to wing tip
+WING_DROP = 3   # how far the tips are above/below the body
+FLAP_FRAMES = 5  # frames per wing pose, as the scripted birds
+
+
+class Flock(Replay):
+    def __init__(self, count, seed=0):
+        super().__init__()
+        self.count = count
+        self.seed = seed
+        self.reset()
+
+    def reset(self):
+        rng = np.random.default_rng(self.seed)
+        n = self.count
+        self.pos = np.column_stack([rng.uniform(*SKY_X, n),
+                                    rng.uniform(*SKY_Y, n)])
+        angle = rng.uniform(-0.5, 0.5, n)
+        speed = rng.uniform(MIN_SPEED, MAX_SPEED, n)
+        self.vel = np.column_stack([np.cos(angle), np.sin(angle)]) * speed[:, None]
+        self.phase = rng.integers(0, 2 * FLAP_FRAMES, n)
+        self.frame = 0
+        self.pairs = 0  # neighbour pairs found by the last step
+
+    def advance_to(self, frame):
+        """Step forward (or back, from a checkpoint) until `frame`."""
+        self.replay_to(frame, lambda n: self.step())
+
+    def snapshot(self):
+        return self.frame, self.pairs, self.pos.copy(), self.vel.copy()
+
+    def restore(self, snapshot):
+        self.frame, self.pairs, pos, vel = snapshot
+        self.pos[:] = pos
+        self.vel[:] = vel
+
+    # neighbours
+
+    def neighbor_pairs(self):
+        """(i, j, dx, dy) for every bird j near bird i, offsets wrapped."""
+        x, y = self.pos[:, 0], self.pos[:, 1]
+        n = len(x)
+        width = SKY_X[1] - SKY_X[0]
+        columns = int(np.ceil(width / NEIGHBOR_RADIUS))
+        cx = np.floor((x - SKY_X[0]) / NEIGHBOR_RADIUS).astype(np.intp) % columns
+        cy = np.floor(y / NEIGHBOR_RADIUS).astype(np.intp)
+        # a blank row above and below, so cy +- 1 never leaves the table
+        cy -= cy.min() - 1
+        rows = int(cy.max()) + 2
+        cell = cx * rows + cy
+        order = np.argsort(cell, kind="stable")
+        # work in cell order: the birds of cell k are first[k]:first[k + 1]
+        cx, cy, x, y = cx[order], cy[order], x[order], y[order]
+        first = np.searchsorted(cell[order], np.arange(columns * rows + 1))
+
+        all_i, all_j = [], []
+        birds = np.arange(n)
+        for ox in (-1, 0, 1):
+            column = ((cx + ox) % columns) * rows
+            for oy in (-1, 0, 1):
+                near = column + cy + oy
+                lo = first[near]
+                counts = np.minimum(first[near + 1] - lo, MAX_PER_CELL)
+                total = int(counts.sum())
+                if not total:
+                    continue
+                ends = np.cumsum(counts)
+                within = np.arange(total) - np.repeat(ends - counts, counts)
+                all_i.append(np.repeat(birds, counts))
+                all_j.append(np.repeat(lo, counts) + within)
+        i = np.concatenate(all_i)
+        j = np.concatenate(all_j)
+
+        dx = x[j] - x[i]
+        # the shorter way round the wrapped sky
+        dx -= width * (dx > width / 2)
+        dx += width * (dx < -width / 2)
+        dy = y[j] - y[i]
+        keep = np.flatnonzero((dx * dx + dy * dy < NEIGHBOR_RADIUS ** 2)
+                              & (i != j))
+        return order[i[keep]], order[j[keep]], dx[keep], dy[keep]
+
+    # simulation
+
+    def step(self):
+        n = self.count
+        pos, vel = self.pos, self.vel
+        i, j, dx, dy = self.neighbor_pairs()
+        self.pairs = len(i)
+
+        counts = np.bincount(i, minlength=n)
+        has = counts > 0
+        inv = np.where(has, 1.0 / np.maximum(counts, 1), 0.0)
+        steer = np.zeros_like(vel)
+
+        # cohesion: towards the neighbours' centre
+        steer[:, 0] += COHESION * np.bincount(i, dx, n) * inv
+        steer[:, 1] += COHESION * np.bincount(i, dy, n) * inv
+        # alignment: towards the neighbours' mean velocity
+        for axis in (0, 1):
+            mean = np.bincount(i, vel[j, axis], n) * inv
+            steer[:, axis] += ALIGNMENT * np.where(has, mean - vel[:, axis], 0.0)
+        # separation: away from anyone too close, harder the closer
+        d2 = dx * dx + dy * dy
+        close = d2 < SEPARATION_RADIUS ** 2
+        push = np.where(close, 1.0 / np.maximum(d2, 1e-6), 0.0)
+        steer[:, 0] -= SEPARATION * np.bincount(i, dx * push, n)
+        steer[:, 1] -= SEPARATION * np.bincount(i, dy * push, n)
+        # stay in the sky band
+        steer[:, 1] += TURN * ((pos[:, 1] < SKY_Y[0]).astype(float)
+                               - (pos[:, 1] > SKY_Y[1]))
+
+        vel += steer
+        speed = np.hypot(vel[:, 0], vel[:, 1])
+        vel *= (np.clip(speed, MIN_SPEED, MAX_SPEED)
+                / np.maximum(speed, 1e-9))[:, None]
+        pos += vel
+        pos[:, 0] = (pos[:, 0] - SKY_X[0]) % (SKY_X[1] - SKY_X[0]) + SKY_X[0]
+        self.frame += 1
+
+    # drawing
+
+    def draw(self, t, frame, stride=1):
+        """Every bird (or every stride-th) as a V of wings: one polyline per
+        wing pose, stamped at the position of each bird in that pose."""
+        scale = geometry.SCALE
+        x = self.pos[::stride, 0] * scale
+        y = self.pos[::stride, 1] * scale
+        span = WING_SPAN * scale
+        up = ((frame + self.phase[::stride]) // FLAP_FRAMES) % 2 == 0
+        t.color(0.2, 0.2, 0.2)
+        set_pensize_scaled(t, 2)
+        for pose, drop in ((up, -WING_DROP), (~up, WING_DROP)):
+            tip = drop * scale
+            stamp_polyline(t, [-span, 0, span], [tip, 0, tip], x[pose], y[pose])
+        set_pensize_scaled(t, 1)
@@ -0,0 +1,548 @@
+"""Scaling, primitives and shape batching for the village scene.
+
+Everything here works on any pen with the turtle API and uses nothing but
+the standard library, so it can be imported without opening a window.
+"""
+
+import math
+import os
+
+
+# WINDOW & SCALING
+
+BASE_W, BASE_H = 900, 500
+REFERENCE_W = 1920  # the width the motion speeds were tuned at
+
+# the starting size; afterwards resize() follows the window
+TARGET_W = int(os.environ.get("VILLAGE_WIDTH", REFERENCE_W))
+TARGET_H = int(os.environ.get("VILLAGE_HEIGHT", int(TARGET_W * BASE_H / BASE_W)))
+
+
+def fit_scale(width, height):
+    """Largest scale at which the base scene fits a width x height window.
+
+    A height derived from the width is truncated to whole pixels, so up to
+    one pixel of overhang still counts as fitting.
+    """
+    return min(width / BASE_W, (height + 1) / BASE_H)
+
+
+SCALE = fit_scale(TARGET_W, TARGET_H)
+# motion is in base units per step, so the scene moves at the same pace at
+# any size; this keeps the speeds that were tuned at REFERENCE_W
+SPEED_FACTOR = BASE_W / REFERENCE_W
+
+
+def resize(width, height):
+    """Draw at width x height from now on.
+
+    Everything cached in pixels (ellipse offsets, display lists, keyframes)
+    is keyed on SCALE, so going back to an earlier size reuses its entries
+    and a new size builds them lazily on first use.
+    """
+    global TARGET_W, TARGET_H, SCALE
+    TARGET_W = width
+    TARGET_H = height
+    SCALE = fit_scale(width, height)
+
+
+
+# SCALE HELPER
+
+def sx(x):
+    return x * SCALE
+
+
+def sy(y):
+    return y * SCALE
+
+
+def spt(p):
+    return (sx(p[0]), sy(p[1]))
+
+
+def set_pensize_scaled(t, size):
+    # keep a minimum of 1 so lines remain visible
+    t.pensize(max(1, int(round(size * SCALE))))
+
+
+
+# ellipse geometry cache
+
+# Largest gap (in screen pixels) allowed between the true curve and the
+# straight chord that approximates it; decides how many segments we need.
+ELLIPSE_TOLERANCE_PX = 0.5
+MIN_ELLIPSE_SEGMENTS = 8
+MAX_ELLIPSE_SEGMENTS = 360
+
+# detail level of the shapes drawn every frame (quality.py sets it and the
+# knobs above); caches of recorded shapes are keyed on it
+QUALITY = 3
+
+_unit_circles = {}     # segments -> [(cos, sin), ...] closed loop
+_ellipse_offsets = {}  # (rx, ry, SCALE, tolerance) -> [(dx, dy), ...] in pixels
+
+
+def ellipse_segments(rx_s, ry_s):
+    """Segment count for an ellipse whose on-screen radii are rx_s, ry_s."""
+    r = max(rx_s, ry_s)
+    if r <= ELLIPSE_TOLERANCE_PX:
+        return MIN_ELLIPSE_SEGMENTS
+    n = math.ceil(math.pi / math.acos(1 - ELLIPSE_TOLERANCE_PX / r))
+    return max(MIN_ELLIPSE_SEGMENTS, min(MAX_ELLIPSE_SEGMENTS, n))
+
+
+def unit_circle(segments):
+    """Shared cos/sin table for a closed loop of `segments` chords."""
+    table = _unit_circles.get(segments)
+    if table is None:
+        step = 2 * math.pi / segments
+        table = [(math.cos(i * step), math.sin(i * step))
+                 for i in range(segments)]
+        table.append(table[0])
+        _unit_circles[segments] = table
+    return table
+
+
+def ellipse_offsets(rx, ry):
+    """Pixel offsets from the centre for an ellipse with BASE radii rx, ry."""
+    key = (rx, ry, SCALE, ELLIPSE_TOLERANCE_PX)
+    offsets = _ellipse_offsets.get(key)
+    if offsets is None:
+        rx_s = rx * SCALE
+        ry_s = ry * SCALE
+        offsets = [(rx_s * c, ry_s * s)
+                   for c, s in unit_circle(ellipse_segments(rx_s, ry_s))]
+        _ellipse_offsets[key] = offsets
+    return offsets
+
+
+
+# Helper func
+
+def draw_polygon(t, points):
+    """Draw a filled polygon from list of BASE points; render scaled."""
+    pts = [spt(p) for p in points]
+    t.penup()
+    t.goto(pts[0])
+    t.pendown()
+    t.begin_fill()
+    for p in pts[1:]:
+        t.goto(p)
+    t.goto(pts[0])
+    t.end_fill()
+
+
+def draw_circle_with_turtle(t, rx, ry, cx, cy):
+    """Draw an ellipse/circle (BASE units); render scaled."""
+    cx_s = sx(cx)
+    cy_s = sy(cy)
+    offsets = ellipse_offsets(rx, ry)
+
+    t.penup()
+    t.goto(offsets[0][0] + cx_s, offsets[0][1] + cy_s)
+    t.pendown()
+    t.begin_fill()
+    for ox, oy in offsets[1:]:
+        t.goto(ox + cx_s, oy + cy_s)
+    t.end_fill()
+
+
+def midpoint_circle_algorithm(t, radius, cx, cy):
+    """Draw a filled circle using Midpoint Circle Algorithm (scaled)."""
+    # Scale radius to pixel-ish units
+    r = max(1, int(round(radius * SCALE)))
+    cx_s = sx(cx)
+    cy_s = sy(cy)
+
+    x = 0
+    y = r
+    d = 1 - r
+
+    octant_points = []
+    while x <= y:
+        octant_points.append((x, y))
+        if d < 0:
+            d = d + 2 * x + 3
+        else:
+            d = d + 2 * (x - y) + 5
+            y -= 1
+        x += 1
+
+    circle_points = set()
+    for px, py in octant_points:
+        circle_points.add((cx_s + px, cy_s + py))
+        circle_points.add((cx_s - px, cy_s + py))
+        circle_points.add((cx_s + px, cy_s - py))
+        circle_points.add((cx_s - px, cy_s - py))
+        circle_points.add((cx_s + py, cy_s + px))
+        circle_points.add((cx_s - py, cy_s + px))
+        circle_points.add((cx_s + py, cy_s - px))
+        circle_points.add((cx_s - py, cy_s - px))
+
+    sorted_points = sorted(
+        circle_points,
+        key=lambda p: math.atan2(p[1] - cy_s, p[0] - cx_s)
+    )
+
+    if sorted_points:
+        t.penup()
+        t.goto(sorted_points[0])
+        t.pendown()
+        t.begin_fill()
+        for p in sorted_points:
+            t.goto(p)
+        t.goto(sorted_points[0])
+        t.end_fill()
+
+
+def dda_line(t, x1, y1, x2, y2):
+    """Draw a line using DDA algorithm (BASE units); render scaled."""
+    # scale endpoints
+    x1, y1 = sx(x1), sy(y1)
+    x2, y2 = sx(x2), sy(y2)
+
+    dx = x2 - x1
+    dy = y2 - y1
+    steps = int(max(abs(dx), abs(dy)))
+    if steps == 0:
+        return
+
+    x_inc = dx / steps
+    y_inc = dy / steps
+
+    x = x1
+    y = y1
+    t.penup()
+    t.goto(x, y)
+    t.pendown()
+
+    for _ in range(steps + 1):
+        t.goto(x, y)
+        x += x_inc
+        y += y_inc
+
+
+def draw_polylines(t, xs, ys):
+    """Stroke many open polylines (PIXEL coordinates, one per row of xs/ys).
+
+    Pens with a polylines() method take the whole batch in one call;
+    turtle gets one penup/goto run per row.
+    """
+    if hasattr(t, "polylines"):
+        t.polylines(xs, ys)
+        return
+    for row_x, row_y in zip(xs, ys):
+        t.penup()
+        t.goto(float(row_x[0]), float(row_y[0]))
+        t.pendown()
+        for x, y in zip(row_x[1:], row_y[1:]):
+            t.goto(float(x), float(y))
+    t.penup()
+
+
+def stamp_polyline(t, px, py, xs, ys):
+    """Stroke the polyline (px, py) at every position (xs[i], ys[i]).
+
+    All in PIXELS; xs and ys are NumPy arrays. The raster pen rasterizes
+    the shape once and stamps it; other pens get one polyline per position.
+    """
+    if hasattr(t, "stamp_polyline"):
+        t.stamp_polyline(px, py, xs, ys)
+    else:
+        draw_polylines(t, xs[:, None] + px, ys[:, None] + py)
+
+
+def stamp_shape(t, shape, xs, ys):
+    """Replay the display list `shape` moved by every (xs[i], ys[i]).
+
+    In PIXELS, like stamp_polyline. The raster pen renders the shape into
+    a sprite once and blits it; other pens replay it at each position.
+    """
+    if hasattr(t, "stamp_shape"):
+        t.stamp_shape(shape, xs, ys)
+    else:
+        for x, y in zip(xs.tolist(), ys.tolist()):
+            shape.replay(t, x, y)
+        t.penup()
+
+
+def draw_sun_rays(t, cx, cy, inner_radius, outer_radius, num_rays):
+    """Draw sun rays using DDA line drawing algorithm."""
+    t.color(255/255, 215/255, 0)
+    set_pensize_scaled(t, 2)
+
+    for i in range(num_rays):
+        angle = (360 / num_rays) * i
+        rad = math.radians(angle)
+
+        x1 = cx + inner_radius * math.cos(rad)
+        y1 = cy + inner_radius * math.sin(rad)
+        x2 = cx + outer_radius * math.cos(rad)
+        y2 = cy + outer_radius * math.sin(rad)
+
+        dda_line(t, x1, y1, x2, y2)
+
+    set_pensize_scaled(t, 1)
+
+
+
+# colours
+
+_tk_colors = {}
+
+
+def tk_color(args):
+    """Turtle-style color() arguments -> Tk color string (colormode 1.0)."""
+    color = _tk_colors.get(args)
+    if color is None:
+        value = args[0] if len(args) == 1 else args
+        if isinstance(value, str):
+            color = value
+        else:
+            color = "#%02x%02x%02x" % tuple(round(255 * c) for c in value)
+        _tk_colors[args] = color
+    return color
+
+
+
+# shape recording
+
+class ShapeRecorder:
+    """Turtle stand-in that keeps the filled parts a draw_* call emits
+    (input for batch_parts)."""
+
+    def __init__(self):
+        self.parts = []  # (color args, [(x, y), ...] in pixels)
+        self._color = ()
+        self._pos = (0, 0)
+        self._fill = None
+
+    def color(self, *args):
+        self._color = args
+
+    def penup(self):
+        pass
+
+    def pendown(self):
+        pass
+
+    def goto(self, x, y=None):
+        if y is None:
+            x, y = x
+        self._pos = (x, y)
+        if self._fill is not None:
+            self._fill.append(self._pos)
+
+    def begin_fill(self):
+        self._fill = [self._pos]
+
+    def end_fill(self):
+        if len(self._fill) > 2:
+            self.parts.append((self._color, self._fill))
+        self._fill = None
+
+
+def compile_shape(draw_fn, *args):
+    """Run a draw_* function once and return its filled parts."""
+    recorder = ShapeRecorder()
+    draw_fn(recorder, *args)
+    return recorder.parts
+
+
+# draw-call batching
+#
+# A run of small polygons in a few recurring colours (the cow) is replayed
+# grouped by colour. Two polygons of different colours keep their relative
+# order only when their interiors overlap; everything else is free to move,
+# so what ends up on top never changes. Faces that merely share an edge may
+# swap order, which at most moves the 1 px seam between them. Inside a
+# batch, polygons sharing an edge are merged, and polygons that don't
+# overlap are emitted as extra loops of one fill.
+
+def _ring(points):
+    """Polygon vertices without repeats, counter-clockwise."""
+    ring = []
+    for p in points:
+        if not ring or p != ring[-1]:
+            ring.append(p)
+    if len(ring) > 1 and ring[0] == ring[-1]:
+        ring.pop()
+    if _area(ring) < 0:
+        ring.reverse()
+    return ring
+
+
+def _area(ring):
+    return sum(ax * by - bx * ay for (ax, ay), (bx, by)
+               in zip(ring, ring[1:] + ring[:1])) / 2
+
+
+def _bbox(ring):
+    xs = [p[0] for p in ring]
+    ys = [p[1] for p in ring]
+    return (min(xs), min(ys), max(xs), max(ys))
+
+
+def _boxes_overlap(a, b):
+    return a[0] < b[2] and b[0] < a[2] and a[1] < b[3] and b[1] < a[3]
+
+
+def _segments_cross(p, q, r, s):
+    def side(a, b, c):
+        v = (b[0] - a[0]) * (c[1] - a[1]) - (b[1] - a[1]) * (c[0] - a[0])
+        return (v > 0) - (v < 0)
+    return (side(p, q, r) * side(p, q, s) < 0
+            and side(r, s, p) * side(r, s, q) < 0)
+
+
+def _strictly_inside(p, ring):
+    """Point-in-polygon that counts points on the boundary as outside."""
+    inside = False
+    x, y = p
+    for (ax, ay), (bx, by) in zip(ring, ring[1:] + ring[:1]):
+        cross = (bx - ax) * (y - ay) - (by - ay) * (x - ax)
+        if (cross == 0 and min(ax, bx) <= x <= max(ax, bx)
+                and min(ay, by) <= y <= max(ay, by)):
+            return False
+        if (ay > y) != (by > y) and x < ax + (y - ay) * (bx - ax) / (by - ay):
+            inside = not inside
+    return inside
+
+
+def _rings_overlap(a, b):
+    """True when the interiors intersect; sharing edges or corners is not."""
+    if not _boxes_overlap(_bbox(a), _bbox(b)):
+        return False
+    for p, q in zip(a, a[1:] + a[:1]):
+        for r, s in zip(b, b[1:] + b[:1]):
+            if _segments_cross(p, q, r, s):
+                return True
+    for ring, other in ((a, b), (b, a)):
+        cx = sum(p[0] for p in ring) / len(ring)
+        cy = sum(p[1] for p in ring) / len(ring)
+        if any(_strictly_inside(p, other) for p in ring + [(cx, cy)]):
+            return True
+    return False
+
+
+def _is_simple(ring):
+    if len(set(ring)) != len(ring):
+        return False
+    edges = list(zip(ring, ring[1:] + ring[:1]))
+    for i, (p, q) in enumerate(edges):
+        for r, s in edges[i + 2:]:
+            if s != p and _segments_cross(p, q, r, s):
+                return False
+    return True
+
+
+def _merge_pair(a, b):
+    """Union of two rings sharing an edge, or None if it isn't a clean one."""
+    b_edges = {(b[j], b[(j + 1) % len(b)]): j for j in range(len(b))}
+    for i in range(len(a)):
+        u, v = a[i], a[(i + 1) % len(a)]
+        j = b_edges.get((v, u))
+        if j is None:
+            continue
+        # walk a from v round to u, then b from just after u to just before v
+        merged = a[i + 1:] + a[:i + 1] + (b[j + 2:] + b[:j])[:len(b) - 2]
+        merged = _ring(merged)
+        if (len(merged) >= 3 and _is_simple(merged)
+                and abs(_area(merged) - _area(a) - _area(b)) < 1e-6):
+            return merged
+    return None
+
+
+def merge_rings(rings):
+    rings = list(rings)
+    merged_any = True
+    while merged_any:
+        merged_any = False
+        for i in range(len(rings)):
+            for j in range(i + 1, len(rings)):
+                merged = _merge_pair(rings[i], rings[j])
+                if merged is not None:
+                    rings[i] = merged
+                    del rings[j]
+                    merged_any = True
+                    break
+            if merged_any:
+                break
+    return rings
+
+
+def batch_parts(parts):
+    """Recorded (color, points) parts -> [(color, [fill, ...])], fill = [ring]."""
+    rings = [_ring(points) for color, points in parts]
+    keys = [tk_color(color) for color, points in parts]
+
+    # part j has to wait for every earlier overlapping part of another colour
+    waits_for = [0] * len(parts)
+    unblocks = [[] for _ in parts]
+    for j in range(len(parts)):
+        for i in range(j):
+            if keys[i] != keys[j] and _rings_overlap(rings[i], rings[j]):
+                waits_for[j] += 1
+                unblocks[i].append(j)
+
+    # emit the colour with the most parts ready, and keep going with it
+    # while drawing those parts frees up more of the same colour
+    ready = [i for i in range(len(parts)) if waits_for[i] == 0]
+    batches = []  # [key, color args, rings]
+    while ready:
+        counts = {}
+        for i in ready:
+            counts[keys[i]] = counts.get(keys[i], 0) + 1
+        key = max(counts, key=lambda k: (counts[k], -min(i for i in ready if keys[i] == k)))
+        batch = [key, parts[next(i for i in ready if keys[i] == key)][0], []]
+        batches.append(batch)
+        while True:
+            now = sorted(i for i in ready if keys[i] == key)
+            if not now:
+                break
+            ready = [i for i in ready if keys[i] != key]
+            for i in now:
+                batch[2].append(rings[i])
+                for j in unblocks[i]:
+                    waits_for[j] -= 1
+                    if waits_for[j] == 0:
+                        ready.append(j)
+
+    result = []
+    for key, color, rings in batches:
+        fills = []  # rings sharing a fill must not overlap each other
+        for ring in merge_rings(rings):
+            for fill_rings in fills:
+                if not any(_rings_overlap(ring, other) for other in fill_rings):
+                    fill_rings.append(ring)
+                    break
+            else:
+                fills.append([ring])
+        result.append((color, fills))
+    return result
+
+
+def draw_batches(t, batches):
+    """One color() per batch, one fill per group of non-overlapping rings.
+
+    The pen is lifted between rings and returns to the first vertex after
+    each one, so the joins add no area and no visible outline.
+    """
+    for color, fills in batches:
+        t.color(*color)
+        for rings in fills:
+            anchor = rings[0][0]
+            t.penup()
+            t.goto(anchor)
+            t.begin_fill()
+            for ring in rings:
+                t.penup()
+                t.goto(ring[0])
+                t.pendown()
+                for p in ring[1:]:
+                    t.goto(p)
+                t.goto(ring[0])
+                t.penup()
+                t.goto(anchor)
+            t.end_fill()
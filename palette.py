@@ -0,0 +1,152 @@
+"""Time of day as a palette: the colour of everything at every hour.
+
+Each colour the scene is drawn in is an entry of the palette, known by
+its daylight value. The day is cut into DAY_STEPS steps, and an entry's
+colour at each of them is worked out once, when the entry is first seen,
+into a lookup table: the daylight colour lit by the light of that hour,
+from a few keyframes of the sky, the light and the sun. The sun and the
+river (named in scene.py) follow curves of their own.
+
+A display that keeps its items (the Tk canvas) files each item under the
+entries it is drawn in. When the time of day reaches the next step, every
+entry whose colour changed is re-tinted at once, so the cost of a change
+goes with the number of entries, not of items or vertices.
+"""
+
+from scene import RIVER_COLOR, SKY_COLOR, SUN_COLOR
+
+DAY_STEPS = 240  # palette steps per day
+
+# (time of day, sky, light on the scene, sun colour, how far the sun has
+# sunk in base units). Time 0 is the scene as drawn, at noon; after the
+# last keyframe the day goes back round to the first.
+NIGHT_SKY = (0.04, 0.06, 0.2)
+MOONLIGHT = (0.25, 0.28, 0.5)
+KEYFRAMES = [
+    (0.00, SKY_COLOR, (1, 1, 1), SUN_COLOR, 0),
+    (0.30, SKY_COLOR, (1, 1, 1), SUN_COLOR, 0),
+    (0.40, (0.98, 0.6, 0.4), (1, 0.78, 0.62), (1, 0.5, 0.1), 110),
+    (0.48, NIGHT_SKY, MOONLIGHT, (0.85, 0.25, 0.05), 220),
+    (0.82, NIGHT_SKY, MOONLIGHT, (0.85, 0.25, 0.05), 220),
+    (0.92, (0.95, 0.72, 0.6), (0.95, 0.82, 0.78), (1, 0.6, 0.2), 90),
+]
+WATER_SKY = 0.4  # share of the sky the river mirrors once it is dark
+
+COLOR_OPTIONS = ("fill", "outline")  # canvas item options holding a colour
+
+
+def hex_color(rgb):
+    return "#%02x%02x%02x" % tuple(round(255 * min(1, max(0, c))) for c in rgb)
+
+
+SUN = hex_color(SUN_COLOR)
+RIVER = hex_color(RIVER_COLOR)
+
+
+def parse_color(color):
+    """"#rrggbb" -> (r, g, b) in 0..1, or None for any other colour."""
+    if len(color) != 7 or not color.startswith("#"):
+        return None
+    return tuple(int(color[i:i + 2], 16) / 255 for i in (1, 3, 5))
+
+
+def _lerp(a, b, f):
+    if isinstance(a, tuple):
+        return tuple(x + (y - x) * f for x, y in zip(a, b))
+    return a + (b - a) * f
+
+
+def keyframe_at(time):
+    """(sky, light, sun colour, sun drop) at `time` of day, in days."""
+    time %= 1
+    following = KEYFRAMES[1:] + [(1 + KEYFRAMES[0][0],) + KEYFRAMES[0][1:]]
+    for (t0, *a), (t1, *b) in zip(KEYFRAMES, following):
+        if t0 <= time < t1:
+            f = (time - t0) / (t1 - t0)
+            return tuple(_lerp(x, y, f) for x, y in zip(a, b))
+    return tuple(KEYFRAMES[0][1:])
+
+
+class DayCycle:
+    """The palette's lookup table and where in the day it is.
+
+    Items are filed under canvas tags, one per item option and daylight
+    colour; tags() names them and tinted() gives the options to draw with
+    at the current step.
+    """
+
+    def __init__(self, steps=DAY_STEPS):
+        self.steps = steps
+        self.keys = [keyframe_at(i / steps) for i in range(steps)]
+        self.step = 0
+        self.rows = {}     # daylight colour -> its colour at every step
+        self.entries = {}  # tag -> (item option, daylight colour)
+        self.sun_tag = self.tag("fill", SUN)
+        self.retinted = 0  # entries re-tinted so far
+
+    def row(self, color):
+        """The lookup table row of daylight colour `color` (a Tk colour)."""
+        row = self.rows.get(color)
+        if row is None:
+            rgb = parse_color(color)
+            if rgb is None:
+                row = [color] * self.steps
+            elif color == SUN:
+                row = [hex_color(sun) for sky, light, sun, drop in self.keys]
+            else:
+                row = []
+                for sky, light, sun, drop in self.keys:
+                    lit = tuple(c * l for c, l in zip(rgb, light))
+                    if color == RIVER:
+                        lit = _lerp(lit, sky, WATER_SKY * (1 - sum(light) / 3))
+                    row.append(hex_color(lit))
+            self.rows[color] = row
+        return row
+
+    @staticmethod
+    def tag(option, color):
+        return "palette_%s_%s" % (option, color.lstrip("#"))
+
+    def tags(self, options):
+        """The palette tags of a canvas item drawn with `options`."""
+        tags = ()
+        for option in COLOR_OPTIONS:
+            color = options.get(option)
+            if color:
+                tag = self.tag(option, color)
+                if tag not in self.entries:
+                    self.entries[tag] = (option, color)
+                    self.row(color)
+                tags += (tag,)
+        return tags
+
+    def tinted(self, options):
+        """`options` with each colour as it looks at the current step."""
+        tinted = dict(options)
+        for option in COLOR_OPTIONS:
+            color = options.get(option)
+            if color:
+                tinted[option] = self.row(color)[self.step]
+        return tinted
+
+    def set_time(self, time):
+        """Go to `time` of day, in days. Returns (tag, option, colour) for
+        every entry whose colour changed, or None if the step did not."""
+        step = int(time % 1 * self.steps) % self.steps
+        if step == self.step:
+            return None
+        old, self.step = self.step, step
+        changes = []
+        for tag, (option, color) in self.entries.items():
+            row = self.rows[color]
+            if row[step] != row[old]:
+                changes.append((tag, option, row[step]))
+        self.retinted += len(changes)
+        return changes
+
+    def sky(self):
+        return hex_color(self.keys[self.step][0])
+
+    def sun_drop(self):
+        """How far the sun has sunk below its noon place, in base units."""
+        return self.keys[self.step][3]
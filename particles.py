@@ -0,0 +1,211 @@
+"""Rain, snow and chimney smoke as pooled, array-backed particles.
+
+A Particles pool holds a fixed number of slots as parallel NumPy arrays
+(position, velocity, age and life, colour index) allocated once. Free
+slots sit on a stack: spawning pops indices off it and a particle that
+dies pushes its index back, so no Python object exists per particle and
+the live count can never pass the capacity; emission beyond it is
+dropped and counted. A step integrates every slot in place, live or not,
+which is cheaper than gathering the live ones.
+
+The wind is coupled in by pulling each particle's horizontal velocity
+towards a drift proportional to the scene's wind_offset. All positions
+are in base units. Like the flock, a pool is deterministic for its seed
+and can be replayed up to any frame, from a checkpoint (replay.py).
+"""
+
+from collections import namedtuple
+
+import numpy as np
+
+import geometry
+from geometry import stamp_polyline
+from replay import Replay
+
+# One kind of particle. origin is "sky" (spawned above the window) or
+# "sources" (at the points passed to step()); rate is new particles per
+# step, per source; life is a (min, max) in steps. With fade a particle
+# moves through its colors as it ages, otherwise it keeps one picked at
+# random. sizes is the pen width (base units) for each colour.
+Effect = namedtuple("Effect", "origin capacity rate life velocity spread drag "
+                              "lift wind streak fade colors sizes")
+
+EFFECTS = {
+    "rain": Effect(origin="sky", capacity=20000, rate=150, life=(40, 56),
+                   velocity=(0, -9), spread=(0.3, 1.0), drag=0.2, lift=0,
+                   wind=0.8, streak=1.2, fade=False,
+                   colors=[(0.55, 0.65, 0.85), (0.45, 0.55, 0.8)],
+                   sizes=[1, 1]),
+    "snow": Effect(origin="sky", capacity=30000, rate=40, life=(400, 500),
+                   velocity=(0, -1.1), spread=(0.4, 0.3), drag=0.05, lift=0,
+                   wind=1.2, streak=0, fade=False,
+                   colors=[(1, 1, 1), (0.92, 0.95, 1)],
+                   sizes=[2, 3]),
+    "smoke": Effect(origin="sources", capacity=4000, rate=1, life=(90, 140),
+                    velocity=(0.1, 0.6), spread=(0.15, 0.1), drag=0.03,
+                    lift=0.004, wind=0.6, streak=0, fade=True,
+                    colors=[(0.45, 0.45, 0.45), (0.6, 0.6, 0.6),
+                            (0.75, 0.77, 0.78), (0.88, 0.9, 0.9)],
+                    sizes=[4, 6, 8, 10]),
+}
+
+# rain and snow start above the window, across a little more than its width
+SKY_SPAWN = (-550, 550, 255, 265)
+WIND_DRIFT = 0.5  # base units per step of drift per unit of wind_offset
+
+
+# the arrays a step changes, kept by a checkpoint
+STATE = ("x", "y", "vx", "vy", "age", "life", "color", "alive", "free")
+
+
+class Particles(Replay):
+    def __init__(self, effect, capacity=None, seed=0):
+        super().__init__()
+        self.effect = EFFECTS[effect] if isinstance(effect, str) else effect
+        self.capacity = capacity or self.effect.capacity
+        self.seed = seed
+        n = self.capacity
+        self.x = np.zeros(n)
+        self.y = np.zeros(n)
+        self.vx = np.zeros(n)
+        self.vy = np.zeros(n)
+        self.age = np.zeros(n, dtype=np.int32)
+        self.life = np.zeros(n, dtype=np.int32)
+        self.color = np.zeros(n, dtype=np.uint8)
+        self.alive = np.zeros(n, dtype=bool)
+        self.free = np.empty(n, dtype=np.intp)  # stack of free slots
+        self._done = np.empty(n, dtype=bool)
+        self.reset()
+
+    def reset(self):
+        self.rng = np.random.default_rng(self.seed)
+        self.alive[:] = False
+        self.free[:] = np.arange(self.capacity)[::-1]
+        self.free_count = self.capacity
+        self.frame = 0
+        self.spawned = self.dropped = 0
+
+    @property
+    def live(self):
+        return self.capacity - self.free_count
+
+    def spawn(self, count, x0, x1, y0, y1):
+        """Up to `count` new particles, placed at random in the box."""
+        take = min(count, self.free_count)
+        self.dropped += count - take
+        if not take:
+            return
+        top = self.free_count
+        slots = self.free[top - take:top]
+        self.free_count = top - take
+        self.spawned += take
+
+        e = self.effect
+        rng = self.rng
+        self.x[slots] = rng.uniform(x0, x1, take)
+        self.y[slots] = rng.uniform(y0, y1, take)
+        self.vx[slots] = e.velocity[0] + rng.uniform(-1, 1, take) * e.spread[0]
+        self.vy[slots] = e.velocity[1] + rng.uniform(-1, 1, take) * e.spread[1]
+        self.age[slots] = 0
+        self.life[slots] = rng.integers(e.life[0], e.life[1], take,
+                                        endpoint=True)
+        self.color[slots] = (0 if e.fade else
+                             rng.integers(0, len(e.colors), take))
+        self.alive[slots] = True
+
+    def emit(self, sources=()):
+        """This step's new particles, from the sky or from each (x, y) in
+        `sources`."""
+        e = self.effect
+        if e.origin == "sources":
+            for x, y in sources:
+                self.spawn(self._count(e.rate), x - 2, x + 2, y, y + 2)
+        else:
+            self.spawn(self._count(e.rate), *SKY_SPAWN)
+
+    def _count(self, rate):
+        whole = int(rate)
+        return whole + (self.rng.random() < rate - whole)
+
+    def step(self, wind=0.0, sources=()):
+        """Emit, move every particle one step and free the expired ones."""
+        self.emit(sources)
+        e = self.effect
+        # relax the horizontal velocity towards the wind
+        self.vx *= 1 - e.drag
+        self.vx += e.drag * e.wind * WIND_DRIFT * wind
+        if e.lift:
+            self.vy += e.lift  # buoyancy
+        self.x += self.vx
+        self.y += self.vy
+        self.age += 1
+
+        done = np.greater_equal(self.age, self.life, out=self._done)
+        done &= self.alive
+        dead = np.flatnonzero(done)
+        if len(dead):
+            self.alive[dead] = False
+            top = self.free_count
+            self.free[top:top + len(dead)] = dead
+            self.free_count = top + len(dead)
+        if e.fade:
+            shades = len(e.colors)
+            np.minimum(self.age * shades // self.life.clip(1), shades - 1,
+                       out=self.color, casting="unsafe")
+        self.frame += 1
+
+    def advance_to(self, frame, wind_at, sources_at=lambda frame: ()):
+        """Step forward (or back, from a checkpoint) until `frame`.
+
+        wind_at(n) and sources_at(n) give the wind and the smoke sources
+        of step n.
+        """
+        self.replay_to(frame, lambda n: self.step(wind_at(n), sources_at(n)))
+
+    def snapshot(self):
+        return ((self.frame, self.free_count, self.spawned, self.dropped,
+                 self.rng.bit_generator.state)
+                + tuple(getattr(self, name).copy() for name in STATE))
+
+    def restore(self, snapshot):
+        (self.frame, self.free_count, self.spawned, self.dropped,
+         self.rng.bit_generator.state) = snapshot[:5]
+        for name, saved in zip(STATE, snapshot[5:]):
+            getattr(self, name)[:] = saved
+
+    def draw(self, t, dx=0.0, stride=1):
+        """Every live particle (or every stride-th slot's), one batch per
+        shade, shifted by dx base units.
+
+        With a streak length the particles are drawn as streaks along their
+        mean velocity, otherwise as dots of the shade's size.
+        """
+        e = self.effect
+        scale = geometry.SCALE
+        alive = self.alive
+        if stride > 1:
+            alive = np.zeros_like(alive)
+            alive[::stride] = self.alive[::stride]
+        if e.streak:
+            live = np.flatnonzero(alive)
+            if not len(live):
+                return
+            # whole pixels, so the wind only ever makes a few streak shapes
+            vx = round(float(self.vx[live].mean()) * e.streak * scale)
+            vy = round(float(self.vy[live].mean()) * e.streak * scale)
+            shape = ([0, -vx], [0, -vy])
+        else:
+            shape = ([-0.25, 0.25], [0, 0])
+        for shade, color in enumerate(e.colors):
+            picked = np.flatnonzero(alive & (self.color == shade))
+            if not len(picked):
+                continue
+            t.color(*color)
+            t.pensize(max(1, int(round(e.sizes[shade] * scale))))
+            stamp_polyline(t, *shape, (self.x[picked] + dx) * scale,
+                           self.y[picked] * scale)
+        t.pensize(1)
+
+    def stats(self):
+        return {"live": self.live, "capacity": self.capacity,
+                "spawned": self.spawned, "dropped": self.dropped}
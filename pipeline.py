@@ -0,0 +1,97 @@
+"""Run one stage of the frame on a worker thread, a frame ahead.
+
+A Pipeline calls produce(job) on its own thread. exchange() hands it the
+next job and returns the result of the one before, so the caller works on
+frame N while the worker computes frame N+1. At most one job is in flight
+and one result waits to be taken: with the buffers each side holds that
+is a double buffer, and the caller is never more than one frame behind.
+An exception in produce() is raised again from the exchange() that would
+have returned its result.
+
+With nothing in flight, on the first exchange() and the first after a
+drain(), there is no earlier result to return, so that job is computed
+on the spot and its result returned; the next exchange() starts its own
+job and returns the same result again. No job is ever computed twice,
+and the caller shows one frame twice instead of waiting for two.
+"""
+
+import queue
+import threading
+import time
+
+
+class Pipeline:
+    def __init__(self, produce, name="pipeline"):
+        self.produce = produce
+        self._jobs = queue.Queue(maxsize=1)
+        self._results = queue.Queue(maxsize=1)
+        self._in_flight = False
+        self._last = None    # the result exchange() returned last
+        self._primed = False  # _last was computed on the spot, not taken
+        self.jobs = 0
+        self.wait = 0.0  # seconds exchange() spent waiting for the worker
+        self._thread = threading.Thread(target=self._run, name=name,
+                                        daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        while True:
+            job = self._jobs.get()
+            if job is None:
+                return
+            try:
+                self._results.put((self.produce(job), None))
+            except Exception as error:
+                self._results.put((None, error))
+
+    def submit(self, job):
+        assert not self._in_flight, "a job is already in flight"
+        self._in_flight = True
+        self.jobs += 1
+        self._jobs.put(job)
+
+    def take(self):
+        """The result of the job in flight, waiting for it if need be."""
+        start = time.perf_counter()
+        result, error = self._results.get()
+        self.wait += time.perf_counter() - start
+        self._in_flight = False
+        if error is not None:
+            raise error
+        return result
+
+    def exchange(self, job):
+        """Start on `job` and return the previous job's result.
+
+        With nothing in flight the job is computed first and its result
+        returned, and nothing is started; the next call starts its job
+        and returns that result again.
+        """
+        if self._in_flight:
+            self._last = self.take()
+        elif not self._primed:
+            self.submit(job)
+            self._last = self.take()
+            self._primed = True
+            return self._last
+        self.submit(job)
+        return self._last
+
+    def drain(self):
+        """Wait for the job in flight, if any, and drop its result and the
+        last one returned; the next exchange() computes its job first."""
+        if self._in_flight:
+            try:
+                self.take()
+            except Exception:
+                pass
+        self._last = None
+        self._primed = False
+
+    def close(self):
+        self.drain()
+        self._jobs.put(None)
+        self._thread.join()
+
+    def stats(self):
+        return {"jobs": self.jobs, "wait": self.wait}
@@ -0,0 +1,112 @@
+"""Per-layer frame timing for the village animation.
+
+The scene calls begin() at the start of a frame, mark(name) after each
+layer and end() once the frame is on screen. The profiler keeps a rolling
+window of frame times for FPS and percentiles and can stream every frame to
+a CSV (".csv") or JSON-lines (anything else) log for offline analysis.
+"""
+
+import csv
+import json
+import math
+import time
+from collections import deque
+
+
+def percentile(sorted_values, q):
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    rank = max(0, math.ceil(q / 100.0 * len(sorted_values)) - 1)
+    return sorted_values[min(rank, len(sorted_values) - 1)]
+
+
+class FrameProfiler:
+    def __init__(self, sections, window=120, log_path=None):
+        self.sections = list(sections)
+        self.frame = 0
+        self.frame_ms = deque(maxlen=window)
+        self.starts = deque(maxlen=window)
+        self.layer_ms = {name: deque(maxlen=window) for name in self.sections}
+        self.items = None  # canvas items on screen, where there is a canvas
+        self._current = {}
+        self._start = self._last = 0.0
+
+        self._log = None
+        self._writer = None
+        if log_path:
+            self._log = open(log_path, "w", newline="")
+            if log_path.endswith(".csv"):
+                self._writer = csv.writer(self._log)
+                self._writer.writerow(["frame", "time", "frame_ms", "items"]
+                                      + [s + "_ms" for s in self.sections])
+
+    def begin(self):
+        self._start = self._last = time.perf_counter()
+        self.starts.append(self._start)
+        self._current = {}
+
+    def mark(self, section):
+        """Charge the time since the previous mark to `section`."""
+        now = time.perf_counter()
+        self._current[section] = self._current.get(section, 0.0) + now - self._last
+        self._last = now
+
+    def end(self, items=None):
+        """Close the frame; `items` is how many canvas items it left on
+        screen, or None on a backend without canvas items."""
+        total = 1000 * (time.perf_counter() - self._start)
+        self.frame_ms.append(total)
+        self.items = items
+        for name in self.sections:
+            self.layer_ms[name].append(1000 * self._current.get(name, 0.0))
+        if self._log is not None:
+            self._write_row(total, items)
+        self.frame += 1
+
+    def fps(self):
+        """Frames started per second over the window, idle time included."""
+        if len(self.starts) < 2:
+            return 0.0
+        return (len(self.starts) - 1) / (self.starts[-1] - self.starts[0])
+
+    def stats(self):
+        ordered = sorted(self.frame_ms)
+        return {
+            "fps": self.fps(),
+            "p50": percentile(ordered, 50),
+            "p95": percentile(ordered, 95),
+            "p99": percentile(ordered, 99),
+            "items": self.items,
+            "layers": {name: sum(v) / len(v) if v else 0.0
+                       for name, v in self.layer_ms.items()},
+        }
+
+    def summary_lines(self):
+        s = self.stats()
+        lines = ["%5.1f fps  p50 %5.2f  p95 %5.2f  p99 %5.2f ms"
+                 % (s["fps"], s["p50"], s["p95"], s["p99"])]
+        if s["items"] is not None:
+            lines.append("%d canvas items" % s["items"])
+        for name, ms in s["layers"].items():
+            lines.append("%-10s %6.2f ms" % (name, ms))
+        return lines
+
+    def close(self):
+        if self._log is not None:
+            self._log.close()
+            self._log = None
+
+    def _write_row(self, total, items):
+        layers = [1000 * self._current.get(name, 0.0) for name in self.sections]
+        if self._writer is not None:
+            self._writer.writerow([self.frame, "%.6f" % self._start,
+                                   "%.3f" % total,
+                                   "" if items is None else items]
+                                  + ["%.3f" % ms for ms in layers])
+        else:
+            row = {"frame": self.frame, "time": self._start,
+                   "frame_ms": round(total, 3), "items": items}
+            row.update((name + "_ms", round(ms, 3))
+                       for name, ms in zip(self.sections, layers))
+            self._log.write(json.dumps(row) + "\n")
@@ -0,0 +1,145 @@
+"""Detail levels for what is redrawn every frame, and a governor that picks
+one to hold a frame rate.
+
+A Level sets the ellipse tolerance (and so the segment count of every
+bird, cloud and world prop), the resolution of the boat's sail curve,
+how many leaf puffs a procedural world tree gets and what share of the
+flock and the particles is drawn. Level DEFAULT draws exactly what the
+scene drew before there were levels; the one above it is finer still. The
+static layers and the scene's own tree are drawn once and cost nothing
+per frame, so they are always drawn at the default level (see
+full_detail()) and no level changes them.
+"""
+
+import sys
+import time
+from collections import deque, namedtuple
+from contextlib import contextmanager
+
+import geometry
+import scene
+
+Level = namedtuple("Level", "ellipse_tolerance sail_steps leaf_puffs "
+                            "bird_share particle_share")
+
+# ellipse_tolerance: pixels an ellipse segment may stray from the curve
+# sail_steps:        segments in each curve of the boat's sail
+# leaf_puffs:        puffs drawn per tree crown, world trees only; the
+#                    scene tree is static and keeps all of its puffs
+# bird_share, particle_share: share of the flock and of each particle pool
+#                    drawn (see stride())
+LEVELS = [
+    Level(ellipse_tolerance=3.0, sail_steps=3, leaf_puffs=3,
+          bird_share=0.25, particle_share=0.25),
+    Level(ellipse_tolerance=1.5, sail_steps=5, leaf_puffs=4,
+          bird_share=0.5, particle_share=0.5),
+    Level(ellipse_tolerance=1.0, sail_steps=7, leaf_puffs=5,
+          bird_share=0.75, particle_share=0.75),
+    Level(ellipse_tolerance=0.5, sail_steps=10, leaf_puffs=5,
+          bird_share=1.0, particle_share=1.0),
+    Level(ellipse_tolerance=0.25, sail_steps=20, leaf_puffs=5,
+          bird_share=1.0, particle_share=1.0),
+]
+DEFAULT = 3
+
+
+def current():
+    return LEVELS[geometry.QUALITY]
+
+
+def apply(level):
+    """Switch to `level`. Cached shapes are keyed on geometry.QUALITY, so
+    the next frame records them afresh at the new detail."""
+    spec = LEVELS[level]
+    geometry.QUALITY = level
+    geometry.ELLIPSE_TOLERANCE_PX = spec.ellipse_tolerance
+    scene.SAIL_STEPS = spec.sail_steps
+    scene.LEAF_PUFFS = spec.leaf_puffs
+
+
+@contextmanager
+def full_detail():
+    """Draw at the default level for the duration, whatever the current one."""
+    level = geometry.QUALITY
+    apply(DEFAULT)
+    try:
+        yield
+    finally:
+        apply(level)
+
+
+def stride(share):
+    """Draw every stride-th of a set to draw about `share` of it."""
+    return max(1, int(round(1 / share)))
+
+
+# governor
+
+DOWN = 1.0    # a window averaging over this share of the budget drops a level
+UP = 0.7      # one under this share of the budget may go up a level
+RETRY = 3     # windows a raised level must last before it counts as holding
+MAX_HOLD = 16  # most windows of headroom ever needed to try a level again
+
+
+def log_to_stderr(message):
+    print(message, file=sys.stderr, flush=True)
+
+
+class Governor:
+    """Steps the level down when frames run over budget and up when there
+    is room to spare.
+
+    record() takes the time of each frame. When a window of frames has been
+    seen at the current level, its mean is compared with the budget. The
+    gap between DOWN and UP and starting a fresh window after every change
+    keep the level from flapping between neighbours. A level that has to be
+    left within RETRY windows of being raised to is not tried again until
+    twice as many windows in a row had headroom as before (at most
+    MAX_HOLD). Every change is logged.
+    """
+
+    def __init__(self, budget_ms, level=DEFAULT, window=60,
+                 log=log_to_stderr, clock=time.monotonic):
+        self.budget_ms = budget_ms
+        self.level = level
+        self.frame_ms = deque(maxlen=window)
+        self.log = log
+        self.clock = clock
+        self.hold = [1] * len(LEVELS)  # headroom windows needed to raise to
+        self.headroom = 0              # windows in a row with headroom
+        self.raised = None             # windows since the last raise
+        self.changes = []              # (time, old level, new level, mean ms)
+
+    def record(self, frame_ms):
+        """Add one frame; returns the new level if it changed, else None."""
+        self.frame_ms.append(frame_ms)
+        if len(self.frame_ms) < self.frame_ms.maxlen:
+            return None
+        mean = sum(self.frame_ms) / len(self.frame_ms)
+        self.frame_ms.clear()
+        if self.raised is not None:
+            self.raised += 1
+
+        if mean > DOWN * self.budget_ms and self.level > 0:
+            if self.raised is not None and self.raised <= RETRY:
+                # the level above was too much after all: back off
+                self.hold[self.level] = min(MAX_HOLD, 2 * self.hold[self.level])
+            self.headroom = 0
+            self.raised = None
+            return self._change(self.level - 1, mean)
+        if mean < UP * self.budget_ms and self.level < len(LEVELS) - 1:
+            self.headroom += 1
+            if self.headroom >= self.hold[self.level + 1]:
+                self.headroom = 0
+                self.raised = 0
+                return self._change(self.level + 1, mean)
+        else:
+            self.headroom = 0
+        return None
+
+    def _change(self, level, mean):
+        old, self.level = self.level, level
+        self.changes.append((self.clock(), old, level, mean))
+        self.log("quality %d -> %d: frames took %.1f ms on average, budget %.1f ms"
+                 % (old, level, mean, self.budget_ms))
+        return level
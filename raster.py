@@ -0,0 +1,387 @@
+"""Headless NumPy rasterizer for the village scene.
+
+Pixel coordinates follow the turtle canvas: the origin is the centre of the
+frame and y grows upwards, so a point (x, y) lands on column x + width/2 and
+row height/2 - y. Every primitive is first turned into a coverage mask
+(top row, left column, boolean array) and then painted in one vectorized
+assignment, which keeps the per-primitive Python work constant.
+"""
+
+import math
+import struct
+import zlib
+
+import numpy as np
+
+
+def rgb(args):
+    """Turtle-style color() arguments (colormode 1.0) -> uint8 RGB tuple."""
+    value = args[0] if len(args) == 1 else args
+    if isinstance(value, str):
+        if not value.startswith("#") or len(value) != 7:
+            raise ValueError("raster backend only understands #rrggbb colors, "
+                             "got %r" % (value,))
+        return tuple(int(value[i:i + 2], 16) for i in (1, 3, 5))
+    return tuple(int(round(255 * c)) for c in value)
+
+
+# coverage masks
+
+def polygon_mask(px, py):
+    """Even-odd scanline fill of a polygon given in pixel space."""
+    px = np.asarray(px, dtype=np.float64)
+    py = np.asarray(py, dtype=np.float64)
+    x0 = int(math.floor(px.min()))
+    y0 = int(math.floor(py.min()))
+    w = int(math.ceil(px.max())) - x0
+    h = int(math.ceil(py.max())) - y0
+    if w <= 0 or h <= 0:
+        return None
+
+    # crossings of every edge with every scanline centre, shape (h, edges)
+    ax, ay = px, py
+    bx, by = np.roll(px, -1), np.roll(py, -1)
+    yc = (np.arange(h) + (y0 + 0.5))[:, None]
+    crosses = (ay <= yc) != (by <= yc)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        xs = ax + (yc - ay) * (bx - ax) / (by - ay)
+    xs = np.where(crosses, xs, np.inf)
+    xs.sort(axis=1)
+
+    pairs = crosses.sum(axis=1).max() // 2
+    if pairs == 0:
+        return None
+    starts = xs[:, 0:2 * pairs:2]
+    ends = xs[:, 1:2 * pairs:2]
+    valid = np.isfinite(ends)
+    rows = np.broadcast_to(np.arange(h)[:, None], starts.shape)[valid]
+    # pixel c is inside a span [a, b) when its centre c + 0.5 is
+    c_start = np.clip(np.ceil(starts[valid] - 0.5) - x0, 0, w).astype(np.intp)
+    c_end = np.clip(np.ceil(ends[valid] - 0.5) - x0, 0, w).astype(np.intp)
+
+    diff = np.zeros((h, w + 1), dtype=np.int16)
+    np.add.at(diff, (rows, c_start), 1)
+    np.add.at(diff, (rows, c_end), -1)
+    mask = np.cumsum(diff, axis=1)[:, :w] > 0
+    return y0, x0, mask
+
+
+def _disc_offsets(width):
+    r = width / 2.0
+    n = int(math.ceil(r))
+    dy, dx = np.mgrid[-n:n + 1, -n:n + 1]
+    keep = dx * dx + dy * dy <= max(r * r, 0.25)
+    return dy[keep], dx[keep]
+
+
+_discs = {}
+
+
+def polyline_mask(px, py, width=1):
+    """Stroke a polyline in pixel space with a round pen `width` pixels wide."""
+    px = np.asarray(px, dtype=np.float64)
+    py = np.asarray(py, dtype=np.float64)
+    if len(px) < 2:
+        return None
+
+    # sample every segment at most half a pixel apart
+    dx = np.diff(px)
+    dy = np.diff(py)
+    steps = np.maximum(1, np.ceil(np.hypot(dx, dy) * 2)).astype(np.intp)
+    seg = np.repeat(np.arange(len(dx)), steps + 1)
+    first = np.repeat(np.cumsum(steps + 1) - (steps + 1), steps + 1)
+    t = (np.arange(len(seg)) - first) / np.repeat(steps, steps + 1)
+    sx = np.floor(px[seg] + t * dx[seg]).astype(np.intp)
+    sy = np.floor(py[seg] + t * dy[seg]).astype(np.intp)
+
+    disc = _discs.get(width)
+    if disc is None:
+        disc = _discs[width] = _disc_offsets(width)
+    oy, ox = disc
+    cols = (sx[:, None] + ox).ravel()
+    rows = (sy[:, None] + oy).ravel()
+
+    x0 = int(cols.min())
+    y0 = int(rows.min())
+    mask = np.zeros((int(rows.max()) - y0 + 1, int(cols.max()) - x0 + 1),
+                    dtype=bool)
+    mask[rows - y0, cols - x0] = True
+    return y0, x0, mask
+
+
+def _clip(y0, x0, h, w, height, width):
+    """Visible part of an (h, w) block at (y0, x0): dst and src slices."""
+    top = max(y0, 0)
+    left = max(x0, 0)
+    bottom = min(y0 + h, height)
+    right = min(x0 + w, width)
+    if top >= bottom or left >= right:
+        return None
+    return ((slice(top, bottom), slice(left, right)),
+            (slice(top - y0, bottom - y0), slice(left - x0, right - x0)))
+
+
+# targets
+
+class Framebuffer:
+    """An RGB frame that masks are painted straight into."""
+
+    def __init__(self, width, height, background=(0, 0, 0)):
+        self.width = width
+        self.height = height
+        self.background = rgb(background)
+        self.pixels = np.empty((height, width, 3), dtype=np.uint8)
+        self.pixels[...] = self.background
+
+    def paint(self, coverage, color):
+        y0, x0, mask = coverage
+        clip = _clip(y0, x0, mask.shape[0], mask.shape[1],
+                     self.height, self.width)
+        if clip is not None:
+            dst, src = clip
+            np.copyto(self.pixels[dst], np.array(color, dtype=np.uint8),
+                      where=mask[src][..., None])
+
+    def stamp(self, oy, ox, by, bx, color):
+        """Paint the pixel offsets (oy, ox) at every position (by, bx).
+
+        Overlapping copies are merged in a hit mask over the rows they span
+        first, so each covered pixel is written once. Only copies that run
+        off the frame are clipped pixel by pixel.
+        """
+        h, w = self.height, self.width
+        inside = ((by + int(oy.min()) >= 0) & (by + int(oy.max()) < h)
+                  & (bx + int(ox.min()) >= 0) & (bx + int(ox.max()) < w))
+        top = max(0, int(by.min()) + int(oy.min()))
+        bottom = min(h, int(by.max()) + int(oy.max()) + 1)
+        if top >= bottom:
+            return
+        hit = np.zeros((bottom - top) * w, dtype=bool)
+        hit[((by[inside] - top) * w + bx[inside])[:, None] + (oy * w + ox)] = True
+        if not inside.all():
+            rows = ((by[~inside])[:, None] + oy).ravel()
+            cols = ((bx[~inside])[:, None] + ox).ravel()
+            keep = (rows >= 0) & (rows < h) & (cols >= 0) & (cols < w)
+            hit[(rows[keep] - top) * w + cols[keep]] = True
+        self.pixels[top:bottom].reshape(-1, 3)[np.flatnonzero(hit)] = color
+
+    def snapshot(self):
+        return self.pixels.copy()
+
+    def restore(self, snapshot):
+        np.copyto(self.pixels, snapshot)
+
+    def save_png(self, path, level=6):
+        write_png(path, self.pixels, level)
+
+
+class Sprite:
+    """A cropped RGB block plus its mask, blitted at integer offsets."""
+
+    def __init__(self, y0, x0, pixels, mask):
+        self.y0 = y0
+        self.x0 = x0
+        self.pixels = pixels
+        self.mask = mask
+
+    def blit(self, fb, dx=0, dy=0):
+        """Paint onto fb shifted by (dx, dy) pixels, y growing downwards."""
+        h, w = self.mask.shape
+        clip = _clip(self.y0 + int(round(dy)), self.x0 + int(round(dx)), h, w,
+                     fb.height, fb.width)
+        if clip is not None:
+            dst, src = clip
+            np.copyto(fb.pixels[dst], self.pixels[src],
+                      where=self.mask[src][..., None])
+
+
+class SpriteBuilder:
+    """Collects painted masks so they can be flattened into one Sprite."""
+
+    def __init__(self):
+        self.clear()
+
+    def clear(self):
+        self._painted = []
+
+    def paint(self, coverage, color):
+        self._painted.append((coverage, color))
+
+    def build(self):
+        if not self._painted:
+            return None
+        top = min(y0 for (y0, x0, m), c in self._painted)
+        left = min(x0 for (y0, x0, m), c in self._painted)
+        bottom = max(y0 + m.shape[0] for (y0, x0, m), c in self._painted)
+        right = max(x0 + m.shape[1] for (y0, x0, m), c in self._painted)
+        pixels = np.zeros((bottom - top, right - left, 3), dtype=np.uint8)
+        mask = np.zeros((bottom - top, right - left), dtype=bool)
+        for (y0, x0, m), color in self._painted:
+            region = (slice(y0 - top, y0 - top + m.shape[0]),
+                      slice(x0 - left, x0 - left + m.shape[1]))
+            np.copyto(pixels[region], np.array(color, dtype=np.uint8),
+                      where=m[..., None])
+            mask[region] |= m
+        return Sprite(top, left, pixels, mask)
+
+
+_stamps = {}  # (px, py, width) -> pixel offsets of a stamped polyline
+_sprites = {}  # display list -> Sprite of it drawn at the origin
+
+
+class RasterPen:
+    """Turtle look-alike that rasterizes into a Framebuffer or SpriteBuilder."""
+
+    def __init__(self, target, width, height):
+        self.target = target
+        self.items = ()
+        self._cx = width / 2.0
+        self._cy = height / 2.0
+        self._pencolor = self._fillcolor = (0, 0, 0)
+        self._width = 1
+        self._down = True
+        self._pos = (0.0, 0.0)
+        self._line = None
+        self._fill = None
+
+    def color(self, *args):
+        color = rgb(args)
+        if color != self._pencolor:
+            self._flush_line()
+        self._pencolor = self._fillcolor = color
+
+    def pensize(self, width):
+        if width != self._width:
+            self._flush_line()
+            self._width = width
+
+    def penup(self):
+        self._flush_line()
+        self._down = False
+
+    def pendown(self):
+        self._down = True
+
+    def goto(self, x, y=None):
+        if y is None:
+            x, y = x
+        point = (x + self._cx, self._cy - y)
+        if self._fill is not None:
+            self._fill.append(point)
+        if self._down:
+            if self._line is None:
+                self._line = [(self._pos[0] + self._cx, self._cy - self._pos[1])]
+            self._line.append(point)
+        self._pos = (x, y)
+
+    def begin_fill(self):
+        self._flush_line()
+        self._fill = [(self._pos[0] + self._cx, self._cy - self._pos[1])]
+
+    def end_fill(self):
+        fill = self._fill
+        self._fill = None
+        if fill is None or len(fill) < 3:
+            self._flush_line()
+            return
+        px, py = zip(*fill)
+        coverage = polygon_mask(px, py)
+        if coverage is not None:
+            self.target.paint(coverage, self._fillcolor)
+        # the pen trace goes on top of the fill, as turtle draws it
+        self._flush_line()
+
+    def clear(self):
+        self._line = None
+        self._fill = None
+        if isinstance(self.target, SpriteBuilder):
+            self.target.clear()
+
+    def write(self, *args, **kwargs):
+        pass
+
+    def stamp_polyline(self, px, py, xs, ys):
+        """Stroke the polyline (px, py) once and stamp it at every (x, y).
+
+        Rasterizing the shape once and adding its pixel offsets to each
+        position costs one write per covered pixel, where stroking every
+        copy would sample each segment and stamp the pen disc all over
+        again. Positions are rounded to whole pixels. The pen is left up.
+        """
+        self._flush_line()
+        self._down = False
+        if not len(xs):
+            return
+        key = (tuple(px), tuple(py), self._width)
+        offsets = _stamps.get(key)
+        if offsets is None:
+            y0, x0, mask = polyline_mask(px, [-y for y in py], self._width)
+            rows, cols = np.nonzero(mask)
+            offsets = _stamps[key] = (rows + y0, cols + x0)
+        oy, ox = offsets
+        by = np.floor(self._cy - np.asarray(ys)).astype(np.intp)
+        bx = np.floor(np.asarray(xs) + self._cx).astype(np.intp)
+        if isinstance(self.target, Framebuffer):
+            self.target.stamp(oy, ox, by, bx, self._pencolor)
+        else:
+            rows = (by[:, None] + oy).ravel()
+            cols = (bx[:, None] + ox).ravel()
+            y0, x0 = int(rows.min()), int(cols.min())
+            mask = np.zeros((int(rows.max()) - y0 + 1, int(cols.max()) - x0 + 1),
+                            dtype=bool)
+            mask[rows - y0, cols - x0] = True
+            self.target.paint((y0, x0, mask), self._pencolor)
+        self._pos = (float(xs[-1]) + px[-1], float(ys[-1]) + py[-1])
+
+    def stamp_shape(self, shape, xs, ys):
+        """Replay the display list `shape` at every (x, y) offset.
+
+        Onto a frame the shape is drawn once into a sprite, which is then
+        blitted per position. The pen is left up.
+        """
+        self._flush_line()
+        if not isinstance(self.target, Framebuffer):
+            for x, y in zip(xs.tolist(), ys.tolist()):
+                shape.replay(self, x, y)
+            self.penup()
+            return
+        self._down = False
+        sprite = _sprites.get(shape)
+        if sprite is None:
+            pen = RasterPen(SpriteBuilder(), 2 * self._cx, 2 * self._cy)
+            shape.replay(pen)
+            pen.penup()
+            sprite = _sprites[shape] = pen.target.build()
+        if sprite is None:
+            return
+        for x, y in zip(xs.tolist(), ys.tolist()):
+            sprite.blit(self.target, x, -y)
+
+    def _flush_line(self):
+        if self._line is not None and len(self._line) > 1:
+            px, py = zip(*self._line)
+            self._stroke(px, py)
+        self._line = None
+
+    def _stroke(self, px, py):
+        coverage = polyline_mask(px, py, self._width)
+        if coverage is not None:
+            self.target.paint(coverage, self._pencolor)
+
+
+def write_png(path, pixels, level=6):
+    """Write an (h, w, 3) uint8 array as an 8-bit RGB PNG."""
+    h, w, _ = pixels.shape
+    raw = np.zeros((h, w * 3 + 1), dtype=np.uint8)  # filter byte 0 per row
+    raw[:, 1:] = pixels.reshape(h, w * 3)
+
+    def chunk(kind, data):
+        body = kind + data
+        return (struct.pack(">I", len(data)) + body
+                + struct.pack(">I", zlib.crc32(body) & 0xffffffff))
+
+    with open(path, "wb") as f:
+        f.write(b"\x89PNG\r\n\x1a\n")
+        f.write(chunk(b"IHDR", struct.pack(">IIBBBBB", w, h, 8, 2, 0, 0, 0)))
+        f.write(chunk(b"IDAT", zlib.compress(raw.tobytes(), level)))
+        f.write(chunk(b"IEND", b""))
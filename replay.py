@@ -0,0 +1,47 @@
+"""Stepped simulations that can be put at any frame.
+
+The flock, the particles and the traffic are stepped one simulation step
+at a time, so a frame before the current one can only be reached by
+stepping again from an earlier state. Every CHECKPOINT_EVERY steps a
+simulation keeps a copy of its state, the last CHECKPOINTS of them, and
+going back resumes from the latest one at or before the frame asked for.
+A short rewind (a frame drawn out of order, an export worker starting on
+its next chunk) then costs at most CHECKPOINT_EVERY steps; one further
+back than the oldest checkpoint starts again from frame 0.
+"""
+
+from collections import deque
+
+CHECKPOINT_EVERY = 50  # steps between checkpoints
+CHECKPOINTS = 4        # checkpoints kept, the most recent ones
+
+
+class Replay:
+    """Checkpointed rewinding for a simulation with a `frame` counter.
+
+    The simulation provides reset() (back to frame 0), snapshot() (a copy
+    of everything step() changes, frame included) and restore(snapshot).
+    """
+
+    def __init__(self):
+        self.checkpoints = deque(maxlen=CHECKPOINTS)  # (frame, snapshot)
+
+    def replay_to(self, frame, step):
+        """Call step(n) for each step n until `frame`, rewinding first if
+        `frame` is behind."""
+        if frame < self.frame:
+            self.rewind(frame)
+        checkpoints = self.checkpoints
+        while self.frame < frame:
+            step(self.frame)
+            if (self.frame % CHECKPOINT_EVERY == 0
+                    and (not checkpoints or checkpoints[-1][0] < self.frame)):
+                checkpoints.append((self.frame, self.snapshot()))
+
+    def rewind(self, frame):
+        """Go back to the latest checkpoint at or before `frame`."""
+        for saved_frame, saved in reversed(self.checkpoints):
+            if saved_frame <= frame:
+                self.restore(saved)
+                return
+        self.reset()
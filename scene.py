@@ -0,0 +1,776 @@
+"""What the village looks like: every object as a draw_* function.
+
+Each draw_* function takes the pen to draw with, in base units, so the same
+code draws on turtle, the Tk canvas, the raster framebuffer or a recorder.
+Shapes that are placed many times are also kept as display lists here.
+"""
+
+import math
+import os
+
+import displaylist
+import geometry
+import spatial
+from geometry import (batch_parts, compile_shape, draw_batches,
+                      draw_circle_with_turtle, draw_polygon, draw_sun_rays,
+                      midpoint_circle_algorithm, set_pensize_scaled, sx, sy)
+
+
+SKY_COLOR = (0, 0.9, 0.9)
+RIVER_COLOR = (100/255, 149/255, 237/255)
+SUN_COLOR = (255/255, 215/255, 0)
+
+
+
+# objects
+
+SAIL_STEPS = 10  # straight pieces along the curved edge of the sail
+
+
+def draw_boat_with_turtle(t, offset):
+    t.color(0, 0, 0)
+    t.penup()
+    t.goto(sx(75 + offset), sy(-30))
+    t.pendown()
+    t.begin_fill()
+    for point in [(150 + offset, -30), (175 + offset, 0), (50 + offset, 0), (75 + offset, -30)]:
+        t.goto(sx(point[0]), sy(point[1]))
+    t.end_fill()
+
+    t.color(205/255, 133/255, 63/255)
+    t.penup()
+    t.goto(sx(75 + offset), sy(0))
+    t.pendown()
+    t.begin_fill()
+    for point in [(150 + offset, 0), (140 + offset, 30), (85 + offset, 30), (75 + offset, 0)]:
+        t.goto(sx(point[0]), sy(point[1]))
+    t.end_fill()
+
+    # Mast
+    t.color(160/255, 82/255, 45/255)
+    t.penup()
+    t.goto(sx(110 + offset), sy(30))
+    t.pendown()
+    t.begin_fill()
+    for point in [(120 + offset, 30), (120 + offset, 60), (110 + offset, 60), (110 + offset, 30)]:
+        t.goto(sx(point[0]), sy(point[1]))
+    t.end_fill()
+
+    # Curved Sail
+    t.color(128/255, 0, 128/255)
+    t.penup()
+    t.goto(sx(120 + offset), sy(125))
+    t.pendown()
+    t.begin_fill()
+
+    for i in range(SAIL_STEPS + 1):
+        t_param = i / SAIL_STEPS
+        # FIXED TYPO HERE: t_paramuhin -> t_param
+        curve_x = 120 + offset + 25 * (1 - (1 - t_param) ** 2)
+        curve_y = 125 - 85 * t_param
+        t.goto(sx(curve_x), sy(curve_y))
+
+    t.goto(sx(120 + offset), sy(40))
+    t.goto(sx(120 + offset), sy(125))
+    t.end_fill()
+
+
+CLOUD_PUFFS = {
+    # kind: [(rx, ry, dx from the group centre), ...]
+    "large": [(20, 30, 0), (15, 20, -15), (15, 20, 15)],
+    "small": [(18, 25, 0), (14, 18, -13), (14, 18, 13)],
+}
+CLOUD_GROUPS = [("large", 280, 220), ("large", 200, 180),
+                ("small", -100, 210), ("small", -30, 190)]
+
+
+def draw_cloud_group(t, kind, cx, cy):
+    t.color(1, 1, 1)
+    for rx, ry, dx in CLOUD_PUFFS[kind]:
+        draw_circle_with_turtle(t, rx, ry, cx + dx, cy)
+
+
+def draw_clouds_with_turtle(t, offset):
+    for kind, gx, gy in CLOUD_GROUPS:
+        draw_cloud_group(t, kind, gx + offset, gy)
+
+
+def draw_flowers(t):
+    flower_positions = [(-400, -200), (-350, -180), (-300, -210),
+                        (-420, -160), (350, -190), (380, -170), (320, -200)]
+
+    for fx, fy in flower_positions:
+        draw_flower(t, fx, fy)
+
+
+def draw_flower(t, fx, fy):
+    t.color(1, 0.2, 0.2)
+    for i in range(5):
+        angle = i * 72
+        petal_x = fx + 8 * math.cos(math.radians(angle))
+        petal_y = fy + 8 * math.sin(math.radians(angle))
+        draw_circle_with_turtle(t, 4, 5, petal_x, petal_y)
+
+    t.color(1, 1, 0)
+    draw_circle_with_turtle(t, 3, 3, fx, fy)
+
+
+def draw_car(t, offset):
+    t.color(1, 0, 0)
+    draw_polygon(t, [(offset, 100), (offset + 60, 100),
+                     (offset + 60, 120), (offset, 120)])
+
+    t.color(0.8, 0, 0)
+    draw_polygon(t, [(offset + 10, 120), (offset + 50, 120),
+                     (offset + 45, 135), (offset + 15, 135)])
+
+    t.color(0.6, 0.8, 1)
+    draw_polygon(t, [(offset + 15, 122), (offset + 28, 122),
+                     (offset + 26, 132), (offset + 17, 132)])
+    draw_polygon(t, [(offset + 32, 122), (offset + 45, 122),
+                     (offset + 43, 132), (offset + 34, 132)])
+
+    t.color(0.1, 0.1, 0.1)
+    draw_circle_with_turtle(t, 6, 6, offset + 15, 100)
+    draw_circle_with_turtle(t, 6, 6, offset + 45, 100)
+
+
+def draw_windmill(t, angle, wind_sway):
+    draw_windmill_tower(t, wind_sway)
+    draw_windmill_head(t, angle, 250, wind_sway)
+
+
+def draw_windmill_tower(t, wind_sway, dx=0, dy=0):
+    """The tower, its top swayed with the head; (dx, dy) moves it whole."""
+    base_x = 250 + dx
+    base_y = -50 + wind_sway + dy
+
+    t.color(0.5, 0.3, 0.1)
+    draw_polygon(t, [(base_x - 10, -100 + dy), (base_x + 10, -100 + dy),
+                     (base_x + 8, base_y + 50), (base_x - 8, base_y + 50)])
+
+
+def draw_windmill_head(t, angle, hub_x, hub_y):
+    """Hub and blades, centred on (hub_x, hub_y)."""
+    t.color(0.8, 0.8, 0.8)
+    draw_circle_with_turtle(t, 15, 15, hub_x, hub_y)
+
+    t.color(1, 1, 1)
+    for i in range(4):
+        blade_angle = angle + i * 90
+        rad = math.radians(blade_angle)
+
+        x1 = hub_x + 5 * math.cos(rad)
+        y1 = hub_y + 5 * math.sin(rad)
+        x2 = hub_x + 35 * math.cos(rad)
+        y2 = hub_y + 35 * math.sin(rad)
+
+        t.penup(); t.goto(sx(x1), sy(y1)); t.pendown();
+        t.begin_fill()
+
+        perpendicular = blade_angle + 90
+        perp_rad = math.radians(perpendicular)
+
+        pts = [
+            (x1 + 3 * math.cos(perp_rad), y1 + 3 * math.sin(perp_rad)),
+            (x2 + 1 * math.cos(perp_rad), y2 + 1 * math.sin(perp_rad)),
+            (x2 - 1 * math.cos(perp_rad), y2 - 1 * math.sin(perp_rad)),
+            (x1 - 3 * math.cos(perp_rad), y1 - 3 * math.sin(perp_rad))
+        ]
+
+        t.goto(sx(pts[0][0]), sy(pts[0][1]))
+        for px, py in pts[1:]:
+            t.goto(sx(px), sy(py))
+        t.goto(sx(pts[0][0]), sy(pts[0][1]))
+        t.end_fill()
+
+
+def draw_bird(t, x, y, wing_up):
+    t.color(0.2, 0.2, 0.2)
+    set_pensize_scaled(t, 2)
+
+    draw_circle_with_turtle(t, 3, 3, x, y)
+
+    t.penup()
+    if wing_up:
+        t.goto(sx(x - 8), sy(y - 3))
+        t.pendown()
+        t.goto(sx(x), sy(y))
+        t.goto(sx(x + 8), sy(y - 3))
+    else:
+        t.goto(sx(x - 8), sy(y + 3))
+        t.pendown()
+        t.goto(sx(x), sy(y))
+        t.goto(sx(x + 8), sy(y + 3))
+
+    set_pensize_scaled(t, 1)
+
+
+def draw_birds_flying(t, positions, frame):
+    wing_up = (frame // 5) % 2 == 0
+    for pos in positions:
+        draw_bird(t, pos[0], pos[1], wing_up)
+
+
+
+# 3d animal
+# (the polygons below are drawn through draw_3d_cow, which batches them)
+
+def draw_3d_cow_polygons(t):
+    base_x = 350
+    base_y = -150
+
+    white_top = (1, 1, 1)
+    white_front = (0.9, 0.9, 0.9)
+    white_side = (0.75, 0.75, 0.75)
+
+    black_top = (0.2, 0.2, 0.2)
+    black_front = (0.1, 0.1, 0.1)
+    black_side = (0.05, 0.05, 0.05)
+
+    pink_top = (1, 0.8, 0.8)
+    pink_front = (0.95, 0.7, 0.7)
+    pink_side = (0.85, 0.6, 0.6)
+
+    brown_top = (0.6, 0.4, 0.2)
+    brown_front = (0.5, 0.3, 0.15)
+    brown_side = (0.4, 0.25, 0.1)
+
+    # Back-left leg
+    t.color(white_side)
+    draw_polygon(t, [(base_x - 22, base_y), (base_x - 22, base_y + 30),
+                     (base_x - 18, base_y + 32), (base_x - 18, base_y + 2)])
+    t.color(white_front)
+    draw_polygon(t, [(base_x - 18, base_y + 2), (base_x - 18, base_y + 32),
+                     (base_x - 10, base_y + 32), (base_x - 10, base_y + 2)])
+    t.color(white_top)
+    draw_polygon(t, [(base_x - 22, base_y + 30), (base_x - 18, base_y + 32),
+                     (base_x - 10, base_y + 32), (base_x - 14, base_y + 30)])
+
+    # Back-right leg
+    t.color(white_side)
+    draw_polygon(t, [(base_x + 10, base_y), (base_x + 10, base_y + 30),
+                     (base_x + 14, base_y + 32), (base_x + 14, base_y + 2)])
+    t.color(white_front)
+    draw_polygon(t, [(base_x + 14, base_y + 2), (base_x + 14, base_y + 32),
+                     (base_x + 22, base_y + 32), (base_x + 22, base_y + 2)])
+    t.color(white_top)
+    draw_polygon(t, [(base_x + 10, base_y + 30), (base_x + 14, base_y + 32),
+                     (base_x + 22, base_y + 32), (base_x + 18, base_y + 30)])
+
+    # Main body
+    t.color(white_side)
+    draw_polygon(t, [(base_x - 30, base_y + 30), (base_x - 30, base_y + 55),
+                     (base_x - 20, base_y + 60), (base_x - 20, base_y + 35)])
+    t.color(white_front)
+    draw_polygon(t, [(base_x - 20, base_y + 35), (base_x - 20, base_y + 60),
+                     (base_x + 30, base_y + 60), (base_x + 30, base_y + 35)])
+    t.color(white_top)
+    draw_polygon(t, [(base_x - 30, base_y + 55), (base_x - 20, base_y + 60),
+                     (base_x + 30, base_y + 60), (base_x + 20, base_y + 55)])
+
+    # Spots
+    t.color(black_front)
+    draw_polygon(t, [(base_x - 10, base_y + 45), (base_x - 10, base_y + 55),
+                     (base_x + 2, base_y + 55), (base_x + 2, base_y + 45)])
+    t.color(black_front)
+    draw_polygon(t, [(base_x + 10, base_y + 38), (base_x + 10, base_y + 50),
+                     (base_x + 22, base_y + 50), (base_x + 22, base_y + 38)])
+    t.color(black_top)
+    draw_polygon(t, [(base_x - 15, base_y + 56), (base_x - 8, base_y + 58),
+                     (base_x + 0, base_y + 58), (base_x - 7, base_y + 56)])
+    t.color(black_side)
+    draw_polygon(t, [(base_x - 28, base_y + 40), (base_x - 28, base_y + 48),
+                     (base_x - 22, base_y + 50), (base_x - 22, base_y + 42)])
+
+    # Neck
+    t.color(white_side)
+    draw_polygon(t, [(base_x - 30, base_y + 55), (base_x - 30, base_y + 65),
+                     (base_x - 26, base_y + 67), (base_x - 26, base_y + 57)])
+    t.color(white_front)
+    draw_polygon(t, [(base_x - 26, base_y + 57), (base_x - 26, base_y + 67),
+                     (base_x - 18, base_y + 67), (base_x - 18, base_y + 57)])
+    t.color(white_top)
+    draw_polygon(t, [(base_x - 30, base_y + 65), (base_x - 26, base_y + 67),
+                     (base_x - 18, base_y + 67), (base_x - 22, base_y + 65)])
+
+    # Head
+    t.color(white_side)
+    draw_polygon(t, [(base_x - 45, base_y + 65), (base_x - 45, base_y + 80),
+                     (base_x - 38, base_y + 83), (base_x - 38, base_y + 68)])
+    t.color(white_front)
+    draw_polygon(t, [(base_x - 38, base_y + 68), (base_x - 38, base_y + 83),
+                     (base_x - 18, base_y + 83), (base_x - 18, base_y + 68)])
+    t.color(white_top)
+    draw_polygon(t, [(base_x - 45, base_y + 80), (base_x - 38, base_y + 83),
+                     (base_x - 18, base_y + 83), (base_x - 25, base_y + 80)])
+
+    t.color(black_front)
+    draw_polygon(t, [(base_x - 35, base_y + 72), (base_x - 35, base_y + 80),
+                     (base_x - 25, base_y + 80), (base_x - 25, base_y + 72)])
+
+    # Snout
+    t.color(pink_side)
+    draw_polygon(t, [(base_x - 50, base_y + 68), (base_x - 50, base_y + 75),
+                     (base_x - 46, base_y + 76), (base_x - 46, base_y + 69)])
+    t.color(pink_front)
+    draw_polygon(t, [(base_x - 46, base_y + 69), (base_x - 46, base_y + 76),
+                     (base_x - 38, base_y + 76), (base_x - 38, base_y + 69)])
+    t.color(pink_top)
+    draw_polygon(t, [(base_x - 50, base_y + 75), (base_x - 46, base_y + 76),
+                     (base_x - 38, base_y + 76), (base_x - 42, base_y + 75)])
+
+    # Nostrils
+    t.color(0.1, 0.05, 0.05)
+    draw_polygon(t, [(base_x - 44, base_y + 72), (base_x - 44, base_y + 74),
+                     (base_x - 42, base_y + 74), (base_x - 42, base_y + 72)])
+    draw_polygon(t, [(base_x - 44, base_y + 70), (base_x - 44, base_y + 71.5),
+                     (base_x - 42, base_y + 71.5), (base_x - 42, base_y + 70)])
+
+    # Eyes
+    t.color(0.05, 0.05, 0.05)
+    draw_polygon(t, [(base_x - 36, base_y + 78), (base_x - 36, base_y + 81),
+                     (base_x - 33, base_y + 81), (base_x - 33, base_y + 78)])
+    draw_polygon(t, [(base_x - 24, base_y + 78), (base_x - 24, base_y + 81),
+                     (base_x - 21, base_y + 81), (base_x - 21, base_y + 78)])
+
+    # Ears
+    t.color(pink_side)
+    draw_polygon(t, [(base_x - 42, base_y + 83), (base_x - 44, base_y + 90),
+                     (base_x - 40, base_y + 91)])
+    t.color(pink_front)
+    draw_polygon(t, [(base_x - 40, base_y + 83), (base_x - 40, base_y + 91),
+                     (base_x - 36, base_y + 91), (base_x - 36, base_y + 83)])
+
+    t.color(pink_front)
+    draw_polygon(t, [(base_x - 22, base_y + 83), (base_x - 22, base_y + 91),
+                     (base_x - 18, base_y + 91), (base_x - 18, base_y + 83)])
+    t.color(pink_top)
+    draw_polygon(t, [(base_x - 22, base_y + 91), (base_x - 20, base_y + 92),
+                     (base_x - 18, base_y + 91)])
+
+    # Horns
+    t.color(brown_side)
+    draw_polygon(t, [(base_x - 40, base_y + 85), (base_x - 39, base_y + 93),
+                     (base_x - 37, base_y + 92)])
+    t.color(brown_front)
+    draw_polygon(t, [(base_x - 37, base_y + 85), (base_x - 37, base_y + 92),
+                     (base_x - 35, base_y + 85)])
+
+    t.color(brown_side)
+    draw_polygon(t, [(base_x - 24, base_y + 85), (base_x - 23, base_y + 93),
+                     (base_x - 21, base_y + 92)])
+    t.color(brown_front)
+    draw_polygon(t, [(base_x - 21, base_y + 85), (base_x - 21, base_y + 92),
+                     (base_x - 19, base_y + 85)])
+
+    # Front legs
+    t.color(white_side)
+    draw_polygon(t, [(base_x - 18, base_y), (base_x - 18, base_y + 35),
+                     (base_x - 14, base_y + 37), (base_x - 14, base_y + 2)])
+    t.color(white_front)
+    draw_polygon(t, [(base_x - 14, base_y + 2), (base_x - 14, base_y + 37),
+                     (base_x - 6, base_y + 37), (base_x - 6, base_y + 2)])
+    t.color(white_top)
+    draw_polygon(t, [(base_x - 18, base_y + 35), (base_x - 14, base_y + 37),
+                     (base_x - 6, base_y + 37), (base_x - 10, base_y + 35)])
+
+    t.color(white_side)
+    draw_polygon(t, [(base_x + 14, base_y), (base_x + 14, base_y + 35),
+                     (base_x + 18, base_y + 37), (base_x + 18, base_y + 2)])
+    t.color(white_front)
+    draw_polygon(t, [(base_x + 18, base_y + 2), (base_x + 18, base_y + 37),
+                     (base_x + 26, base_y + 37), (base_x + 26, base_y + 2)])
+    t.color(white_top)
+    draw_polygon(t, [(base_x + 14, base_y + 35), (base_x + 18, base_y + 37),
+                     (base_x + 26, base_y + 37), (base_x + 22, base_y + 35)])
+
+    # Hooves
+    t.color(0.05, 0.05, 0.05)
+    draw_polygon(t, [(base_x - 22, base_y), (base_x - 22, base_y + 4),
+                     (base_x - 18, base_y + 5), (base_x - 18, base_y + 1)])
+    draw_polygon(t, [(base_x - 18, base_y + 1), (base_x - 18, base_y + 5),
+                     (base_x - 10, base_y + 5), (base_x - 10, base_y + 1)])
+
+    draw_polygon(t, [(base_x + 10, base_y), (base_x + 10, base_y + 4),
+                     (base_x + 14, base_y + 5), (base_x + 14, base_y + 1)])
+    draw_polygon(t, [(base_x + 14, base_y + 1), (base_x + 14, base_y + 5),
+                     (base_x + 22, base_y + 5), (base_x + 22, base_y + 1)])
+
+    draw_polygon(t, [(base_x - 18, base_y), (base_x - 18, base_y + 4),
+                     (base_x - 14, base_y + 5), (base_x - 14, base_y + 1)])
+    draw_polygon(t, [(base_x - 14, base_y + 1), (base_x - 14, base_y + 5),
+                     (base_x - 6, base_y + 5), (base_x - 6, base_y + 1)])
+
+    draw_polygon(t, [(base_x + 14, base_y), (base_x + 14, base_y + 4),
+                     (base_x + 18, base_y + 5), (base_x + 18, base_y + 1)])
+    draw_polygon(t, [(base_x + 18, base_y + 1), (base_x + 18, base_y + 5),
+                     (base_x + 26, base_y + 5), (base_x + 26, base_y + 1)])
+
+    # Tail
+    t.color(white_side)
+    draw_polygon(t, [(base_x + 28, base_y + 50), (base_x + 28, base_y + 58),
+                     (base_x + 30, base_y + 58), (base_x + 30, base_y + 50)])
+    t.color(white_front)
+    draw_polygon(t, [(base_x + 30, base_y + 50), (base_x + 30, base_y + 58),
+                     (base_x + 34, base_y + 58), (base_x + 34, base_y + 50)])
+
+    t.color(white_side)
+    draw_polygon(t, [(base_x + 32, base_y + 48), (base_x + 32, base_y + 50),
+                     (base_x + 36, base_y + 48), (base_x + 36, base_y + 46)])
+    t.color(white_front)
+    draw_polygon(t, [(base_x + 36, base_y + 46), (base_x + 36, base_y + 48),
+                     (base_x + 40, base_y + 46), (base_x + 40, base_y + 44)])
+
+    t.color(black_side)
+    draw_polygon(t, [(base_x + 38, base_y + 40), (base_x + 38, base_y + 46),
+                     (base_x + 40, base_y + 46), (base_x + 40, base_y + 40)])
+    t.color(black_front)
+    draw_polygon(t, [(base_x + 40, base_y + 40), (base_x + 40, base_y + 46),
+                     (base_x + 45, base_y + 46), (base_x + 45, base_y + 40)])
+    t.color(black_top)
+    draw_polygon(t, [(base_x + 38, base_y + 46), (base_x + 40, base_y + 46),
+                     (base_x + 45, base_y + 46), (base_x + 43, base_y + 46)])
+
+    # Udder
+    t.color(pink_side)
+    draw_polygon(t, [(base_x + 0, base_y + 30), (base_x + 0, base_y + 38),
+                     (base_x + 4, base_y + 39), (base_x + 4, base_y + 31)])
+    t.color(pink_front)
+    draw_polygon(t, [(base_x + 4, base_y + 31), (base_x + 4, base_y + 39),
+                     (base_x + 14, base_y + 39), (base_x + 14, base_y + 31)])
+    t.color(pink_top)
+    draw_polygon(t, [(base_x + 0, base_y + 38), (base_x + 4, base_y + 39),
+                     (base_x + 14, base_y + 39), (base_x + 10, base_y + 38)])
+
+    t.color(pink_front)
+    for teat_x in [5, 9, 13]:
+        draw_polygon(t, [(base_x + teat_x, base_y + 29), (base_x + teat_x, base_y + 31),
+                         (base_x + teat_x + 2, base_y + 31), (base_x + teat_x + 2, base_y + 29)])
+
+
+
+def draw_3d_cow_batched(t):
+    draw_batches(t, batch_parts(compile_shape(draw_3d_cow_polygons)))
+
+
+def draw_3d_cow(t):
+    # batching is the expensive part, so it runs once per display list
+    display_list(draw_3d_cow_batched).replay(t)
+
+
+
+# background -> bridge -> foreground
+
+def draw_background(t, flowers=True):
+    t.clear()
+    draw_ground(t)
+    if flowers:
+        draw_flowers(t)
+    draw_road(t)
+
+
+def draw_ground(t):
+    """Grass, river, hills and sun."""
+    # Ground
+    t.color(0, 1, 0)
+    draw_polygon(t, [(-450, -250), (450, -250), (450, 50), (-450, 50)])
+
+    # River
+    t.color(*RIVER_COLOR)
+    draw_polygon(t, [(50, 50), (0, -100), (150, -100), (200, 50)])
+    draw_polygon(t, [(50, -100), (0, -250), (150, -250), (200, -100)])
+    draw_polygon(t, [(-490, -50), (-450, 50), (450, 50), (450, -50)])
+
+    # Hills
+    t.color(184/255, 134/255, 11/255)
+    draw_polygon(t, [(-490, 50), (-50, 50), (-150, 200)])
+    t.color(218/255, 165/255, 32/255)
+    draw_polygon(t, [(-100, 50), (100, 50), (0, 200)])
+    t.color(184/255, 134/255, 11/255)
+    draw_polygon(t, [(50, 50), (470, 50), (150, 200)])
+
+    # Sun
+    t.color(*SUN_COLOR)
+    midpoint_circle_algorithm(t, 27, -75, 200)
+    draw_sun_rays(t, -75, 200, 32, 50, 12)
+
+
+def draw_road(t):
+    # Road
+    t.color(0.3, 0.3, 0.3)
+    draw_polygon(t, [(-450, 80), (450, 80), (450, 110), (-450, 110)])
+
+    # Road markings
+    t.color(1, 1, 1)
+    for i in range(-450, 450, 40):
+        draw_polygon(t, [(i, 93), (i + 20, 93), (i + 20, 97), (i, 97)])
+
+
+def draw_bridge(t):
+    t.clear()
+
+    t.color(0.6, 0.4, 0.2)
+    draw_polygon(t, [(30, 80), (180, 80), (180, 110), (30, 110)])
+
+    t.color(0.4, 0.2, 0.1)
+    draw_polygon(t, [(30, 110), (180, 110), (180, 115), (30, 115)])
+    draw_polygon(t, [(30, 80), (180, 80), (180, 75), (30, 75)])
+
+    for x in [50, 90, 130, 170]:
+        draw_polygon(t, [(x - 3, 75), (x + 3, 75), (x + 3, 50), (x - 3, 50)])
+
+
+def draw_houses(t):
+    """Both houses and the tree trunk; none of it moves."""
+    draw_house_right(t)
+    draw_house_left(t)
+    draw_tree_trunk(t)
+
+
+def draw_house_right(t):
+    """The 2nd house, drawn behind the 1st."""
+    t.color(210/255, 105/255, 30/255)
+    draw_polygon(t, [(-150, -30), (-50, -30), (-75, 20), (-120, 20)])
+    t.color(244/255, 164/255, 96/255)
+    draw_polygon(t, [(-150, -80), (-65, -80), (-65, -30), (-150, -30)])
+    t.color(160/255, 82/255, 45/255)
+    draw_polygon(t, [(-150, -80), (-60, -80), (-60, -90), (-150, -90)])
+    t.color(160/255, 82/255, 45/255)
+    draw_polygon(t, [(-110, -80), (-85, -80), (-85, -50), (-110, -50)])
+
+
+def draw_house_left(t):
+    """The 1st house."""
+    t.color(160/255, 82/255, 45/255)
+    draw_polygon(t, [(-250, -30), (-115, -30), (-140, 20), (-225, 20)])
+    t.color(255/255, 222/255, 173/255)
+    draw_polygon(t, [(-240, -30), (-200, -30), (-225, 5)])
+    t.color(255/255, 222/255, 173/255)
+    draw_polygon(t, [(-240, -100), (-200, -100), (-200, -30), (-240, -30)])
+    t.color(222/255, 184/255, 135/255)
+    draw_polygon(t, [(-200, -100), (-125, -100), (-125, -30), (-200, -30)])
+    t.color(160/255, 82/255, 45/255)
+    draw_polygon(t, [(-240, -100), (-125, -100), (-125, -110), (-240, -110)])
+    t.color(160/255, 82/255, 45/255)
+    draw_polygon(t, [(-175, -100), (-155, -100), (-155, -55), (-175, -55)])
+    t.color(160/255, 82/255, 45/255)
+    draw_polygon(t, [(-230, -50), (-215, -50), (-215, -75), (-230, -75)])
+
+
+def draw_tree_trunk(t):
+    t.color(139/255, 69/255, 19/255)
+    draw_polygon(t, [(-200, -100), (-180, -100), (-180, 50), (-200, 50)])
+
+
+# (rx, ry, x, y) of each puff of the crown, most of its outline first; they
+# are all one colour, so the order does not change how the full crown looks
+TREE_LEAVES = [(30, 40, -215, 70), (30, 40, -165, 70), (25, 30, -195, 150),
+               (30, 30, -180, 120), (25, 30, -205, 120)]
+LEAF_PUFFS = len(TREE_LEAVES)  # how many of them are drawn
+
+
+def draw_tree_leaves(t, wind_sway):
+    t.color(0, 128/255, 0)
+    for rx, ry, x, y in TREE_LEAVES[:LEAF_PUFFS]:
+        draw_circle_with_turtle(t, rx, ry, x + wind_sway, y)
+
+
+# display lists
+
+# A shape is recorded once around its own origin (see displaylist.py) and
+# can then be placed any number of times under a transform without running
+# its drawing code again. Instances and the cow are drawn this way, and the
+# replay_* helpers place further copies. For shapes made of a few cached
+# ellipses and polygons a replay costs about as much as the draw_* call,
+# since both are dominated by goto(); the win is in shapes whose geometry
+# is expensive to produce (the batched cow replays ~30x faster).
+# Recorded coordinates are pixels, so lists are kept per SCALE.
+_display_lists = {}  # (draw_fn name, args, SCALE, QUALITY) -> DisplayList
+
+
+def display_list(draw_fn, *args):
+    key = (draw_fn.__name__, args, geometry.SCALE, geometry.QUALITY)
+    dl = _display_lists.get(key)
+    if dl is None:
+        dl = _display_lists[key] = displaylist.record(draw_fn, *args)
+    return dl
+
+
+def mirrored_display_list(draw_fn, *args):
+    """display_list() flipped left to right, for a shape going west."""
+    key = ("mirrored " + draw_fn.__name__, args, geometry.SCALE,
+           geometry.QUALITY)
+    dl = _display_lists.get(key)
+    if dl is None:
+        dl = _display_lists[key] = display_list(draw_fn, *args).mirrored()
+    return dl
+
+
+def display_list_report():
+    """(name, ops, vertices, bytes) for every compiled display list."""
+    rows = []
+    for (name, args, scale, level), dl in _display_lists.items():
+        label = name + ("(%s)" % ", ".join(map(str, args)) if args else "")
+        rows.append((label, len(dl), dl.vertices, dl.nbytes()))
+    return rows
+
+
+def replay_car(t, offset):
+    display_list(draw_car, 0).replay(t, sx(offset))
+
+
+def replay_boat(t, offset):
+    display_list(draw_boat_with_turtle, 0).replay(t, sx(offset))
+
+
+# bounds
+
+# Bounding boxes for viewport culling, in base units and measured from a
+# recording of the shape drawn at its origin, so they hold at any SCALE.
+BOUNDS_MARGIN = 2  # base units kept around the vertices for pen width
+
+_bounds = {}  # (draw_fn name, args) -> box
+
+
+def shape_bounds(draw_fn, *args):
+    key = (draw_fn.__name__, args)
+    box = _bounds.get(key)
+    if box is None:
+        x0, y0, x1, y1 = displaylist.record(draw_fn, *args).bounds()
+        s = geometry.SCALE
+        m = BOUNDS_MARGIN
+        box = _bounds[key] = (x0 / s - m, y0 / s - m, x1 / s + m, y1 / s + m)
+    return box
+
+
+def drawable_bounds():
+    """name -> box of each drawable as drawn at offset 0.
+
+    Cloud groups are "cloud_<kind>"; "bird" covers both wing poses and
+    "windmill" every blade angle.
+    """
+    boxes = {
+        "car": shape_bounds(draw_car, 0),
+        "boat": shape_bounds(draw_boat_with_turtle, 0),
+        "windmill": spatial.union(shape_bounds(draw_windmill, 0, 0),
+                                  shape_bounds(draw_windmill, 45, 0)),
+        "bird": spatial.union(shape_bounds(draw_bird, 0, 0, True),
+                              shape_bounds(draw_bird, 0, 0, False)),
+        "houses": shape_bounds(draw_houses),
+        "leaves": shape_bounds(draw_tree_leaves, 0),
+        "cow": shape_bounds(draw_3d_cow),
+    }
+    for kind in CLOUD_PUFFS:
+        boxes["cloud_" + kind] = shape_bounds(draw_cloud_group, kind, 0, 0)
+    return boxes
+
+
+# keyframes
+#
+# The windmill head only ever shows a few distinct shapes, so each frame
+# looks its shape up by quantized phase in a bounded LRU cache of display
+# lists instead of recomputing the blade trig. (Bird wings have just two
+# poses made of cached ellipse geometry, which replays no faster than it
+# draws; the tree leaves only slide sideways and are moved, not redrawn.)
+KEYFRAME_BUDGET = int(os.environ.get("VILLAGE_KEYFRAME_KB", "256")) * 1024
+WINDMILL_STEP = 3  # degrees between windmill keyframes (its speed per step)
+
+keyframes = displaylist.KeyframeCache(KEYFRAME_BUDGET)
+
+
+def keyframe(key, draw_fn, *args):
+    return keyframes.get((key, geometry.SCALE, geometry.QUALITY),
+                         draw_fn, *args)
+
+
+def windmill_phase(angle):
+    # four blades: the head looks the same every 90 degrees
+    return round(angle % 90 / WINDMILL_STEP) * WINDMILL_STEP % 90
+
+
+def replay_windmill(t, angle, wind_sway):
+    # the tower leans with the wind, so it is cheaper to draw than to key
+    draw_windmill_tower(t, wind_sway)
+    phase = windmill_phase(angle)
+    keyframe(("windmill", phase), draw_windmill_head, phase, 0, 0).replay(
+        t, sx(250), sy(wind_sway))
+
+
+def replay_birds(t, positions, frame):
+    shape = display_list(draw_bird, 0, 0, (frame // 5) % 2 == 0)
+    for x, y in positions:
+        shape.replay(t, sx(x), sy(y))
+
+
+def keyframe_summary():
+    s = keyframes.stats()
+    return ("keyframes %d/%d hit  %d entries  %.1f/%d KB"
+            % (s["hits"], s["hits"] + s["misses"], s["entries"],
+               s["bytes"] / 1024, s["max_bytes"] // 1024))
+
+
+# props
+
+# Shapes the procedural world (world.py) places along the village. Each is
+# recorded where the hand-placed scene has it, and its anchor is the point
+# that ends up at the prop's position: on the ground line for buildings,
+# trees, windmills and cows, the centre for flowers.
+PROP_ANCHORS = {
+    "flower": (0, 0),
+    "windmill": (250, 0),
+    "house_right": (-100, 0),
+    "house_left": (-182, 0),
+    "tree": (-190, 0),
+    "cow": (350, 0),
+}
+PROP_DEPTH = {kind: z for z, kind in enumerate(
+    ("flower", "windmill", "house_right", "house_left", "tree", "cow"))}
+PROP_SWAY = 3  # base units the wind can move leaves and windmill heads by
+# where smoke leaves each house, at its place in the hand-placed village
+CHIMNEYS = {
+    "house_right": (-85, 20),
+    "house_left": (-150, 20),
+}
+
+# props drawn as a single display list; trees and windmills have moving parts
+PROP_SHAPES = {
+    "flower": (draw_flower, 0, 0),
+    "house_right": (draw_house_right,),
+    "house_left": (draw_house_left,),
+    "cow": (draw_3d_cow_batched,),
+}
+
+
+def prop_bounds(kind):
+    """Box around prop `kind` with its anchor at the origin."""
+    if kind == "windmill":
+        box = spatial.union(shape_bounds(draw_windmill, 0, 0),
+                            shape_bounds(draw_windmill, 45, 0))
+    elif kind == "tree":
+        box = spatial.union(shape_bounds(draw_tree_trunk),
+                            shape_bounds(draw_tree_leaves, 0))
+    else:
+        box = shape_bounds(*PROP_SHAPES[kind])
+    ax, ay = PROP_ANCHORS[kind]
+    x0, y0, x1, y1 = spatial.translate(box, -ax, -ay)
+    return (x0 - PROP_SWAY, y0 - PROP_SWAY, x1 + PROP_SWAY, y1 + PROP_SWAY)
+
+
+def replay_prop(t, kind, x, y, angle, wind_sway):
+    """Draw prop `kind` with its anchor at (x, y) in base units."""
+    ax, ay = PROP_ANCHORS[kind]
+    dx, dy = sx(x - ax), sy(y - ay)
+    if kind == "windmill":
+        # as in the hand-placed scene, the head sways half as far as leaves
+        # and the top of the tower goes with it
+        sway = wind_sway * 0.5
+        draw_windmill_tower(t, sway, x - ax, y - ay)
+        phase = windmill_phase(angle)
+        keyframe(("windmill", phase), draw_windmill_head, phase, 0, 0).replay(
+            t, dx + sx(250), dy + sy(sway))
+    elif kind == "tree":
+        display_list(draw_tree_trunk).replay(t, dx, dy)
+        display_list(draw_tree_leaves, 0).replay(t, dx + sx(wind_sway), dy)
+    else:
+        display_list(*PROP_SHAPES[kind]).replay(t, dx, dy)
@@ -0,0 +1,305 @@
+"""Scene files: the static layers of the village as data.
+
+A scene file is JSON holding an ordered list of layers, each a list of
+items in base units. An item is one primitive and the colour it is filled
+with:
+
+    {"color": [r, g, b], "polygon": [[x, y], ...]}
+    {"color": [r, g, b], "ellipse": [cx, cy, rx, ry]}
+    {"color": [r, g, b], "disc": [cx, cy, radius]}     midpoint circle
+    {"color": [r, g, b], "rays": [cx, cy, inner, outer, count]}
+
+A layer with "batch": true has its polygons merged by colour the way the
+cow's are (geometry.batch_parts). scenes/village.json is the village as
+scene.py draws it; `python scenefile.py dump` writes it again from the code.
+
+Compiling tessellates and scales every layer into a display list for the
+current SCALE and writes them out as a JSON header followed by the raw op,
+argument, coordinate and colour arrays, each 8-byte aligned. Loading maps the file
+and hands those arrays to DisplayList as memoryviews, so nothing is parsed
+per primitive until it is drawn.
+
+    python scenefile.py dump [scenes/village.json]
+    python scenefile.py compile SCENE.json [-o SCENE.bin]
+"""
+
+import argparse
+import hashlib
+import json
+import mmap
+import os
+import struct
+import sys
+from array import array
+
+import displaylist
+import geometry
+from geometry import (batch_parts, compile_shape, draw_batches,
+                      draw_circle_with_turtle, draw_polygon, draw_sun_rays,
+                      midpoint_circle_algorithm)
+
+FORMAT = "village-scene"
+VERSION = 1
+MAGIC = b"VSCN0001"
+_PREFIX = struct.Struct("<8sQ")  # magic, header length
+HERE = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_SCENE = os.path.join(HERE, "scenes", "village.json")
+
+
+# scene description
+
+PRIMITIVES = ("polygon", "ellipse", "disc", "rays")
+
+
+def load(path):
+    """Read a scene file; raises ValueError if it is not one."""
+    with open(path) as f:
+        scene = json.load(f)
+    if scene.get("format") != FORMAT or scene.get("version") != VERSION:
+        raise ValueError("%s: not a version %d %s file"
+                         % (path, VERSION, FORMAT))
+    for layer in scene["layers"]:
+        for item in layer["items"]:
+            if not any(kind in item for kind in PRIMITIVES):
+                raise ValueError("%s: layer %s has an item with none of %s"
+                                 % (path, layer["name"], ", ".join(PRIMITIVES)))
+    return scene
+
+
+def draw_items(t, items):
+    for item in items:
+        t.color(*item["color"])
+        if "polygon" in item:
+            draw_polygon(t, item["polygon"])
+        elif "ellipse" in item:
+            cx, cy, rx, ry = item["ellipse"]
+            draw_circle_with_turtle(t, rx, ry, cx, cy)
+        elif "disc" in item:
+            cx, cy, radius = item["disc"]
+            midpoint_circle_algorithm(t, radius, cx, cy)
+        else:
+            draw_sun_rays(t, *item["rays"])
+
+
+def draw_layer(t, layer):
+    """Draw one layer of a loaded scene with pen t."""
+    if layer.get("batch"):
+        draw_batches(t, batch_parts(compile_shape(draw_items, layer["items"])))
+    else:
+        draw_items(t, layer["items"])
+
+
+
+# compiled form
+
+def compile_scene(scene):
+    """{layer name: DisplayList} at the current SCALE."""
+    return {layer["name"]: displaylist.record(draw_layer, layer)
+            for layer in scene["layers"]}
+
+
+def _align(n):
+    return (n + 7) & ~7
+
+
+def write_compiled(path, layers, source=""):
+    """Write {name: DisplayList} to `path` (atomically)."""
+    chunks = []
+    offset = 0
+    header = {"scale": geometry.SCALE, "source": source,
+              "byteorder": sys.byteorder, "layers": []}
+    for name, dl in layers.items():
+        if any(len(c) != 3 for c in dl.colors):
+            raise ValueError("layer %s: colours must be (r, g, b)" % name)
+        entry = {"name": name}
+        colors = array("d", [v for c in dl.colors for v in c])
+        for field, values in (("coords", dl.coords), ("colors", colors),
+                              ("args", dl.args), ("ops", dl.ops)):
+            data = values.tobytes()
+            entry[field] = [offset, len(values)]
+            chunks.append(data + bytes(_align(len(data)) - len(data)))
+            offset += _align(len(data))
+        header["layers"].append(entry)
+
+    blob = json.dumps(header).encode()
+    blob += b" " * (_align(_PREFIX.size + len(blob)) - _PREFIX.size - len(blob))
+    tmp = "%s.%d.tmp" % (path, os.getpid())
+    with open(tmp, "wb") as f:
+        f.write(_PREFIX.pack(MAGIC, len(blob)))
+        f.write(blob)
+        for chunk in chunks:
+            f.write(chunk)
+    os.replace(tmp, path)
+
+
+def load_compiled(path):
+    """Map a compiled scene; returns (header, {layer name: DisplayList})."""
+    with open(path, "rb") as f:
+        mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    magic, size = _PREFIX.unpack_from(mm)
+    if magic != MAGIC:
+        raise ValueError("%s: not a compiled scene" % path)
+    header = json.loads(mm[_PREFIX.size:_PREFIX.size + size])
+    if header["byteorder"] != sys.byteorder:
+        raise ValueError("%s: compiled on a %s-endian machine"
+                         % (path, header["byteorder"]))
+    data = memoryview(mm)[_PREFIX.size + size:]
+    layers = {}
+    for entry in header["layers"]:
+        dl = displaylist.DisplayList()
+        for field, code in (("coords", "d"), ("args", "I"), ("ops", "B")):
+            setattr(dl, field, _section(data, entry[field], code))
+        rgb = iter(_section(data, entry["colors"], "d"))
+        dl.colors = list(zip(rgb, rgb, rgb))
+        layers[entry["name"]] = dl
+    return header, layers
+
+
+def _section(data, entry, code):
+    start, count = entry
+    return data[start:start + count * struct.calcsize(code)].cast(code)
+
+
+def source_hash(path):
+    with open(path, "rb") as f:
+        return hashlib.sha1(f.read()).hexdigest()[:16]
+
+
+# The code and settings that turn a scene into vertices. A compiled file
+# written by any other version of them is not picked up.
+COMPILER_SOURCES = ("geometry.py", "displaylist.py", "scenefile.py")
+_compiler_code = None
+
+
+def compiler_hash():
+    global _compiler_code
+    if _compiler_code is None:
+        digest = hashlib.sha1()
+        for name in COMPILER_SOURCES:
+            with open(os.path.join(HERE, name), "rb") as f:
+                digest.update(f.read())
+        _compiler_code = digest.hexdigest()
+    settings = repr((geometry.QUALITY, geometry.ELLIPSE_TOLERANCE_PX))
+    return hashlib.sha1((_compiler_code + settings).encode()).hexdigest()[:16]
+
+
+def compiled_path(path, cache_dir):
+    return os.path.join(cache_dir, "scene-%s-%s-%g.bin"
+                        % (source_hash(path), compiler_hash(), geometry.SCALE))
+
+
+def open_scene(path, cache_dir):
+    """{layer name: DisplayList} for the scene file at `path`.
+
+    The compiled form for the current SCALE is kept in `cache_dir` and
+    rebuilt whenever the scene file, the scale or the code and settings
+    that tessellate it change.
+    """
+    compiled = compiled_path(path, cache_dir)
+    if not os.path.exists(compiled):
+        os.makedirs(cache_dir, exist_ok=True)
+        write_compiled(compiled, compile_scene(load(path)), source_hash(path))
+    return load_compiled(compiled)[1]
+
+
+
+# the built-in village
+
+class _Capture:
+    """Pen stand-in that turns the draw_* calls of scene.py into items."""
+
+    def __init__(self):
+        self.items = []
+        self.color_ = None
+
+    def color(self, *args):
+        self.color_ = list(args[0] if len(args) == 1 else args)
+
+    def clear(self):
+        pass
+
+    def add(self, kind, value):
+        self.items.append({"color": self.color_, kind: value})
+
+
+def capture(draw_fn, *args):
+    """Items drawn by one of scene.py's draw_* functions."""
+    import scene
+
+    pen = _Capture()
+    patched = {
+        "draw_polygon": lambda t, points: t.add(
+            "polygon", [list(p) for p in points]),
+        "draw_circle_with_turtle": lambda t, rx, ry, cx, cy: t.add(
+            "ellipse", [cx, cy, rx, ry]),
+        "midpoint_circle_algorithm": lambda t, radius, cx, cy: t.add(
+            "disc", [cx, cy, radius]),
+        "draw_sun_rays": lambda t, cx, cy, inner, outer, count: t.add(
+            "rays", [cx, cy, inner, outer, count]),
+    }
+    saved = {name: getattr(scene, name) for name in patched}
+    try:
+        for name, fn in patched.items():
+            setattr(scene, name, fn)
+        draw_fn(pen, *args)
+    finally:
+        for name, fn in saved.items():
+            setattr(scene, name, fn)
+    return pen.items
+
+
+def village_layers():
+    """The static layers of the hand-placed village, in drawing order."""
+    import scene
+
+    return [
+        {"name": "ground", "items": capture(scene.draw_ground)},
+        {"name": "flowers", "items": capture(scene.draw_flowers)},
+        {"name": "road", "items": capture(scene.draw_road)},
+        {"name": "bridge", "items": capture(scene.draw_bridge)},
+        {"name": "houses", "items": capture(scene.draw_houses)},
+        {"name": "leaves", "items": capture(scene.draw_tree_leaves, 0)},
+        {"name": "cow", "batch": True,
+         "items": capture(scene.draw_3d_cow_polygons)},
+    ]
+
+
+def dump(scene, path):
+    """Write `scene` as JSON with one item per line."""
+    lines = ['{"format": %s, "version": %d, "layers": ['
+             % (json.dumps(FORMAT), VERSION)]
+    for i, layer in enumerate(scene["layers"]):
+        options = "".join(", %s: %s" % (json.dumps(k), json.dumps(v))
+                          for k, v in layer.items() if k not in ("name", "items"))
+        lines.append('  {"name": %s%s, "items": ['
+                     % (json.dumps(layer["name"]), options))
+        items = [json.dumps(item) for item in layer["items"]]
+        lines.append(",\n".join("    " + item for item in items))
+        lines.append("  ]}" + ("," if i < len(scene["layers"]) - 1 else ""))
+    lines.append("]}")
+    with open(path, "w") as f:
+        f.write("\n".join(lines) + "\n")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="scene file tools")
+    commands = parser.add_subparsers(dest="command", required=True)
+    dump_cmd = commands.add_parser("dump", help="write the built-in village")
+    dump_cmd.add_argument("path", nargs="?", default=DEFAULT_SCENE)
+    compile_cmd = commands.add_parser("compile", help="compile a scene file")
+    compile_cmd.add_argument("path")
+    compile_cmd.add_argument("-o", "--out")
+    args = parser.parse_args(argv)
+
+    if args.command == "dump":
+        dump({"layers": village_layers()}, args.path)
+        print("wrote %s" % args.path)
+    else:
+        out = args.out or os.path.splitext(args.path)[0] + ".bin"
+        write_compiled(out, compile_scene(load(args.path)),
+                       source_hash(args.path))
+        print("wrote %s (SCALE %g)" % (out, geometry.SCALE))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+"""Per-layer update rates from a deadline heap (temporal level of detail).
+
+Each layer has the rate it needs redrawing at, and a deadline: the time
+of its next redraw. The deadlines sit in a heap, so finding the layers
+that are due only looks at the ones whose deadline has passed, however
+many layers there are. A due layer's deadline moves on by its interval;
+one that fell more than an interval behind (a slow frame) starts again
+from now rather than catching up with a burst of redraws.
+
+Layers that change on every simulation step also change on every frame
+drawn in between them, so with `every` set, a layer at that rate or
+faster skips the heap and is due on every call.
+"""
+
+import heapq
+
+# deadlines this close to now count as reached, so a 50 Hz layer on a
+# 50 Hz clock is due on every step despite rounding
+EPSILON = 1e-6
+
+
+class RateScheduler:
+    def __init__(self, rates, every=None):
+        """rates maps each layer name to its redraws per second; layers at
+        `every` or more are redrawn on every frame."""
+        self.rates = dict(rates)
+        self.always = {name for name, rate in self.rates.items()
+                       if every is not None and rate >= every}
+        self.reset()
+
+    def reset(self, now=0.0):
+        self.start = self.now = now
+        self.heap = [(now, name) for name in sorted(self.rates)
+                     if name not in self.always]
+        heapq.heapify(self.heap)
+        self.redraws = dict.fromkeys(self.rates, 0)
+
+    def due(self, now):
+        """The set of layers to redraw at time `now` (seconds)."""
+        if now < self.now:
+            self.reset(now)  # the clock went back: start over
+        self.now = now
+        heap = self.heap
+        due = set(self.always)
+        for name in self.always:
+            self.redraws[name] += 1
+        while heap and heap[0][0] <= now + EPSILON:
+            deadline, name = heap[0]
+            due.add(name)
+            self.redraws[name] += 1
+            deadline += 1.0 / self.rates[name]
+            if deadline <= now + EPSILON:
+                deadline = now + 1.0 / self.rates[name]
+            heapq.heapreplace(heap, (deadline, name))
+        return due
+
+    def stats(self):
+        """name -> redraws per second since the start."""
+        elapsed = self.now - self.start
+        return {name: count / elapsed if elapsed else 0.0
+                for name, count in self.redraws.items()}
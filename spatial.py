@@ -0,0 +1,97 @@
+"""Uniform-grid spatial index for bounding boxes.
+
+Boxes are (x0, y0, x1, y1) tuples with x0 <= x1 and y0 <= y1. Each key is
+filed in every grid cell its box touches, so a query only looks at the keys
+in the cells under the query box instead of at every box in the index.
+Moving a key within the same cells only updates its box.
+"""
+
+import math
+
+
+def union(*boxes):
+    """Smallest box containing all of `boxes`."""
+    return (min(b[0] for b in boxes), min(b[1] for b in boxes),
+            max(b[2] for b in boxes), max(b[3] for b in boxes))
+
+
+def translate(box, dx, dy):
+    return (box[0] + dx, box[1] + dy, box[2] + dx, box[3] + dy)
+
+
+def overlaps(a, b):
+    """True if the boxes share any point, edges included."""
+    return a[0] <= b[2] and b[0] <= a[2] and a[1] <= b[3] and b[1] <= a[3]
+
+
+class SpatialGrid:
+    """Keys filed by bounding box in square cells of side `cell`."""
+
+    def __init__(self, cell):
+        self.cell = cell
+        self.cells = {}   # (i, j) -> set of keys
+        self.boxes = {}   # key -> box
+        self._spans = {}  # key -> (i0, j0, i1, j1) cell range it is filed in
+
+    def __len__(self):
+        return len(self.boxes)
+
+    def __contains__(self, key):
+        return key in self.boxes
+
+    def _span(self, box):
+        c = self.cell
+        return (math.floor(box[0] / c), math.floor(box[1] / c),
+                math.floor(box[2] / c), math.floor(box[3] / c))
+
+    def insert(self, key, box):
+        """File `key` under `box`, moving it if it is already in the grid."""
+        span = self._span(box)
+        old = self._spans.get(key)
+        self.boxes[key] = box
+        if span == old:
+            return
+        if old is not None:
+            self._unfile(key, old)
+        self._spans[key] = span
+        i0, j0, i1, j1 = span
+        cells = self.cells
+        for i in range(i0, i1 + 1):
+            for j in range(j0, j1 + 1):
+                bucket = cells.get((i, j))
+                if bucket is None:
+                    bucket = cells[i, j] = set()
+                bucket.add(key)
+
+    def remove(self, key):
+        self._unfile(key, self._spans.pop(key))
+        del self.boxes[key]
+
+    def _unfile(self, key, span):
+        i0, j0, i1, j1 = span
+        cells = self.cells
+        for i in range(i0, i1 + 1):
+            for j in range(j0, j1 + 1):
+                bucket = cells[i, j]
+                bucket.discard(key)
+                if not bucket:
+                    del cells[i, j]
+
+    def query(self, box):
+        """Set of keys whose boxes overlap `box`."""
+        i0, j0, i1, j1 = self._span(box)
+        cells = self.cells
+        found = set()
+        if (i1 - i0 + 1) * (j1 - j0 + 1) > len(cells):
+            # the box covers more cells than are occupied
+            for (i, j), bucket in cells.items():
+                if i0 <= i <= i1 and j0 <= j <= j1:
+                    found |= bucket
+        else:
+            for i in range(i0, i1 + 1):
+                for j in range(j0, j1 + 1):
+                    bucket = cells.get((i, j))
+                    if bucket:
+                        found |= bucket
+        boxes = self.boxes
+        return {key for key in found if overlaps(boxes[key], box)}
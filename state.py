@@ -0,0 +1,216 @@
+"""Animation state for the village scene.
+
+The module-level variables are the state of the frame being drawn. They are
+derived in closed form from the frame index (state_at), so the live loop,
+headless rendering and offline export all agree on every frame.
+"""
+
+import math
+import os
+import random
+import time
+from collections import namedtuple
+
+from geometry import SPEED_FACTOR
+
+
+# animation variables 
+
+bx = 50          # boat/cloud offset
+car_x = -450     # car position
+windmill_angle = 0
+bird_positions = [[-400, 180], [-350, 200], [-300, 190]]
+wind_offset = 0
+frame_count = 0
+camera_x = 0.0   # scroll position over the procedural world
+render_time = 0.0  # simulation time of the drawn state, in seconds
+
+SEED = 0  # picks the heights birds re-enter at after wrapping
+
+
+
+# closed-form animation state
+#
+# Every moving quantity is a function of the frame index, so any frame can
+# be produced without simulating the ones before it. step() goes through
+# state_at() as well, which keeps the live loop and offline export in step.
+
+BOAT_STEP = 1.9 * SPEED_FACTOR
+CAR_STEP = 2 * SPEED_FACTOR
+BIRD_STEP = 0.5 * SPEED_FACTOR
+BIRD_BOB = 0.2 * SPEED_FACTOR
+BIRD_START = [(-400, 180), (-350, 200), (-300, 190)]
+SCROLL_STEP = float(os.environ.get("VILLAGE_SCROLL", "1")) * SPEED_FACTOR
+
+FrameState = namedtuple(
+    "FrameState",
+    "frame bx car_x windmill_angle bird_positions wind_offset camera_x")
+
+
+def _first_past(start, step, limit):
+    """Smallest k >= 1 with start + k * step > limit."""
+    k = max(1, int((limit - start) / step) + 1)
+    while k > 1 and start + (k - 1) * step > limit:
+        k -= 1
+    while start + k * step <= limit:
+        k += 1
+    return k
+
+
+def wrapped_motion(start, step, limit, reset, n):
+    """Replay `x += step; if x > limit: x = reset` n times in O(1).
+
+    Returns (x, lap, steps taken in the current lap, frame the lap began).
+    """
+    first = _first_past(start, step, limit)
+    if n < first:
+        return start + n * step, 0, n, 0
+    period = _first_past(reset, step, limit)
+    lap, j = divmod(n - first, period)
+    return reset + j * step, lap + 1, j, first + lap * period
+
+
+def _sine_sum(a, h, count):
+    """sum(sin(a + q * h) for q in range(count))"""
+    if count <= 0:
+        return 0.0
+    return math.sin(count * h / 2) / math.sin(h / 2) * math.sin(a + (count - 1) * h / 2)
+
+
+def bird_reentry_height(seed, bird, lap):
+    return random.Random("%s:%d:%d" % (seed, bird, lap)).randint(160, 220)
+
+
+def wind_at(frame_index):
+    """How far the wind pushes the leaves on frame `frame_index` (base units)."""
+    return 3 * math.sin(frame_index * 0.05)
+
+
+def state_at(frame_index, seed=None):
+    """The animation state drawn on frame `frame_index`."""
+    if seed is None:
+        seed = SEED
+    n = frame_index
+    boat_x = wrapped_motion(50, BOAT_STEP, 500, -550, n)[0]
+    car = wrapped_motion(-450, CAR_STEP, 500, -450, n)[0]
+
+    birds = []
+    for i, (x0, y0) in enumerate(BIRD_START):
+        x, lap, j, lap_start = wrapped_motion(x0, BIRD_STEP, 500, -450, n)
+        x_start = x0 if lap == 0 else -450
+        y = y0 if lap == 0 else bird_reentry_height(seed, i, lap)
+        # the bob on frame f is sin(0.1 f + 0.01 x) with x already advanced
+        y += BIRD_BOB * _sine_sum(0.1 * lap_start + 0.01 * (x_start + BIRD_STEP),
+                                  0.1 + 0.01 * BIRD_STEP, j)
+        birds.append([x, y])
+
+    return FrameState(n, boat_x, car, (3 * n) % 360, birds,
+                      wind_at(n), SCROLL_STEP * n)
+
+
+def apply_state(state, at=None):
+    """Make `state` the current one. `at` is the simulation time it is
+    drawn at, in seconds, for a state interpolated between two steps."""
+    global bx, car_x, windmill_angle, wind_offset, frame_count, camera_x
+    global render_time
+    frame_count = state.frame
+    render_time = state.frame / SIM_HZ if at is None else at
+    bx = state.bx
+    car_x = state.car_x
+    windmill_angle = state.windmill_angle
+    wind_offset = state.wind_offset
+    camera_x = state.camera_x
+    bird_positions[:] = [list(p) for p in state.bird_positions]
+
+
+def current_state():
+    """The module-level state as a FrameState."""
+    return FrameState(frame_count, bx, car_x, windmill_angle,
+                      [list(p) for p in bird_positions], wind_offset, camera_x)
+
+
+def lerp_state(a, b, alpha):
+    """Blend two consecutive states; anything that wrapped snaps to b."""
+    def mix(p, q):
+        return q if q < p else p + (q - p) * alpha  # everything moves right
+
+    birds = []
+    for pa, pb in zip(a.bird_positions, b.bird_positions):
+        if pb[0] < pa[0]:
+            birds.append(list(pb))
+        else:
+            birds.append([mix(pa[0], pb[0]), pa[1] + (pb[1] - pa[1]) * alpha])
+    angle = (a.windmill_angle + ((b.windmill_angle - a.windmill_angle) % 360) * alpha) % 360
+    return FrameState(a.frame, mix(a.bx, b.bx), mix(a.car_x, b.car_x), angle,
+                      birds, a.wind_offset + (b.wind_offset - a.wind_offset) * alpha,
+                      a.camera_x + (b.camera_x - a.camera_x) * alpha)
+
+
+
+# fixed-timestep loop
+
+SIM_HZ = 50  # simulation steps per second; one step is the old 20 ms tick
+TARGET_FPS = float(os.environ.get("VILLAGE_FPS", "50"))
+MAX_CATCHUP_STEPS = 25  # after a longer stall (e.g. a suspended laptop) the lost time is dropped
+
+
+class GameLoop:
+    """Fixed simulation steps on a monotonic clock, rendering in between.
+
+    advance() turns the wall time since the last call into whole simulation
+    steps and returns the state to draw, interpolated between the last two
+    steps. Because state_at() is closed-form, taking several steps costs the
+    same as taking one, so a slow frame just means the next one skips ahead
+    instead of the whole scene slowing down.
+    """
+
+    def __init__(self, sim_hz=SIM_HZ, fps=TARGET_FPS, clock=time.perf_counter):
+        self.dt = 1.0 / sim_hz
+        self.frame_interval = 1.0 / fps
+        self.clock = clock
+        self.sim_frame = 0
+        self.accumulator = 0.0
+        self.time = 0.0    # simulation time of the state advance() returned
+        self.skipped = 0   # simulation steps that never got their own frame
+        self.dropped = 0   # steps thrown away after a stall
+        self._last = None
+        self._deadline = None
+
+    def advance(self):
+        now = self.clock()
+        if self._last is None:
+            self._last = self._deadline = now
+        self.accumulator += now - self._last
+        self._last = now
+
+        steps = int(self.accumulator / self.dt)
+        if steps > MAX_CATCHUP_STEPS:
+            self.dropped += steps - MAX_CATCHUP_STEPS
+            self.accumulator -= (steps - MAX_CATCHUP_STEPS) * self.dt
+            steps = MAX_CATCHUP_STEPS
+        if steps:
+            self.accumulator -= steps * self.dt
+            self.skipped += steps - 1
+            self.sim_frame += steps
+
+        alpha = self.accumulator / self.dt
+        self.time = (self.sim_frame + alpha) * self.dt
+        return lerp_state(state_at(self.sim_frame), state_at(self.sim_frame + 1),
+                          alpha)
+
+    def next_delay_ms(self):
+        """Milliseconds until the next frame is due, never negative."""
+        now = self.clock()
+        self._deadline += self.frame_interval
+        if self._deadline < now:
+            # running late: start the schedule again from now
+            self._deadline = now
+        return max(1, int(round(1000 * (self._deadline - now))))
+
+
+game_loop = GameLoop()
+
+
+def step():
+    """Advance the animation state by one frame (headless rendering)."""
+    apply_state(state_at(frame_count + 1))
@@ -0,0 +1,47 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+
+import flock  # noqa: E402
+
+
+def advanced(frame, count=200, seed=3):
+    f = flock.Flock(count, seed)
+    f.advance_to(frame)
+    return f
+
+
+def test_seeded_flock_is_deterministic():
+    a, b = advanced(30), advanced(30)
+    assert np.array_equal(a.pos, b.pos)
+    assert np.array_equal(a.vel, b.vel)
+    assert not np.array_equal(a.pos, advanced(30, seed=4).pos)
+
+
+@pytest.mark.parametrize("back_to", [120, 70, 20])
+def test_going_back_replays_the_same_frame(back_to):
+    f = advanced(130)
+    f.advance_to(back_to)
+    fresh = advanced(back_to)
+    assert f.frame == back_to
+    assert np.array_equal(f.pos, fresh.pos)
+    assert np.array_equal(f.vel, fresh.vel)
+    # and on again from there
+    f.advance_to(130)
+    assert np.array_equal(f.pos, advanced(130).pos)
+
+
+def test_grid_finds_the_pairs_brute_force_does():
+    f = advanced(10, count=40)
+    i, j, dx, dy = f.neighbor_pairs()
+    found = set(zip(i.tolist(), j.tolist()))
+
+    width = flock.SKY_X[1] - flock.SKY_X[0]
+    x, y = f.pos[:, 0], f.pos[:, 1]
+    ddx = x[None, :] - x[:, None]
+    ddx = (ddx + width / 2) % width - width / 2
+    ddy = y[None, :] - y[:, None]
+    near = ddx ** 2 + ddy ** 2 < flock.NEIGHBOR_RADIUS ** 2
+    np.fill_diagonal(near, False)
+    assert found == set(zip(*map(np.ndarray.tolist, np.nonzero(near))))
+    assert found  # the flock is bunched enough to have some
@@ -0,0 +1,54 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+
+import geometry  # noqa: E402
+import raster  # noqa: E402
+from geometry import draw_circle_with_turtle  # noqa: E402
+from scene import TREE_LEAVES, draw_tree_leaves  # noqa: E402
+
+
+def crown_mask(draw):
+    fb = raster.Framebuffer(geometry.TARGET_W, geometry.TARGET_H)
+    draw(fb)
+    return fb.pixels.any(axis=2)
+
+
+def drawn(sway):
+    return crown_mask(lambda fb: draw_tree_leaves(
+        raster.RasterPen(fb, fb.width, fb.height), sway))
+
+
+def puff_edges(sway):
+    """Pixels beside the left or right edge of any one puff of the crown."""
+    edge = np.zeros((geometry.TARGET_H, geometry.TARGET_W), dtype=bool)
+    for rx, ry, x, y in TREE_LEAVES:
+        def draw(fb):
+            pen = raster.RasterPen(fb, fb.width, fb.height)
+            pen.color(1, 1, 1)
+            draw_circle_with_turtle(pen, rx, ry, x + sway, y)
+        puff = crown_mask(draw)
+        step = puff[:, 1:] != puff[:, :-1]
+        edge[:, 1:] |= step
+        edge[:, :-1] |= step
+    return edge
+
+
+def blitted(sway):
+    # what the leaves layer does: drawn once unswayed, then moved
+    pen = raster.RasterPen(raster.SpriteBuilder(),
+                           geometry.TARGET_W, geometry.TARGET_H)
+    draw_tree_leaves(pen, 0)
+    sprite = pen.target.build()
+    return crown_mask(lambda fb: sprite.blit(fb, geometry.sx(sway), 0))
+
+
+@pytest.mark.parametrize("sway", [0.7, 1.3, -2.2, 3.0])
+def test_moved_leaves_are_rounded_to_whole_pixels(sway):
+    moved = blitted(sway)
+    # exactly the crown drawn at the sway rounded to a whole pixel ...
+    whole = round(geometry.sx(sway)) / geometry.SCALE
+    assert (moved == drawn(whole)).all()
+    # ... so it is off the exact crown by at most half a pixel sideways:
+    # any pixel that differs lies beside the left or right edge of a puff
+    assert not (moved != drawn(sway))[~puff_edges(sway)].any()
@@ -0,0 +1,61 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+
+import particles  # noqa: E402
+
+
+def no_wind(n):
+    return 0.0
+
+
+def check_free_list(pool):
+    free = pool.free[:pool.free_count]
+    assert 0 <= pool.free_count <= pool.capacity
+    assert len(np.unique(free)) == len(free)
+    # the free slots are exactly the dead ones
+    assert set(free.tolist()) == set(np.flatnonzero(~pool.alive).tolist())
+
+
+def test_live_count_holds_steady_over_a_long_run():
+    pool = particles.Particles("rain", seed=1)
+    live = []
+    for n in range(1500):
+        pool.step(no_wind(n))
+        live.append(pool.live)
+        if n % 100 == 0:
+            check_free_list(pool)
+    # rain lives 40 to 56 steps, so the count has long since levelled off
+    settled = live[200:]
+    assert max(settled) - min(settled) < 0.1 * np.mean(settled)
+    assert pool.dropped == 0
+
+
+def test_a_full_pool_drops_what_does_not_fit():
+    pool = particles.Particles("snow", capacity=500, seed=2)
+    for n in range(300):
+        pool.step(no_wind(n))
+        assert pool.live <= pool.capacity
+    check_free_list(pool)
+    assert pool.live == pool.capacity
+    assert pool.dropped > 0
+
+
+def test_going_back_replays_the_same_frame():
+    def sources(n):
+        return [(-100, 0), (50 + n % 7, 10)]
+
+    def advanced(frame):
+        pool = particles.Particles("smoke", seed=3)
+        pool.advance_to(frame, lambda n: n * 0.01, sources)
+        return pool
+
+    pool = advanced(160)
+    for back_to in (140, 60, 10):
+        pool.advance_to(back_to, lambda n: n * 0.01, sources)
+        fresh = advanced(back_to)
+        assert pool.live == fresh.live
+        assert np.array_equal(pool.alive, fresh.alive)
+        assert np.array_equal(pool.x[pool.alive], fresh.x[fresh.alive])
+        assert np.array_equal(pool.y[pool.alive], fresh.y[fresh.alive])
+        check_free_list(pool)
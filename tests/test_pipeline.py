@@ -0,0 +1,50 @@
+import threading
+
+import pytest
+
+from pipeline import Pipeline
+
+
+def counting_pipeline():
+    computed = []
+    lock = threading.Lock()
+
+    def produce(job):
+        with lock:
+            computed.append(job)
+        return job * 10
+
+    return Pipeline(produce), computed
+
+
+def test_every_job_is_computed_once():
+    pipe, computed = counting_pipeline()
+    try:
+        assert pipe.exchange(1) == 10   # computed on the spot
+        assert pipe.exchange(2) == 10   # shown again while 2 is computed
+        assert pipe.exchange(3) == 20
+        assert pipe.exchange(4) == 30
+        pipe.drain()
+        assert pipe.exchange(5) == 50   # nothing to return but its own
+        assert pipe.exchange(6) == 50
+        pipe.drain()
+        assert computed == [1, 2, 3, 4, 5, 6]
+        assert pipe.stats()["jobs"] == 6
+    finally:
+        pipe.close()
+
+
+def test_errors_come_back_from_exchange():
+    def produce(job):
+        if job == 2:
+            raise ValueError(job)
+        return job
+
+    pipe = Pipeline(produce)
+    try:
+        assert pipe.exchange(1) == 1
+        assert pipe.exchange(2) == 1
+        with pytest.raises(ValueError, match="2"):
+            pipe.exchange(3)
+    finally:
+        pipe.close()
@@ -0,0 +1,27 @@
+from profiler import FrameProfiler, percentile
+
+
+def test_percentile_nearest_rank():
+    values = list(range(1, 101))
+    assert percentile(values, 50) == 50
+    assert percentile(values, 95) == 95
+    assert percentile(values, 99) == 99
+    assert percentile(values, 100) == 100
+    assert percentile(values, 0) == 1
+
+
+def test_percentile_short_and_empty():
+    assert percentile([3.0, 7.0], 50) == 3.0
+    assert percentile([3.0, 7.0], 95) == 7.0
+    assert percentile([], 95) == 0.0
+
+
+def test_item_count_only_where_there_is_a_canvas():
+    prof = FrameProfiler(["draw"])
+    prof.begin()
+    prof.mark("draw")
+    prof.end()
+    assert not any("canvas items" in line for line in prof.summary_lines())
+    prof.begin()
+    prof.end(12)
+    assert "12 canvas items" in prof.summary_lines()
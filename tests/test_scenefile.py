@@ -0,0 +1,21 @@
+import geometry
+import scenefile
+
+
+def test_compiled_path_follows_tessellation_settings(tmp_path):
+    path = scenefile.DEFAULT_SCENE
+    before = scenefile.compiled_path(path, tmp_path)
+    saved = geometry.ELLIPSE_TOLERANCE_PX
+    try:
+        geometry.ELLIPSE_TOLERANCE_PX = saved * 2
+        assert scenefile.compiled_path(path, tmp_path) != before
+    finally:
+        geometry.ELLIPSE_TOLERANCE_PX = saved
+    assert scenefile.compiled_path(path, tmp_path) == before
+
+
+def test_village_scene_matches_dump(tmp_path):
+    out = tmp_path / "village.json"
+    scenefile.main(["dump", str(out)])
+    with open(scenefile.DEFAULT_SCENE) as f:
+        assert out.read_text() == f.read()
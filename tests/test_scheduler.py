@@ -0,0 +1,37 @@
+import pytest
+
+import scheduler
+
+
+def test_layers_at_the_step_rate_are_due_on_every_frame():
+    layers = scheduler.RateScheduler({"car": 50, "boat": 25}, every=50)
+    # four frames per 20 ms simulation step
+    due = [layers.due(i * 0.005) for i in range(16)]
+    assert all("car" in d for d in due)
+    assert [i for i, d in enumerate(due) if "boat" in d] == [0, 8]
+    assert layers.stats() == {"car": 16 / 0.075, "boat": 2 / 0.075}
+
+
+def test_render_frames_between_deadlines_skip_slow_layers():
+    layers = scheduler.RateScheduler({"leaves": 10})
+    assert layers.due(0.0) == {"leaves"}
+    assert layers.due(0.05) == set()
+    assert layers.due(0.1) == {"leaves"}
+
+
+def test_only_live_layers_are_scheduled():
+    import firstfile
+
+    rates = firstfile.layer_rates("clouds=10,particles=5")
+    assert rates["clouds"] == 10
+    # the plain scene has no procedural world and no particles
+    assert "world" not in rates and "particles" not in rates
+    assert set(rates) == set(firstfile.live_layers())
+
+
+@pytest.mark.parametrize("item", ["clouds", "clouds=x", "clouds=0", "cloud=10"])
+def test_a_bad_rates_item_is_named(item):
+    import firstfile
+
+    with pytest.raises(ValueError, match=repr(item)):
+        firstfile.layer_rates("birds=25," + item)
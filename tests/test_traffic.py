@@ -0,0 +1,76 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+
+import traffic  # noqa: E402
+from geometry import sx  # noqa: E402
+from scene import display_list, draw_car, mirrored_display_list  # noqa: E402
+
+
+@pytest.mark.parametrize("cars", [1, 7, 500])
+def test_no_two_vehicles_in_a_lane_overlap(cars):
+    store = traffic.Traffic({"car": cars, "boat": 6}, seed=5)
+    for _ in range(600):
+        store.step()
+        for lane in range(len(store.lane_y)):
+            rows = np.flatnonzero(store.lane == lane)
+            if len(rows) < 2:
+                continue
+            x = np.sort(store.x[rows])
+            # the gaps between neighbours, and round the loop from the
+            # last one back to the first
+            gaps = np.r_[np.diff(x), x[0] + store.lane_len[lane] - x[-1]]
+            assert gaps.min() >= store.length[rows[0]] + traffic.MIN_GAP - 1e-9
+
+
+def test_lanes_take_only_what_fits():
+    store = traffic.Traffic({"car": 500})
+    per_lane = traffic.lane_capacity("car")
+    assert store.counts == {"car": 2 * per_lane}
+    assert store.stats()["turned_away"] == 500 - 2 * per_lane
+    # a full road is busy: more than half of it is in view at once
+    assert len(store.in_view("car")) > per_lane
+
+
+def test_going_back_replays_the_same_frame():
+    store = traffic.Traffic({"car": 12, "boat": 4}, seed=2)
+    store.advance_to(180)
+    for back_to in (160, 40):
+        store.advance_to(back_to)
+        fresh = traffic.Traffic({"car": 12, "boat": 4}, seed=2)
+        fresh.advance_to(back_to)
+        assert np.array_equal(store.x, fresh.x)
+        assert np.array_equal(store.v, fresh.v)
+
+
+class Stamps:
+    """A pen that keeps the x of every vertex it is sent to."""
+
+    def __init__(self):
+        self.xs = []
+
+    def goto(self, x, y=None):
+        self.xs.append(x)
+
+    def color(self, *args):
+        pass
+
+    penup = pendown = begin_fill = end_fill = pensize = color
+
+
+def test_westbound_cars_face_west():
+    east = display_list(draw_car, 0)
+    west = mirrored_display_list(draw_car, 0)
+    assert west.bounds() == east.bounds()
+    x0, _, x1, _ = east.bounds()
+    assert list(west.coords[0::2]) == [x0 + x1 - x for x in east.coords[0::2]]
+
+    # one car a lane: the eastbound lane is drawn first, then the westbound
+    store = traffic.Traffic({"car": 2})
+    assert list(store.lane_dir) == [1, -1]
+    pen = Stamps()
+    store.draw(pen, "car", -1e9, 1e9)
+    for shape, row, xs in ((east, 0, pen.xs[:east.vertices]),
+                           (west, 1, pen.xs[east.vertices:])):
+        assert xs == pytest.approx([x + sx(store.x[row])
+                                    for x in shape.coords[0::2]])
@@ -0,0 +1,208 @@
+"""Cars on the road and boats on the river, kept in an array-backed store.
+
+A Traffic store holds every vehicle as one row of parallel NumPy columns
+(kind, lane, distance travelled, speed, top speed) instead of a module
+global or an object each, so a step moves all of them with a handful of
+whole-array operations. Each lane is a loop running one way across the
+scene: a vehicle that leaves on one side comes back on the other as soon
+as it is out of view, so every vehicle a lane holds is on screen about
+once a loop. A lane takes as many vehicles as fit round its loop with
+LOOP_SLACK to spare; any more than that asked for are not placed.
+
+Rows are sorted by lane and then by position, and nobody overtakes, so a
+vehicle's leader is always the next row of its lane (the lane's front
+vehicle follows the last one, a loop further on). Each step a vehicle
+speeds up towards its top speed but never past MIN_GAP behind where its
+leader was; leaders only move forward, so a gap can only open. Like the
+flock, a store is deterministic for its seed and can be replayed up to
+any frame, from a checkpoint (replay.py). All positions are in base units.
+A vehicle going west is drawn from the mirror image of its shape.
+"""
+
+from collections import namedtuple
+
+import numpy as np
+
+from geometry import stamp_shape, sx, sy
+from replay import Replay
+from scene import (display_list, draw_boat_with_turtle, draw_car,
+                   mirrored_display_list, shape_bounds)
+from state import BOAT_STEP, CAR_STEP
+
+# One kind of vehicle. lanes is [(dy, direction), ...]: how far below the
+# shape's own road or river line the lane runs and which way (+1 east,
+# -1 west); speed is the mean top speed in base units per step.
+Kind = namedtuple("Kind", "shape lanes speed")
+
+KINDS = {
+    "car": Kind(shape=draw_car, lanes=[(0, 1), (-16, -1)], speed=CAR_STEP),
+    # the sail only looks right going east, so the river runs one way
+    "boat": Kind(shape=draw_boat_with_turtle, lanes=[(0, 1), (-18, 1)],
+                 speed=BOAT_STEP),
+}
+
+VIEW = (-500, 500)   # x range a vehicle must have left before it wraps
+MIN_GAP = 12         # base units kept clear behind every leader
+ACCEL = 0.05         # speed gained per step, base units
+SPEED_SPREAD = 0.3   # top speeds vary by this fraction either way
+LOOP_SLACK = 1.5     # a full lane's loop per vehicle, in bumper-to-bumper lengths
+
+
+def lane_loop(name):
+    """Length of the loop each lane of kind `name` runs round: the view
+    and one vehicle, so it is back in view as soon as it has left."""
+    x0, _, x1, _ = shape_bounds(KINDS[name].shape, 0)
+    return VIEW[1] - VIEW[0] + x1 - x0
+
+
+def lane_capacity(name):
+    """Most vehicles of kind `name` one lane takes."""
+    x0, _, x1, _ = shape_bounds(KINDS[name].shape, 0)
+    return int(lane_loop(name) / (LOOP_SLACK * (x1 - x0 + MIN_GAP)))
+
+
+class Traffic(Replay):
+    def __init__(self, counts, seed=0):
+        """counts maps a kind name to how many of it are asked for; the
+        lanes take up to lane_capacity() each."""
+        super().__init__()
+        self.requested = {name: count for name, count in counts.items()
+                          if count}
+        self.counts = {}  # kind name -> how many were placed
+        self.seed = seed
+        kind, lane, length = [], [], []
+        lane_y, lane_dir, lane_x0, lane_len = [], [], [], []
+        for k, name in enumerate(self.requested):
+            spec = KINDS[name]
+            x0, _, x1, _ = shape_bounds(spec.shape, 0)
+            lanes = len(spec.lanes)
+            loop = lane_loop(name)
+            self.counts[name] = 0
+            for i, (dy, direction) in enumerate(spec.lanes):
+                n = min(len(range(i, self.requested[name], lanes)),
+                        lane_capacity(name))
+                self.counts[name] += n
+                kind += [k] * n
+                lane += [len(lane_y)] * n
+                length += [x1 - x0] * n
+                lane_y.append(dy)
+                lane_dir.append(direction)
+                # where the offset is when a vehicle has just come round
+                lane_x0.append(VIEW[0] - x1 if direction > 0 else VIEW[1] - x0)
+                lane_len.append(loop)
+        self.kinds = list(self.counts)
+        self.kind = np.array(kind, dtype=np.int8)
+        self.lane = np.array(lane, dtype=np.int16)
+        self.lane_y = np.array(lane_y, dtype=float)
+        self.lane_dir = np.array(lane_dir, dtype=float)
+        self.lane_x0 = np.array(lane_x0, dtype=float)
+        self.lane_len = np.array(lane_len, dtype=float)
+        self.length = np.array(length, dtype=float)
+        n = len(self.kind)
+        self.s = np.zeros(n)       # distance along the lane, never wrapped
+        self.v = np.zeros(n)
+        self.top = np.zeros(n)
+        self.x = np.zeros(n)
+        self._room = np.empty(n)
+
+        # the row after each one in its lane, wrapping to the lane's first;
+        # the lane's front vehicle sees its leader one loop further on
+        rows = np.arange(n)
+        first = np.searchsorted(self.lane, np.arange(len(lane_y)))
+        end = np.r_[first[1:], n]
+        held = end > first  # lanes with anyone in them
+        self.lead = rows + 1
+        self.lead[end[held] - 1] = first[held]
+        self.lead_loop = np.zeros(n)
+        self.lead_loop[end[held] - 1] = self.lane_len[held]
+        self.reset()
+
+    @property
+    def count(self):
+        return len(self.kind)
+
+    def reset(self):
+        rng = np.random.default_rng(self.seed)
+        self.frame = 0
+        top = np.array([KINDS[name].speed for name in self.kinds])[self.kind]
+        self.top[:] = top * (1 + rng.uniform(-SPEED_SPREAD, SPEED_SPREAD,
+                                             self.count))
+        self.v[:] = self.top
+        # spread each lane evenly round its loop with some jitter, in order
+        for lane in range(len(self.lane_y)):
+            rows = np.flatnonzero(self.lane == lane)
+            if not len(rows):
+                continue
+            slot = self.lane_len[lane] / len(rows)
+            jitter = slot - self.length[rows[0]] - MIN_GAP
+            self.s[rows] = (np.arange(len(rows)) * slot
+                            + rng.uniform(0, jitter, len(rows)))
+        self._place()
+
+    def step(self):
+        """Move every vehicle one step."""
+        s = self.s
+        # room up to MIN_GAP behind where the leader is now
+        room = np.subtract(s[self.lead], s, out=self._room)
+        room += self.lead_loop
+        room -= self.length
+        room -= MIN_GAP
+        self.v += ACCEL
+        np.minimum(self.v, self.top, out=self.v)
+        np.minimum(self.v, room, out=self.v)
+        np.maximum(self.v, 0, out=self.v)
+        s += self.v
+        self.frame += 1
+        self._place()
+
+    def _place(self):
+        lane = self.lane
+        np.mod(self.s, self.lane_len[lane], out=self.x)
+        self.x *= self.lane_dir[lane]
+        self.x += self.lane_x0[lane]
+
+    def advance_to(self, frame):
+        """Step forward (or back, from a checkpoint) until `frame`."""
+        self.replay_to(frame, lambda n: self.step())
+
+    def snapshot(self):
+        return self.frame, self.s.copy(), self.v.copy()
+
+    def restore(self, snapshot):
+        self.frame, s, v = snapshot
+        self.s[:] = s
+        self.v[:] = v
+        self._place()
+
+    def in_view(self, name, x0=VIEW[0], x1=VIEW[1]):
+        """Rows of kind `name` that overlap x0..x1, farthest lane first."""
+        spec = KINDS[name]
+        bx0, _, bx1, _ = shape_bounds(spec.shape, 0)
+        x = self.x
+        rows = np.flatnonzero((self.kind == self.kinds.index(name))
+                              & (x + bx1 > x0) & (x + bx0 < x1))
+        # a lane further down the screen is nearer, so it goes on top
+        return rows[np.argsort(-self.lane_y[self.lane[rows]], kind="stable")]
+
+    def draw(self, t, name, x0=VIEW[0], x1=VIEW[1]):
+        """Every vehicle of kind `name` in x0..x1; returns how many."""
+        if name not in self.counts:
+            return 0
+        rows = self.in_view(name, x0, x1)
+        shape = KINDS[name].shape
+        lanes = self.lane[rows]
+        # one stamp per lane, in drawing order, facing the way it runs
+        for run in np.split(rows, np.flatnonzero(np.diff(lanes)) + 1):
+            if not len(run):
+                continue
+            lane = self.lane[run[0]]
+            dl = (display_list(shape, 0) if self.lane_dir[lane] > 0
+                  else mirrored_display_list(shape, 0))
+            stamp_shape(t, dl, sx(self.x[run]), sy(self.lane_y[self.lane[run]]))
+        return len(rows)
+
+    def stats(self):
+        return {"vehicles": self.count,
+                "turned_away": sum(self.requested.values()) - self.count,
+                "stopped": int(np.count_nonzero(self.v == 0)),
+                "mean_speed": float(self.v.mean()) if self.count else 0.0}
@@ -0,0 +1,131 @@
+"""A procedural village for the scrolling camera.
+
+The world is cut along x into chunks CHUNK_W base units wide. A chunk's
+props (houses, trees, windmills, cows and flowers) come from a
+random.Random seeded with the world seed and the chunk index, so a chunk
+can be dropped and regenerated at any time and always comes out the same.
+World generates chunks as the camera approaches, keeps them in an LRU cache
+with their props filed in a spatial grid, and evicts the ones left behind,
+so memory and per-frame work stay flat however far the camera travels.
+"""
+
+import math
+import random
+from collections import OrderedDict, namedtuple
+
+import scene
+import spatial
+
+CHUNK_W = 300     # base units
+LOOKAHEAD = 1     # chunks kept generated past each edge of the window
+MAX_CHUNKS = 8    # cache size; never less than the window needs
+
+Prop = namedtuple("Prop", "kind x y phase")
+
+# what stands along the ground line: kind -> (footprint width, weight)
+GROUND_PROPS = {
+    "house_right": (110, 3),
+    "house_left": (145, 3),
+    "tree": (120, 4),
+    "windmill": (80, 1),
+    "cow": (105, 2),
+}
+FLOWER_Y = (-215, -160)  # the grass in front of the houses
+
+
+def generate_chunk(seed, index):
+    """The props of chunk `index`."""
+    rng = random.Random("%s:%d" % (seed, index))
+    start = index * CHUNK_W
+    kinds = list(GROUND_PROPS)
+    weights = [GROUND_PROPS[k][1] for k in kinds]
+
+    props = []
+    for _ in range(rng.randint(1, 5)):
+        props.append(Prop("flower", rng.uniform(start, start + CHUNK_W),
+                          rng.uniform(*FLOWER_Y), 0))
+    x = start + rng.uniform(0, 40)
+    while True:
+        kind = rng.choices(kinds, weights)[0]
+        width = GROUND_PROPS[kind][0]
+        if x + width > start + CHUNK_W:
+            break
+        props.append(Prop(kind, x + width / 2, 0, rng.uniform(0, 90)))
+        x += width + rng.uniform(10, 80)
+    return tuple(props)
+
+
+class Camera:
+    """Horizontal camera: `x` is the world x at the centre of the window.
+
+    The scroll position follows the animation state; pan() adds an offset
+    on top of it (the arrow keys in the live scene).
+    """
+
+    def __init__(self):
+        self.scroll = 0.0
+        self.offset = 0.0
+
+    @property
+    def x(self):
+        return self.scroll + self.offset
+
+    def pan(self, dx):
+        self.offset += dx
+
+    def view(self, window):
+        """The window box (base units, centred on 0) in world coordinates."""
+        return spatial.translate(window, self.x, 0)
+
+
+class World:
+    """Chunks around the camera, cached LRU, with their props in a grid."""
+
+    def __init__(self, seed, max_chunks=MAX_CHUNKS):
+        self.seed = seed
+        self.max_chunks = max_chunks
+        self.chunks = OrderedDict()  # index -> props
+        self.grid = spatial.SpatialGrid(CHUNK_W / 2)
+        self._boxes = {kind: scene.prop_bounds(kind)
+                       for kind in scene.PROP_ANCHORS}
+        self.generated = self.evictions = 0
+
+    def update(self, view):
+        """Make sure every chunk within LOOKAHEAD of `view` is loaded."""
+        first = math.floor(view[0] / CHUNK_W) - LOOKAHEAD
+        last = math.floor(view[2] / CHUNK_W) + LOOKAHEAD
+        for index in range(first, last + 1):
+            if index in self.chunks:
+                self.chunks.move_to_end(index)
+            else:
+                self._load(index)
+        limit = max(self.max_chunks, last - first + 1)
+        while len(self.chunks) > limit:
+            self._evict(*self.chunks.popitem(last=False))
+
+    def _load(self, index):
+        props = self.chunks[index] = generate_chunk(self.seed, index)
+        for i, prop in enumerate(props):
+            self.grid.insert((index, i), spatial.translate(
+                self._boxes[prop.kind], prop.x, prop.y))
+        self.generated += 1
+
+    def _evict(self, index, props):
+        for i in range(len(props)):
+            self.grid.remove((index, i))
+        self.evictions += 1
+
+    def visible(self, view):
+        """Props overlapping `view`, in drawing order."""
+        chunks = self.chunks
+        props = [chunks[index][i] for index, i in self.grid.query(view)]
+        props.sort(key=lambda p: (scene.PROP_DEPTH[p.kind], p.x))
+        return props
+
+    def stats(self):
+        return {
+            "chunks": len(self.chunks),
+            "props": len(self.grid),
+            "generated": self.generated,
+            "evictions": self.evictions,
+        }